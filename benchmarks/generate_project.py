@@ -0,0 +1,152 @@
+"""
+Generate synthetic projects to benchmark deply against.
+
+Each layer is a package of modules. Every class in a layer inherits from the layer base
+class, is decorated with the layer marker and is named after its layer, so each collector
+type matches the same elements. Modules import classes from other modules at random, with
+a fixed seed, so that layer N depending on layer N + 1 produces violations.
+
+Usage:
+    python -m benchmarks.generate_project OUTPUT_DIR --files 10000
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import yaml
+
+COLLECTOR_TYPES = ('directory', 'class_name_regex', 'class_inherits', 'decorator_usage', 'file_regex', 'bool')
+
+
+def layer_collector(collector_type: str, layer_index: int) -> Dict[str, Any]:
+    if collector_type == 'directory':
+        return {'type': 'directory', 'directories': [f'layer_{layer_index}']}
+    if collector_type == 'class_name_regex':
+        return {'type': 'class_name_regex', 'class_name_regex': f'^L{layer_index}_.*'}
+    if collector_type == 'class_inherits':
+        return {'type': 'class_inherits', 'base_class': f'Base{layer_index}'}
+    if collector_type == 'decorator_usage':
+        return {'type': 'decorator_usage', 'decorator_name': f'layer{layer_index}'}
+    if collector_type == 'file_regex':
+        return {'type': 'file_regex', 'regex': f'.*/layer_{layer_index}/.*', 'element_type': 'class'}
+    if collector_type == 'bool':
+        return {
+            'type': 'bool',
+            'must': [{'type': 'directory', 'directories': [f'layer_{layer_index}'], 'element_type': 'class'}],
+            'must_not': [{'type': 'class_name_regex', 'class_name_regex': '.*Ignored$'}],
+        }
+    raise ValueError(f"Unknown collector type: {collector_type}")
+
+
+def class_name(layer_index: int, module_index: int, class_index: int) -> str:
+    return f'L{layer_index}_M{module_index}_C{class_index}'
+
+
+def generate_project(
+        output_dir: Path,
+        files: int,
+        classes_per_file: int = 3,
+        imports_per_file: float = 4.0,
+        layers: int = 6,
+        collectors: Sequence[str] = COLLECTOR_TYPES,
+        seed: int = 0
+) -> Path:
+    """Write a synthetic project to `output_dir` and return the path of its deply configuration."""
+    rng = random.Random(seed)
+    source_dir = Path(output_dir) / 'src'
+    layer_dirs: List[Path] = []
+    for layer_index in range(layers):
+        layer_dir = source_dir / f'layer_{layer_index}'
+        layer_dir.mkdir(parents=True, exist_ok=True)
+        (layer_dir / '__init__.py').write_text('')
+        (layer_dir / 'base.py').write_text(f'class Base{layer_index}:\n    pass\n')
+        layer_dirs.append(layer_dir)
+    (source_dir / 'markers.py').write_text(
+        ''.join(f'def layer{layer_index}(obj):\n    return obj\n\n\n' for layer_index in range(layers))
+    )
+
+    modules_per_layer = [len(range(layer_index, files, layers)) for layer_index in range(layers)]
+    for file_index in range(files):
+        layer_index = file_index % layers
+        module_index = file_index // layers
+
+        imported = []
+        for _ in range(int(imports_per_file) + (rng.random() < imports_per_file % 1)):
+            target_layer = rng.randrange(min(layers, files))
+            target_module = rng.randrange(modules_per_layer[target_layer])
+            if (target_layer, target_module) != (layer_index, module_index):
+                imported.append((target_layer, target_module, rng.randrange(classes_per_file)))
+
+        lines = [
+            f'from markers import layer{layer_index}',
+            f'from layer_{layer_index}.base import Base{layer_index}',
+        ]
+        for target_layer, target_module, target_class in imported:
+            lines.append(
+                f'from layer_{target_layer}.mod_{target_module} import '
+                f'{class_name(target_layer, target_module, target_class)}'
+            )
+        for class_index in range(classes_per_file):
+            lines += [
+                '',
+                '',
+                f'@layer{layer_index}',
+                f'class {class_name(layer_index, module_index, class_index)}(Base{layer_index}):',
+                '    def run(self, value: int) -> int:',
+            ]
+            if imported:
+                target_layer, target_module, target_class = imported[class_index % len(imported)]
+                lines.append(f'        return {class_name(target_layer, target_module, target_class)}().run(value)')
+            else:
+                lines.append('        return value')
+        lines += ['', '', f'def helper_{module_index}():', '    return None', '']
+        (layer_dirs[layer_index] / f'mod_{module_index}.py').write_text('\n'.join(lines))
+
+    config_path = Path(output_dir) / 'deply.yaml'
+    config = {
+        'deply': {
+            'paths': [str(source_dir.resolve())],
+            'layers': [
+                {'name': f'layer_{layer_index}',
+                 'collectors': [layer_collector(collectors[layer_index % len(collectors)], layer_index)]}
+                for layer_index in range(layers)
+            ],
+            'ruleset': {
+                f'layer_{layer_index}': {'disallow': [f'layer_{layer_index + 1}']}
+                for layer_index in range(layers - 1)
+            },
+        }
+    }
+    with config_path.open('w') as f:
+        yaml.dump(config, f, sort_keys=False)
+    return config_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic project to benchmark deply against')
+    parser.add_argument('output_dir', type=str, help="Directory to write the project to")
+    parser.add_argument('--files', type=int, default=1000, help="Number of modules")
+    parser.add_argument('--classes-per-file', type=int, default=3, help="Number of classes in each module")
+    parser.add_argument('--imports-per-file', type=float, default=4.0,
+                        help="Average number of classes each module imports from other modules")
+    parser.add_argument('--layers', type=int, default=6, help="Number of layers")
+    parser.add_argument('--collectors', type=str, default=','.join(COLLECTOR_TYPES),
+                        help="Comma separated collector types assigned to the layers in turn")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random imports")
+    args = parser.parse_args()
+
+    config_path = generate_project(
+        Path(args.output_dir),
+        files=args.files,
+        classes_per_file=args.classes_per_file,
+        imports_per_file=args.imports_per_file,
+        layers=args.layers,
+        collectors=args.collectors.split(','),
+        seed=args.seed
+    )
+    print(config_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Run deply against synthetic projects of growing size and report its throughput.
+
+Each size is analyzed in a fresh process with `--profile`, so the report shows the time of
+every phase, the throughput in files and dependencies per second and the peak RSS of that
+run. Generated projects are kept in the work directory and reused by later runs.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1000,10000,100000 --output results.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.generate_project import COLLECTOR_TYPES, generate_project
+from deply.utils.memory import peak_memory_mb
+
+DEFAULT_SIZES = '1000,3000,10000,30000,100000'
+REPORTED_PHASES = ('file_discovery', 'collection', 'dependency_analysis', 'rule_checking')
+
+
+def measure(config_path: Path, profile_path: Path, deply_args: List[str]) -> None:
+    """
+    Run one analysis in this process and add its peak RSS to the profile. The default verbosity
+    only logs a summary, so the timings do not include formatting per-file debug messages.
+    """
+    from deply.main import main
+
+    sys.argv = [
+        'deply', 'analyze', '--config', str(config_path), '--profile', str(profile_path),
+        '--report-format', 'jsonl', '--output', str(profile_path.with_suffix('.jsonl')), *deply_args
+    ]
+    try:
+        main()
+    except SystemExit:
+        pass
+    profile = json.loads(profile_path.read_text())
+    profile['peak_rss_mb'] = peak_memory_mb()
+    profile_path.write_text(json.dumps(profile, indent=2))
+
+
+def run_size(work_dir: Path, files: int, args: argparse.Namespace) -> Dict[str, Any]:
+    project_dir = work_dir / (
+        f'project_{files}_{args.classes_per_file}_{args.imports_per_file}_{args.layers}_'
+        f'{args.collectors.replace(",", "-")}'
+    )
+    config_path = project_dir / 'deply.yaml'
+    if not config_path.exists():
+        print(f"Generating {files} file(s) in {project_dir} ...", file=sys.stderr)
+        generate_project(
+            project_dir,
+            files=files,
+            classes_per_file=args.classes_per_file,
+            imports_per_file=args.imports_per_file,
+            layers=args.layers,
+            collectors=args.collectors.split(',')
+        )
+
+    profile_path = project_dir / 'profile.json'
+    deply_args = ['--jobs', str(args.jobs)] + ([] if args.cache else ['--no-cache'])
+    subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run_benchmarks', '--measure', str(config_path), str(profile_path),
+         *deply_args],
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True
+    )
+    profile = json.loads(profile_path.read_text())
+    total_wall = sum(profile['phases'].get(phase, {}).get('wall', 0.0)
+                     for phase in ('config_parsing', 'file_discovery', 'collection', 'dependency_analysis'))
+    return {
+        'files': files,
+        'wall': total_wall,
+        'files_per_second': profile['counters']['files'] / total_wall if total_wall else 0.0,
+        'dependencies_per_second': profile['counters']['dependencies'] / total_wall if total_wall else 0.0,
+        'peak_rss_mb': profile['peak_rss_mb'],
+        'profile': profile,
+    }
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    header = ['files', 'total s'] + [f'{phase} s' for phase in REPORTED_PHASES] + ['files/s', 'deps/s', 'peak MB']
+    print(' | '.join(header))
+    for result in results:
+        phases = result['profile']['phases']
+        row = [str(result['files']), f"{result['wall']:.2f}"]
+        row += [f"{phases.get(phase, {}).get('wall', 0.0):.2f}" for phase in REPORTED_PHASES]
+        row += [
+            f"{result['files_per_second']:.0f}",
+            f"{result['dependencies_per_second']:.0f}",
+            f"{result['peak_rss_mb']:.0f}",
+        ]
+        print(' | '.join(row))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(Path(sys.argv[2]), Path(sys.argv[3]), sys.argv[4:])
+        return
+
+    parser = argparse.ArgumentParser(description='Benchmark deply against synthetic projects of growing size')
+    parser.add_argument('--sizes', type=str, default=DEFAULT_SIZES, help="Comma separated numbers of files")
+    parser.add_argument('--classes-per-file', type=int, default=3, help="Number of classes in each module")
+    parser.add_argument('--imports-per-file', type=float, default=4.0,
+                        help="Average number of classes each module imports from other modules")
+    parser.add_argument('--layers', type=int, default=6, help="Number of layers")
+    parser.add_argument('--collectors', type=str, default=','.join(COLLECTOR_TYPES),
+                        help="Comma separated collector types assigned to the layers in turn")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Value of `deply analyze --jobs`")
+    parser.add_argument('--cache', action='store_true', help="Use the analysis cache (measures warm runs)")
+    parser.add_argument('--work-dir', type=str, help="Directory for the generated projects (default: a temporary one)")
+    parser.add_argument('--output', type=str, help="Write the results, including the full profiles, to a JSON file")
+    args = parser.parse_args()
+
+    if args.work_dir:
+        work_dir = Path(args.work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        results = [run_size(work_dir, int(size), args) for size in args.sizes.split(',')]
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = [run_size(Path(tmp_dir), int(size), args) for size in args.sizes.split(',')]
+
+    print_results(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from deply import __version__
+from deply.models.code_element import CodeElement
+from deply.models.reference import Reference
+
+DEFAULT_MAX_SIZE_MB = 256
+# Bumped whenever the layout of the cached results changes
+CACHE_FORMAT_VERSION = 5
+
+
+def default_cache_dir(config_path: Path) -> Path:
+    """
+    The cache directory of the project configured by `config_path`, in the user cache directory
+    rather than in the checkout, so that cache entries cannot be supplied along with the code.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Caches'
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    project = hashlib.sha256(str(Path(config_path).absolute()).encode('utf-8')).hexdigest()[:16]
+    return Path(base) / 'deply' / project
+
+
+def _encode_matches(matches: List[Tuple[str, Set[CodeElement]]]) -> list:
+    return [
+        [layer_name, [[str(e.file), e.name, e.element_type, e.line, e.column] for e in elements]]
+        for layer_name, elements in matches
+    ]
+
+
+def _decode_matches(data: list) -> List[Tuple[str, Set[CodeElement]]]:
+    return [
+        (str(layer_name), {CodeElement(Path(file), name, element_type, int(line), int(column))
+                           for file, name, element_type, line, column in elements})
+        for layer_name, elements in data
+    ]
+
+
+def _decode_references(data: list) -> List[Reference]:
+    return [Reference(*reference) for reference in data]
+
+
+# Converts each kind of result to and from JSON compatible data
+_CODECS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    'matches': (_encode_matches, _decode_matches),
+    'references': (lambda references: [list(reference) for reference in references], _decode_references),
+}
+
+
+class AnalysisCache:
+    """
+    On-disk cache of per-file analysis results.
+
+    Entries are keyed by the file path and content hash together with the deply version and a
+    fingerprint of the configuration, so a warm run only parses the files that changed. Each
+    kind of result ('matches', 'references') is stored as one JSON file per source file, so
+    reading an entry never runs code.
+    """
+
+    def __init__(self, cache_dir: Path, config_fingerprint: str, max_size: int = DEFAULT_MAX_SIZE_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.config_fingerprint = config_fingerprint
+        self.max_size = max_size
+        self._file_keys: Dict[str, str] = {}
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {'hits': 0, 'misses': 0, 'writes': 0}
+
+    @staticmethod
+    def fingerprint(config: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {
+                'version': __version__,
+                'format': CACHE_FORMAT_VERSION,
+                'paths': config['paths'],
+                'exclude_files': config['exclude_files'],
+                'layers': config['layers'],
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def file_key(self, file_path: Path, source: Optional[bytes] = None) -> str:
+        """Return the key of a file, hashing `source` when its content was read already."""
+        key = self._file_keys.get(str(file_path))
+        if key is None:
+            digest = hashlib.sha256(self.config_fingerprint.encode('utf-8'))
+            digest.update(str(file_path).encode('utf-8'))
+            if source is None:
+                with open(file_path, 'rb') as f:
+                    source = f.read()
+            digest.update(source)
+            key = digest.hexdigest()
+            self._file_keys[str(file_path)] = key
+        return key
+
+    def remember_key(self, file_path: Path, key: str) -> None:
+        self._file_keys[str(file_path)] = key
+
+    def forget(self, file_path: Path) -> None:
+        """Drop the remembered key of a file whose content may have changed."""
+        self._file_keys.pop(str(file_path), None)
+
+    def _entry_path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / key[:2] / key
+
+    def contains(self, kind: str, file_path: Path) -> bool:
+        try:
+            return self._entry_path(kind, self.file_key(file_path)).exists()
+        except OSError:
+            return False
+
+    def load(self, kind: str, file_path: Path, source: Optional[bytes] = None) -> Optional[Any]:
+        try:
+            entry_path = self._entry_path(kind, self.file_key(file_path, source))
+            with open(entry_path, 'rb') as f:
+                value = _CODECS[kind][1](json.load(f))
+            os.utime(entry_path)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except Exception as e:
+            logging.debug(f"Ignoring unreadable cache entry for {file_path}: {e}")
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return value
+
+    def store(self, kind: str, file_path: Path, value: Any) -> None:
+        try:
+            entry_path = self._entry_path(kind, self.file_key(file_path))
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(_CODECS[kind][0](value), separators=(',', ':')).encode('utf-8')
+            fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.debug(f"Failed to write cache entry for {file_path}: {e}")
+            return
+        self.stats['writes'] += 1
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._file_keys.clear()
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until the cache fits in `max_size` bytes."""
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        evicted = 0
+        if total_size > self.max_size:
+            for _, size, path in sorted(entries):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total_size -= size
+                evicted += 1
+                if total_size <= self.max_size:
+                    break
+        return evicted
+
+    def pop_stats(self) -> Dict[str, int]:
+        stats, self.stats = self.stats, self._empty_stats()
+        return stats
+
+    def merge_stats(self, stats: Dict[str, int]) -> None:
+        for name, value in stats.items():
+            self.stats[name] += value
+
+    def log_stats(self) -> None:
+        logging.info(
+            f"Analysis cache: {self.stats['hits']} hit(s), {self.stats['misses']} miss(es), "
+            f"{self.stats['writes']} entr(ies) written."
+        )
@@ -1,20 +1,74 @@
 import ast
 import logging
-from typing import Dict, Set, List, Callable
+from pathlib import Path
+from typing import Dict, Set, List, Callable, Optional, Tuple
 
+from deply.analysis_cache import AnalysisCache
 from deply.models.code_element import CodeElement
-from deply.models.dependency import Dependency
+from deply.models.dependency import AggregatedDependency, Dependency
+from deply.models.element_store import ElementStore
+from deply.models.reference import Reference
+from deply.parsed_file_store import ParsedFileStore
+from deply.profiler import Profiler
+from deply.utils.ast_utils import get_qualified_import_aliases
+from deply.utils.module_utils import (
+    get_module_name, get_qualified_names, get_symbol_roots, resolve_relative_module
+)
+from deply.utils.read_ahead import DEFAULT_READ_AHEAD, ReadAhead, read_file
+
+# Maximum number of package re-exports followed to resolve a name
+MAX_REEXPORT_DEPTH = 8
 
 
 class CodeAnalyzer:
+    """
+    Finds the dependencies between code elements and hands each of them to the dependency handler.
+
+    Names are resolved like Python does: through the imports of a file, or to the code elements
+    defined in the file itself. Code elements are known by their module qualified names, which
+    are derived from their file paths relative to `paths` and to their parent directories, and
+    names re-exported by the `__init__.py` of a package are followed. A name that still matches
+    no code element falls back to the code elements with the same short name, unless it was
+    imported from a module outside of the analyzed paths.
+
+    With `aggregate_edges`, every occurrence of the same (source, target, dependency type) edge
+    within a file is reported once, as an AggregatedDependency located at the first occurrence.
+
+    Files whose trees are not retained are read `read_ahead` files ahead of their analysis.
+    With an `element_store`, the code elements and the symbol table are read from the store
+    instead of being held in memory, and `code_elements` is not used.
+    """
+
     def __init__(
             self,
             code_elements: Set[CodeElement],
             dependency_handler: Callable[[Dependency], None],
-            dependency_types: List[str] = None
+            dependency_types: List[str] = None,
+            parsed_file_store: Optional[ParsedFileStore] = None,
+            analysis_cache: Optional[AnalysisCache] = None,
+            profiler: Optional[Profiler] = None,
+            aggregate_edges: bool = False,
+            paths: Optional[List[Path]] = None,
+            read_ahead: int = DEFAULT_READ_AHEAD,
+            element_store: Optional[ElementStore] = None
     ):
         self.code_elements = code_elements
         self.dependency_handler = dependency_handler
+        # An empty store is falsy, so it is compared with None
+        if parsed_file_store is None:
+            parsed_file_store = ParsedFileStore(profiler=profiler)
+        self.parsed_file_store = parsed_file_store
+        self.analysis_cache = analysis_cache
+        self.profiler = profiler
+        self.aggregate_edges = aggregate_edges
+        self.paths = paths or []
+        self.read_ahead = read_ahead
+        self.element_store = element_store
+        self._module_names: Dict[Path, Tuple[str, bool]] = {}
+        self._symbol_roots = get_symbol_roots(self.paths)
+        self._package_exports: Dict[str, Dict[str, str]] = {}
+        self._reexports: Dict[str, Optional[str]] = {}
+        self._top_level_modules: Optional[Set[str]] = None
         self.dependency_types = dependency_types or [
             'import',
             'import_from',
@@ -29,62 +83,346 @@ class CodeAnalyzer:
         ]
         logging.debug(f"Initialized CodeAnalyzer with {len(self.code_elements)} code elements.")
 
-    def analyze(self) -> None:
+    def analyze(self, jobs: int = 1, only_files: Optional[Set[Path]] = None) -> None:
         logging.debug("Starting analysis of code elements.")
-        name_to_elements = self._build_name_to_element_map()
-        logging.debug(f"Name to elements map built with {len(name_to_elements)} names.")
+        symbol_table = self._build_symbol_table()
+
+        file_to_elements = self._build_file_to_element_map()
+        # Files are visited in a stable order so that serial and parallel runs report identically
+        files = sorted(file_to_elements)
+        if only_files is not None:
+            files = [file_path for file_path in files if file_path in only_files]
+            logging.debug(f"Restricting analysis to {len(files)} file(s).")
+
+        if jobs > 1:
+            from deply.parallel import extract_in_parallel
+            results = extract_in_parallel(
+                self.code_elements, self.dependency_types, files, jobs, self.analysis_cache, self.profiler,
+                self.aggregate_edges, self.paths, self.element_store
+            )
+            try:
+                for dependencies in results:
+                    for dependency in dependencies:
+                        self.dependency_handler(dependency)
+            finally:
+                # Stops the workers right away if the handler aborted the analysis
+                results.close()
+            logging.debug("Completed analysis of code elements.")
+            return
 
+        read_ahead = ReadAhead(depth=self.read_ahead, read=self._read_unparsed)
+        sources = read_ahead.iterate(files)
+        try:
+            for file_path, source in sources:
+                elements_in_file = file_to_elements[file_path]
+                logging.debug(f"Analyzing file: {file_path} with {len(elements_in_file)} code elements")
+                self._extract_dependencies_from_file(file_path, elements_in_file, symbol_table, source)
+                self.parsed_file_store.release(file_path)
+        finally:
+            # Stops reading ahead right away if the handler aborted the analysis
+            sources.close()
+        read_ahead.log_stats()
+        logging.debug("Completed analysis of code elements.")
+
+    def _read_unparsed(self, file_path: Path) -> Optional[bytes]:
+        # Only files that are neither retained in the store nor cached are parsed again
+        if self.parsed_file_store.contains(file_path):
+            return None
+        if self.analysis_cache is not None and self.analysis_cache.contains('references', file_path):
+            return None
+        return read_file(file_path)
+
+    def _build_file_to_element_map(self) -> Dict[str, Set[CodeElement]]:
+        if self.element_store is not None:
+            return self.element_store.file_elements()
         file_to_elements: Dict[str, Set[CodeElement]] = {}
         for code_element in self.code_elements:
             file_to_elements.setdefault(code_element.file, set()).add(code_element)
+        return file_to_elements
 
-        for file_path, elements_in_file in file_to_elements.items():
-            logging.debug(f"Analyzing file: {file_path} with {len(elements_in_file)} code elements")
-            self._extract_dependencies_from_file(file_path, elements_in_file, name_to_elements)
-        logging.debug("Completed analysis of code elements.")
+    def module_name(self, file_path: Path) -> Tuple[str, bool]:
+        module_name = self._module_names.get(file_path)
+        if module_name is None:
+            module_name = get_module_name(file_path, self.paths)
+            self._module_names[file_path] = module_name
+        return module_name
 
-    def _build_name_to_element_map(self) -> Dict[str, Set[CodeElement]]:
-        logging.debug("Building name to element map.")
-        name_to_element = {}
+    def _build_symbol_table(self) -> Dict[str, Set[CodeElement]]:
+        """
+        Map the qualified names of the code elements to the elements.
+
+        Every element is registered under each suffix of its module name as well, e.g. a class
+        `Model` in `src/app/models.py` under `src.app.models.Model`, `app.models.Model` and
+        `models.Model`, so imports relative to a directory below the analyzed paths resolve too,
+        and under its short name `Model`.
+        """
+        if self.element_store is not None:
+            return self.element_store.symbol_table()
+        logging.debug("Building symbol table.")
+        symbol_table: Dict[str, Set[CodeElement]] = {}
         for elem in self.code_elements:
-            name_to_element.setdefault(elem.name, set()).add(elem)
-        logging.debug(f"Name to element map contains {len(name_to_element)} entries.")
-        return name_to_element
+            module_name = get_module_name(elem.file, self._symbol_roots)[0]
+            for qualified_name in get_qualified_names(module_name, elem.name):
+                symbol_table.setdefault(qualified_name, set()).add(elem)
+        logging.debug(f"Symbol table contains {len(symbol_table)} entries.")
+        return symbol_table
+
+    @staticmethod
+    def lookup_symbol(symbol_table: Dict[str, Set[CodeElement]], qualified_name: str) -> Optional[Set[CodeElement]]:
+        """
+        Return the code elements a qualified name refers to. Attributes of an element, such as
+        `models.Model.objects`, refer to the element itself.
+        """
+        while '.' in qualified_name:
+            elements = symbol_table.get(qualified_name)
+            if elements:
+                return elements
+            qualified_name = qualified_name.rsplit('.', 1)[0]
+        return None
+
+    def resolve_symbol(
+            self,
+            symbol_table: Dict[str, Set[CodeElement]],
+            reference: Reference
+    ) -> Optional[Set[CodeElement]]:
+        """
+        Return the code elements a reference refers to, following the names re-exported by
+        packages, or else the code elements with the short name the reference was written with.
+
+        Only names that could not be qualified, or that were qualified to a module within the
+        analyzed paths, fall back to short names: a name imported from a module outside of them,
+        e.g. `from requests import get`, never refers to a code element of the project.
+        """
+        qualified_name = reference.name
+        for _ in range(MAX_REEXPORT_DEPTH):
+            elements = self.lookup_symbol(symbol_table, qualified_name)
+            if elements:
+                return elements
+            qualified_name = self._follow_reexport(qualified_name)
+            if qualified_name is None:
+                break
+        local_name = reference.local_name
+        if not local_name or '.' in local_name:
+            return None
+        if '.' in reference.name:
+            if not self._in_analyzed_paths(reference.name):
+                return None
+        elif reference.dependency_type == 'import':
+            return None
+        return symbol_table.get(local_name)
+
+    def _in_analyzed_paths(self, qualified_name: str) -> bool:
+        """Whether the top level module of a name is an analyzed path or a module directly in one."""
+        if self._top_level_modules is None:
+            modules = set()
+            for root in self.paths:
+                root = Path(root)
+                modules.add(root.resolve().name)
+                try:
+                    for entry in root.iterdir():
+                        if entry.is_dir():
+                            modules.add(entry.name)
+                        elif entry.suffix == '.py':
+                            modules.add(entry.stem)
+                except OSError as e:
+                    logging.debug(f"Cannot list the modules of {root}: {e}")
+            self._top_level_modules = modules
+        return qualified_name.split('.', 1)[0] in self._top_level_modules
+
+    def _follow_reexport(self, qualified_name: str) -> Optional[str]:
+        """
+        Return the name that a package re-exports as `qualified_name`, e.g. `app.models.user.User`
+        for `app.models.User` when `app/models/__init__.py` does `from .user import User`.
+        """
+        if qualified_name in self._reexports:
+            return self._reexports[qualified_name]
+        target = None
+        parts = qualified_name.split('.')
+        for i in range(len(parts) - 1, 0, -1):
+            package = '.'.join(parts[:i])
+            exported = self._exports_of(package).get(parts[i])
+            if exported is not None and exported != f"{package}.{parts[i]}":
+                target = '.'.join([exported] + parts[i + 1:])
+                break
+        self._reexports[qualified_name] = target
+        return target
+
+    def _exports_of(self, package: str) -> Dict[str, str]:
+        """Map the names imported by the `__init__.py` of a package to the names they refer to."""
+        exports = self._package_exports.get(package)
+        if exports is not None:
+            return exports
+        exports = {}
+        for root in list(self.paths) + self._symbol_roots:
+            init_path = Path(root).joinpath(*package.split('.'), '__init__.py')
+            if not init_path.is_file():
+                continue
+            try:
+                tree = ast.parse(init_path.read_bytes(), filename=str(init_path))
+            except (OSError, SyntaxError, ValueError) as e:
+                logging.debug(f"Cannot read the exports of {init_path}: {e}")
+                break
+            import_nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+            exports = get_qualified_import_aliases(import_nodes, package, True)[0]
+            break
+        self._package_exports[package] = exports
+        return exports
 
     def _extract_dependencies_from_file(
             self,
             file_path: str,
             code_elements_in_file: Set[CodeElement],
-            name_to_element: Dict[str, Set[CodeElement]]
+            symbol_table: Dict[str, Set[CodeElement]],
+            source: Optional[bytes] = None
     ) -> None:
         logging.debug(f"Extracting dependencies from file: {file_path}")
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
-            logging.debug(f"File {file_path} read successfully.")
-            tree = ast.parse(source_code, filename=str(file_path))
-            logging.debug(f"AST parsing completed for {file_path}.")
-        except (SyntaxError, FileNotFoundError, UnicodeDecodeError) as e:
-            logging.warning(f"Failed to parse {file_path}: {e}")
+        elements_in_file_by_name = self.index_elements_by_name(code_elements_in_file)
+        references = self.get_references(file_path, elements_in_file_by_name, source)
+        if references is None:
+            return
+        self.resolve_references(references, elements_in_file_by_name, symbol_table)
+
+    @staticmethod
+    def index_elements_by_name(code_elements_in_file: Set[CodeElement]) -> Dict[str, CodeElement]:
+        return {
+            elem.name: elem
+            for elem in sorted(code_elements_in_file, key=lambda e: (e.line, e.column, e.name, e.element_type))
+        }
+
+    def get_references(
+            self,
+            file_path: str,
+            elements_in_file_by_name: Dict[str, CodeElement],
+            source: Optional[bytes] = None
+    ) -> Optional[List[Reference]]:
+        if self.analysis_cache is not None:
+            references = self.analysis_cache.load('references', file_path)
+            if references is not None:
+                return references
+
+        tree = self.parsed_file_store.get(file_path, source)
+        if tree is None:
+            return None
+        if self.profiler is not None:
+            started = self.profiler.start()
+        references = self.extract_references(tree, set(elements_in_file_by_name), *self.module_name(file_path))
+        if self.profiler is not None:
+            self.profiler.stop(started, ('extraction', 'visit'))
+        if self.analysis_cache is not None:
+            self.analysis_cache.store('references', file_path, references)
+        return references
+
+    def resolve_references(
+            self,
+            references: List[Reference],
+            elements_in_file_by_name: Dict[str, CodeElement],
+            symbol_table: Dict[str, Set[CodeElement]]
+    ) -> None:
+        if self.aggregate_edges:
+            self._resolve_edges(references, elements_in_file_by_name, symbol_table)
             return
 
-        elements_in_file_by_name = {elem.name: elem for elem in code_elements_in_file}
+        profiler = self.profiler
+        for reference in references:
+            dep_elements = self.resolve_symbol(symbol_table, reference)
+            if not dep_elements:
+                continue
+            if profiler is not None:
+                started = profiler.start()
+            if reference.source_name is None:
+                source_elements = list(elements_in_file_by_name.values())
+            else:
+                source_elements = [elements_in_file_by_name[reference.source_name]]
+            dependencies = [
+                Dependency(
+                    code_element=code_element,
+                    depends_on_code_element=dep_element,
+                    dependency_type=reference.dependency_type,
+                    line=reference.line,
+                    column=reference.column
+                )
+                for dep_element in dep_elements
+                for code_element in source_elements
+            ]
+            if profiler is not None:
+                profiler.stop(started, ('dependency_types', reference.dependency_type))
+            for dependency in dependencies:
+                self.dependency_handler(dependency)
+
+    def _resolve_edges(
+            self,
+            references: List[Reference],
+            elements_in_file_by_name: Dict[str, CodeElement],
+            symbol_table: Dict[str, Set[CodeElement]]
+    ) -> None:
+        profiler = self.profiler
+        # (source, target, dependency type) -> [occurrences, line, column] of the first occurrence
+        edges: Dict[Tuple[CodeElement, CodeElement, str], List[int]] = {}
+        for reference in references:
+            dep_elements = self.resolve_symbol(symbol_table, reference)
+            if not dep_elements:
+                continue
+            if profiler is not None:
+                started = profiler.start()
+            if reference.source_name is None:
+                source_elements = list(elements_in_file_by_name.values())
+            else:
+                source_elements = [elements_in_file_by_name[reference.source_name]]
+            for dep_element in dep_elements:
+                for code_element in source_elements:
+                    edge = edges.get((code_element, dep_element, reference.dependency_type))
+                    if edge is None:
+                        edges[(code_element, dep_element, reference.dependency_type)] = [
+                            1, reference.line, reference.column
+                        ]
+                    else:
+                        edge[0] += 1
+            if profiler is not None:
+                profiler.stop(started, ('dependency_types', reference.dependency_type))
+
+        for (code_element, dep_element, dependency_type), (occurrences, line, column) in edges.items():
+            self.dependency_handler(AggregatedDependency(
+                code_element=code_element,
+                depends_on_code_element=dep_element,
+                dependency_type=dependency_type,
+                line=line,
+                column=column,
+                occurrences=occurrences
+            ))
 
-        class DependencyVisitor(ast.NodeVisitor):
-            def __init__(
-                    self,
-                    code_elements_in_file: Dict[str, CodeElement],
-                    dependency_types: List[str],
-                    dependency_handler: Callable[[Dependency], None]
-            ):
-                self.code_elements_in_file = code_elements_in_file
+    def extract_references(
+            self,
+            tree: ast.AST,
+            element_names: Set[str],
+            module_name: str,
+            is_package: bool = False
+    ) -> List[Reference]:
+        """
+        Collect every name referenced by the given code elements of a parsed file, qualified
+        through the imports of the file or with its own module name.
+
+        Names that are neither imported nor code elements of the file cannot refer to a code
+        element and are skipped. The result only depends on the file itself, so it can be cached
+        and resolved later against the code elements collected from the whole project.
+        """
+        # (needs qualifying, source name, name, dependency type, line, column, local name) in visit order
+        found: List[Tuple[bool, Optional[str], str, str, int, int, str]] = []
+        import_nodes: List[ast.AST] = []
+
+        class ReferenceVisitor(ast.NodeVisitor):
+            def __init__(self, dependency_types: List[str]):
                 self.dependency_types = dependency_types
-                self.dependency_handler = dependency_handler
                 self.current_code_element = None
-                logging.debug(f"DependencyVisitor created for file with {len(code_elements_in_file)} code elements")
+
+            def _add(self, name, dependency_type, line, column):
+                if name:
+                    found.append((True, self.current_code_element, name, dependency_type, line, column, name))
+
+            def _add_file_level(self, name, dependency_type, line, column, local_name):
+                found.append((False, None, name, dependency_type, line, column, local_name))
 
             def visit_FunctionDef(self, node):
-                self.current_code_element = self.code_elements_in_file.get(node.name)
+                self.current_code_element = node.name if node.name in element_names else None
                 if 'decorator' in self.dependency_types and self.current_code_element:
                     self._process_decorators(node)
                 if 'type_annotation' in self.dependency_types and self.current_code_element:
@@ -97,142 +435,70 @@ class CodeAnalyzer:
                 self.current_code_element = None
 
             def visit_ClassDef(self, node):
-                self.current_code_element = self.code_elements_in_file.get(node.name)
+                self.current_code_element = node.name if node.name in element_names else None
                 if 'class_inheritance' in self.dependency_types and self.current_code_element:
                     for base in node.bases:
-                        base_name = self._get_full_name(base)
-                        dep_elements = name_to_element.get(base_name, set())
-                        for dep_element in dep_elements:
-                            dependency = Dependency(
-                                code_element=self.current_code_element,
-                                depends_on_code_element=dep_element,
-                                dependency_type='class_inheritance',
-                                line=base.lineno,
-                                column=base.col_offset
-                            )
-                            self.dependency_handler(dependency)
+                        self._add(self._get_full_name(base), 'class_inheritance', base.lineno, base.col_offset)
                 if 'decorator' in self.dependency_types and self.current_code_element:
                     self._process_decorators(node)
                 if 'metaclass' in self.dependency_types and self.current_code_element:
                     for keyword in node.keywords:
                         if keyword.arg == 'metaclass':
-                            metaclass_name = self._get_full_name(keyword.value)
-                            dep_elements = name_to_element.get(metaclass_name, set())
-                            for dep_element in dep_elements:
-                                dependency = Dependency(
-                                    code_element=self.current_code_element,
-                                    depends_on_code_element=dep_element,
-                                    dependency_type='metaclass',
-                                    line=keyword.value.lineno,
-                                    column=keyword.value.col_offset
-                                )
-                                self.dependency_handler(dependency)
+                            self._add(
+                                self._get_full_name(keyword.value),
+                                'metaclass',
+                                keyword.value.lineno,
+                                keyword.value.col_offset
+                            )
                 self.generic_visit(node)
                 self.current_code_element = None
 
             def _process_decorators(self, node):
                 for decorator in node.decorator_list:
-                    decorator_name = self._get_full_name(decorator)
-                    dep_elements = name_to_element.get(decorator_name, set())
-                    for dep_element in dep_elements:
-                        dependency = Dependency(
-                            code_element=self.current_code_element,
-                            depends_on_code_element=dep_element,
-                            dependency_type='decorator',
-                            line=decorator.lineno,
-                            column=decorator.col_offset
-                        )
-                        self.dependency_handler(dependency)
+                    self._add(self._get_full_name(decorator), 'decorator', decorator.lineno, decorator.col_offset)
 
             def _process_annotation(self, annotation):
-                annotation_name = self._get_full_name(annotation)
-                dep_elements = name_to_element.get(annotation_name, set())
-                for dep_element in dep_elements:
-                    dependency = Dependency(
-                        code_element=self.current_code_element,
-                        depends_on_code_element=dep_element,
-                        dependency_type='type_annotation',
-                        line=getattr(annotation, 'lineno', 0),
-                        column=getattr(annotation, 'col_offset', 0)
-                    )
-                    self.dependency_handler(dependency)
+                self._add(
+                    self._get_full_name(annotation),
+                    'type_annotation',
+                    getattr(annotation, 'lineno', 0),
+                    getattr(annotation, 'col_offset', 0)
+                )
 
             def visit_Call(self, node):
                 if 'function_call' in self.dependency_types and self.current_code_element:
                     if isinstance(node.func, ast.Name):
-                        name = node.func.id
-                        dep_elements = name_to_element.get(name, set())
-                        for dep_element in dep_elements:
-                            dependency = Dependency(
-                                code_element=self.current_code_element,
-                                depends_on_code_element=dep_element,
-                                dependency_type='function_call',
-                                line=node.lineno,
-                                column=node.col_offset
-                            )
-                            self.dependency_handler(dependency)
+                        self._add(node.func.id, 'function_call', node.lineno, node.col_offset)
                     elif isinstance(node.func, ast.Attribute):
-                        full_name = self._get_full_name(node.func)
-                        dep_elements = name_to_element.get(full_name, set())
-                        for dep_element in dep_elements:
-                            dependency = Dependency(
-                                code_element=self.current_code_element,
-                                depends_on_code_element=dep_element,
-                                dependency_type='function_call',
-                                line=node.lineno,
-                                column=node.col_offset
-                            )
-                            self.dependency_handler(dependency)
+                        self._add(self._get_full_name(node.func), 'function_call', node.lineno, node.col_offset)
                 self.generic_visit(node)
 
             def visit_Import(self, node):
+                import_nodes.append(node)
                 if 'import' in self.dependency_types:
                     for alias in node.names:
-                        name = alias.asname or alias.name.split('.')[0]
-                        dep_elements = name_to_element.get(name, set())
-                        for dep_element in dep_elements:
-                            for code_element in self.code_elements_in_file.values():
-                                dependency = Dependency(
-                                    code_element=code_element,
-                                    depends_on_code_element=dep_element,
-                                    dependency_type='import',
-                                    line=node.lineno,
-                                    column=node.col_offset
-                                )
-                                self.dependency_handler(dependency)
+                        self._add_file_level(
+                            alias.name, 'import', node.lineno, node.col_offset,
+                            alias.asname or alias.name.split('.')[0]
+                        )
                 self.generic_visit(node)
 
             def visit_ImportFrom(self, node):
+                import_nodes.append(node)
                 if 'import_from' in self.dependency_types:
+                    module = resolve_relative_module(module_name, is_package, node.level, node.module or '')
                     for alias in node.names:
-                        name = alias.asname or alias.name
-                        dep_elements = name_to_element.get(name, set())
-                        for dep_element in dep_elements:
-                            for code_element in self.code_elements_in_file.values():
-                                dependency = Dependency(
-                                    code_element=code_element,
-                                    depends_on_code_element=dep_element,
-                                    dependency_type='import_from',
-                                    line=node.lineno,
-                                    column=node.col_offset
-                                )
-                                self.dependency_handler(dependency)
+                        if alias.name != '*':
+                            name = f"{module}.{alias.name}" if module else alias.name
+                            self._add_file_level(
+                                name, 'import_from', node.lineno, node.col_offset, alias.asname or alias.name
+                            )
                 self.generic_visit(node)
 
             def visit_Name(self, node):
                 if 'name_load' in self.dependency_types and self.current_code_element:
                     if isinstance(node.ctx, ast.Load):
-                        name = node.id
-                        dep_elements = name_to_element.get(name, set())
-                        for dep_element in dep_elements:
-                            dependency = Dependency(
-                                code_element=self.current_code_element,
-                                depends_on_code_element=dep_element,
-                                dependency_type='name_load',
-                                line=node.lineno,
-                                column=node.col_offset
-                            )
-                            self.dependency_handler(dependency)
+                        self._add(node.id, 'name_load', node.lineno, node.col_offset)
                 self.generic_visit(node)
 
             def _get_full_name(self, node):
@@ -255,11 +521,30 @@ class CodeAnalyzer:
                 else:
                     return None
 
-        visitor = DependencyVisitor(
-            code_elements_in_file=elements_in_file_by_name,
-            dependency_types=self.dependency_types,
-            dependency_handler=self.dependency_handler
-        )
-        logging.debug(f"Starting AST traversal for file: {file_path}")
+        visitor = ReferenceVisitor(dependency_types=self.dependency_types)
         visitor.visit(tree)
-        logging.debug(f"Completed AST traversal for file: {file_path}")
+
+        import_aliases, star_modules = get_qualified_import_aliases(import_nodes, module_name, is_package)
+        qualified_names: Dict[str, List[str]] = {}
+
+        def qualify(name: str) -> List[str]:
+            head, _, rest = name.partition('.')
+            target = import_aliases.get(head)
+            if target is not None:
+                return [f"{target}.{rest}" if rest else target]
+            if head in element_names:
+                return [f"{module_name}.{name}"]
+            # Names pulled in by `from module import *` may come from any of those modules
+            return [f"{star_module}.{name}" for star_module in star_modules]
+
+        references: List[Reference] = []
+        for needs_qualifying, source_name, name, dependency_type, line, column, local_name in found:
+            if not needs_qualifying:
+                references.append(Reference(source_name, name, dependency_type, line, column, local_name))
+                continue
+            names = qualified_names.get(name)
+            if names is None:
+                names = qualified_names[name] = qualify(name)
+            for qualified_name in names:
+                references.append(Reference(source_name, qualified_name, dependency_type, line, column, local_name))
+        return references
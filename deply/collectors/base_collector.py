@@ -1,11 +1,73 @@
 import ast
+import re
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import TYPE_CHECKING, FrozenSet, List, Optional, Set, Tuple, Type
 
 from ..models.code_element import CodeElement
+from .path_classifier import PathClassifier
+
+if TYPE_CHECKING:
+    from .collector_engine import FileNodes
 
 
 class BaseCollector(ABC):
+    # AST node types read by the collector, gathered for all collectors in one walk per file
+    node_types: Tuple[Type[ast.AST], ...] = ()
+    # Kind of path condition of the collector ('file_regex' or 'directory'), evaluated by a
+    # PathClassifier once per file for all collectors
+    path_rule: Optional[str] = None
+    # Files whose path matches are never matched by the collector
+    exclude_regex: Optional[re.Pattern] = None
+
     @abstractmethod
     def match_in_file(self, file_ast: ast.AST, file_path: Path) -> set[CodeElement]:
         pass
+
+    def match_nodes(self, file_nodes: 'FileNodes', file_path: Path) -> set[CodeElement]:
+        # Collectors that do not declare their node types walk the whole tree themselves
+        return self.match_in_file(file_nodes.tree, file_path)
+
+    def collect(self, file_nodes: 'FileNodes', file_path: Path) -> set[CodeElement]:
+        """Match the collector against a file once, however many layers and bool collectors share it."""
+        matched = file_nodes.collector_matches.get(self)
+        if matched is None:
+            matched = file_nodes.collector_matches[self] = self.match_nodes(file_nodes, file_path)
+        return matched
+
+    def path_collectors(self) -> List['BaseCollector']:
+        return [self] if self.path_rule else []
+
+    def may_match_path(self, path_classification: FrozenSet['BaseCollector'], file_path: Path) -> bool:
+        """Whether the collector may match elements in a file, judging by the path of the file alone."""
+        if self.path_rule:
+            return self in path_classification
+        return self.exclude_regex is None or not self.exclude_regex.search(str(file_path))
+
+    def prefilter_names(self) -> Optional[Set[str]]:
+        """
+        Identifiers of which at least one occurs in the source of every file the collector matches,
+        or None when the collector cannot rule out files by their source text.
+        """
+        return None
+
+    def may_match_text(self, names_found: Set[str]) -> bool:
+        """Whether the collector may match elements in a file containing the given prefilter names."""
+        names = self.prefilter_names()
+        return names is None or not names.isdisjoint(names_found)
+
+    @staticmethod
+    def identifier_of(dotted_name: str) -> Optional[Set[str]]:
+        # The last segment of a dotted name is an identifier of the source wherever it is matched
+        identifier = dotted_name.rsplit('.', 1)[-1]
+        return {identifier} if identifier.isidentifier() and identifier.isascii() else None
+
+    def matches_path(self, file_nodes: 'FileNodes', file_path: Path) -> bool:
+        classification = file_nodes.path_classification
+        if classification is None:
+            # Matched on its own rather than through a CollectorEngine
+            classifier = self.__dict__.get('_path_classifier')
+            if classifier is None:
+                classifier = self._path_classifier = PathClassifier([self])
+            classification = classifier.classify(file_path)
+        return self in classification
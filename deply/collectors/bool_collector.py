@@ -1,53 +1,96 @@
 import ast
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, FrozenSet, List, Optional, Set
 
 from deply.models.code_element import CodeElement
 from .base_collector import BaseCollector
+from .collector_engine import FileNodes
 
 
 class BoolCollector(BaseCollector):
-    def __init__(self, config: Dict[str, Any], paths: List[str], exclude_files: List[str]):
+    def __init__(
+            self,
+            config: Dict[str, Any],
+            paths: List[str],
+            exclude_files: List[str],
+            instances: Optional[Dict[str, BaseCollector]] = None
+    ):
         self.must_configs = config.get('must', [])
         self.any_of_configs = config.get('any_of', [])
         self.must_not_configs = config.get('must_not', [])
 
         # Pre-instantiate sub-collectors
         from .collector_factory import CollectorFactory
-        self.must_collectors = [CollectorFactory.create(c, paths, exclude_files) for c in self.must_configs]
-        self.any_of_collectors = [CollectorFactory.create(c, paths, exclude_files) for c in self.any_of_configs]
-        self.must_not_collectors = [CollectorFactory.create(c, paths, exclude_files) for c in self.must_not_configs]
+        self.must_collectors = [
+            CollectorFactory.create(c, paths, exclude_files, instances) for c in self.must_configs
+        ]
+        self.any_of_collectors = [
+            CollectorFactory.create(c, paths, exclude_files, instances) for c in self.any_of_configs
+        ]
+        self.must_not_collectors = [
+            CollectorFactory.create(c, paths, exclude_files, instances) for c in self.must_not_configs
+        ]
 
-    def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
-        must_sets = []
-        for c in self.must_collectors:
-            must_sets.append(c.match_in_file(file_ast, file_path))
-        any_of_sets = []
-        for c in self.any_of_collectors:
-            any_of_sets.append(c.match_in_file(file_ast, file_path))
-        must_not_elements = set()
-        for c in self.must_not_collectors:
-            must_not_elements.update(c.match_in_file(file_ast, file_path))
+        node_types = []
+        for c in self.must_collectors + self.any_of_collectors + self.must_not_collectors:
+            for node_type in c.node_types:
+                if node_type not in node_types:
+                    node_types.append(node_type)
+        self.node_types = tuple(node_types)
 
-        if must_sets:
-            must_elements = set.intersection(*must_sets) if must_sets else set()
-        else:
-            must_elements = None
+    def path_collectors(self) -> List[BaseCollector]:
+        return [
+            path_collector
+            for c in self.must_collectors + self.any_of_collectors + self.must_not_collectors
+            for path_collector in c.path_collectors()
+        ]
 
-        if any_of_sets:
-            any_of_elements = set.union(*any_of_sets) if any_of_sets else set()
-        else:
-            any_of_elements = None
+    def may_match_path(self, path_classification: FrozenSet[BaseCollector], file_path: Path) -> bool:
+        if not self.must_collectors and not self.any_of_collectors:
+            return False
+        return (
+            all(c.may_match_path(path_classification, file_path) for c in self.must_collectors)
+            and (not self.any_of_collectors
+                 or any(c.may_match_path(path_classification, file_path) for c in self.any_of_collectors))
+        )
+
+    def prefilter_names(self) -> Optional[Set[str]]:
+        names = set()
+        for c in self.must_collectors + self.any_of_collectors:
+            names.update(c.prefilter_names() or ())
+        return names
 
-        if must_elements is not None and any_of_elements is not None:
-            combined_elements = must_elements & any_of_elements
+    def may_match_text(self, names_found: Set[str]) -> bool:
+        if not self.must_collectors and not self.any_of_collectors:
+            return False
+        return (
+            all(c.may_match_text(names_found) for c in self.must_collectors)
+            and (not self.any_of_collectors or any(c.may_match_text(names_found) for c in self.any_of_collectors))
+        )
+
+    def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
+        return self.match_nodes(FileNodes(file_ast, self.node_types), file_path)
+
+    def match_nodes(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
+        # Stop evaluating sub-collectors as soon as the result is known to be empty
+        must_elements = None
+        for c in self.must_collectors:
+            matched = c.collect(file_nodes, file_path)
+            must_elements = set(matched) if must_elements is None else must_elements & matched
+            if not must_elements:
+                return set()
+
+        if self.any_of_collectors:
+            any_of_elements = set().union(*(c.collect(file_nodes, file_path) for c in self.any_of_collectors))
+            combined_elements = must_elements & any_of_elements if must_elements is not None else any_of_elements
         elif must_elements is not None:
             combined_elements = must_elements
-        elif any_of_elements is not None:
-            combined_elements = any_of_elements
         else:
             combined_elements = set()
 
-        final_elements = combined_elements - must_not_elements
+        for c in self.must_not_collectors:
+            if not combined_elements:
+                break
+            combined_elements -= c.collect(file_nodes, file_path)
 
-        return final_elements
+        return combined_elements
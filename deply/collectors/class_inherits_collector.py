@@ -1,32 +1,40 @@
 import ast
 import re
 from pathlib import Path
-from typing import List, Set
+from typing import List, Optional, Set
 from deply.collectors import BaseCollector
 from deply.models.code_element import CodeElement
-from deply.utils.ast_utils import get_import_aliases, get_base_name
+from deply.utils.ast_utils import get_base_name
+from .collector_engine import FileNodes
 
 class ClassInheritsCollector(BaseCollector):
+    node_types = (ast.ClassDef, ast.Import, ast.ImportFrom)
+
     def __init__(self, config: dict, paths: List[str], exclude_files: List[str]):
         self.base_class = config.get("base_class", "")
         self.exclude_files_regex_pattern = config.get("exclude_files_regex", "")
         self.exclude_regex = re.compile(self.exclude_files_regex_pattern) if self.exclude_files_regex_pattern else None
 
+    def prefilter_names(self) -> Optional[Set[str]]:
+        return self.identifier_of(self.base_class)
+
     def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
+        return self.match_nodes(FileNodes(file_ast, self.node_types), file_path)
+
+    def match_nodes(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         if self.exclude_regex:
             if self.exclude_regex.search(str(file_path)):
                 return set()
-        import_aliases = get_import_aliases(file_ast)
+        import_aliases = file_nodes.import_aliases
         #self.annotate_parent(file_ast)
         classes = set()
-        for node in ast.walk(file_ast):
-            if isinstance(node, ast.ClassDef):
-                for base in node.bases:
-                    base_name = get_base_name(base, import_aliases)
-                    if base_name == self.base_class or base_name.endswith(f".{self.base_class}"):
-                        full_name = self._get_full_name(node)
-                        code_element = CodeElement(file=file_path, name=full_name, element_type="class", line=node.lineno, column=node.col_offset)
-                        classes.add(code_element)
+        for node in file_nodes.of_type(ast.ClassDef):
+            for base in node.bases:
+                base_name = get_base_name(base, import_aliases)
+                if base_name == self.base_class or base_name.endswith(f".{self.base_class}"):
+                    full_name = self._get_full_name(node)
+                    code_element = CodeElement(file=file_path, name=full_name, element_type="class", line=node.lineno, column=node.col_offset)
+                    classes.add(code_element)
         return classes
 
     def _get_full_name(self, node):
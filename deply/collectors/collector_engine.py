@@ -0,0 +1,161 @@
+import ast
+import logging
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+from deply.models.code_element import CodeElement
+from deply.profiler import Profiler
+from deply.utils.ast_utils import get_import_aliases, get_import_aliases_from_nodes
+from .base_collector import BaseCollector
+from .path_classifier import PathClassifier
+from .text_prefilter import TextPrefilter
+
+IMPORT_NODE_TYPES = (ast.Import, ast.ImportFrom)
+
+
+class FileNodes:
+    """
+    The AST nodes of a parsed file grouped by type, gathered with a single walk of the tree.
+
+    Import and ImportFrom statements share one bucket in walk order, from which the import
+    aliases of the file are computed.
+    """
+
+    def __init__(self, tree: ast.AST, node_types: Iterable[Type[ast.AST]]):
+        self.tree = tree
+        # Collectors whose path conditions hold for the file, when classified by a CollectorEngine
+        self.path_classification: Optional[FrozenSet[BaseCollector]] = None
+        # Matches of the collectors evaluated on the file so far
+        self.collector_matches: Dict[BaseCollector, Set[CodeElement]] = {}
+        self._nodes: Dict[Type[ast.AST], List[ast.AST]] = {}
+        self._import_nodes: Optional[List[ast.AST]] = None
+        self._import_aliases: Optional[Dict[str, str]] = None
+
+        for node_type in node_types:
+            if node_type in IMPORT_NODE_TYPES:
+                if self._import_nodes is None:
+                    self._import_nodes = []
+                    for import_type in IMPORT_NODE_TYPES:
+                        self._nodes[import_type] = self._import_nodes
+            else:
+                self._nodes[node_type] = []
+
+        nodes = self._nodes
+        for node in ast.walk(tree):
+            bucket = nodes.get(type(node))
+            if bucket is not None:
+                bucket.append(node)
+
+    def of_type(self, *node_types: Type[ast.AST]) -> Iterator[ast.AST]:
+        for node_type in node_types:
+            yield from self._nodes[node_type]
+
+    @property
+    def import_aliases(self) -> Dict[str, str]:
+        if self._import_aliases is None:
+            if self._import_nodes is not None:
+                self._import_aliases = get_import_aliases_from_nodes(self._import_nodes)
+            else:
+                self._import_aliases = get_import_aliases(self.tree)
+        return self._import_aliases
+
+
+class CollectorEngine:
+    """
+    Matches the collectors of all layers against a parsed file. The file is walked once for the
+    node types declared by all collectors, and every collector then reads the nodes it needs.
+
+    With `text_prefilter`, the source of a file is scanned for the identifiers name-based
+    collectors look for before it is parsed, and files no collector can match are not parsed.
+    """
+
+    def __init__(
+            self,
+            layer_collectors: List[Tuple[str, BaseCollector]],
+            profiler: Optional[Profiler] = None,
+            text_prefilter: bool = True
+    ):
+        self.layer_collectors = layer_collectors
+        self.profiler = profiler
+        node_types = []
+        for _, collector in layer_collectors:
+            for node_type in collector.node_types:
+                if node_type not in node_types:
+                    node_types.append(node_type)
+        self.node_types = tuple(node_types)
+        self.path_classifier = PathClassifier([collector for _, collector in layer_collectors])
+
+        self.text_prefilter = None
+        if text_prefilter:
+            prefilter_names = set()
+            for _, collector in layer_collectors:
+                prefilter_names.update(collector.prefilter_names() or ())
+            if prefilter_names:
+                self.text_prefilter = TextPrefilter(prefilter_names)
+        self.prefilter_stats = self._empty_prefilter_stats()
+
+    def may_match_path(self, file_path: Path) -> bool:
+        """
+        Whether any layer collector may match elements in a file, judging by its path alone. Files
+        that cannot contain code elements are no dependency source either, so they need no parsing.
+        """
+        path_classification = self.path_classifier.classify(file_path)
+        return any(
+            collector.may_match_path(path_classification, file_path) for _, collector in self.layer_collectors
+        )
+
+    def may_match_source(self, file_path: Path, source: bytes) -> bool:
+        """Whether any layer collector may match elements in a file, judging by its path and source text."""
+        names_found = self.text_prefilter.scan(source) if self.text_prefilter is not None else None
+        if names_found is None:
+            return True
+        self.prefilter_stats['scanned'] += 1
+        path_classification = self.path_classifier.classify(file_path)
+        if any(
+                collector.may_match_path(path_classification, file_path) and collector.may_match_text(names_found)
+                for _, collector in self.layer_collectors
+        ):
+            return True
+        self.prefilter_stats['skipped'] += 1
+        return False
+
+    @staticmethod
+    def _empty_prefilter_stats() -> Dict[str, int]:
+        return {'scanned': 0, 'skipped': 0}
+
+    def pop_prefilter_stats(self) -> Dict[str, int]:
+        stats, self.prefilter_stats = self.prefilter_stats, self._empty_prefilter_stats()
+        return stats
+
+    def merge_prefilter_stats(self, stats: Dict[str, int]) -> None:
+        for name, value in stats.items():
+            self.prefilter_stats[name] += value
+
+    def log_prefilter_stats(self) -> None:
+        if self.text_prefilter is not None:
+            logging.info(
+                f"Text prefilter: scanned {self.prefilter_stats['scanned']} file(s), "
+                f"{self.prefilter_stats['skipped']} parse(s) avoided."
+            )
+
+    def match_in_file(self, file_ast: ast.AST, file_path: Path) -> List[Tuple[str, Set[CodeElement]]]:
+        """Return the non-empty matches of every layer collector, in the order of the layer collectors."""
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.start()
+        file_nodes = FileNodes(file_ast, self.node_types)
+        file_nodes.path_classification = self.path_classifier.classify(file_path)
+        if profiler is not None:
+            profiler.stop(started, ('collection', 'walk'))
+
+        matches = []
+        for layer_name, collector in self.layer_collectors:
+            if profiler is None:
+                matched = collector.collect(file_nodes, file_path)
+            else:
+                started = profiler.start()
+                matched = collector.collect(file_nodes, file_path)
+                profiler.stop(started, ('collectors', type(collector).__name__), ('layers', layer_name))
+            if matched:
+                matches.append((layer_name, matched))
+        return matches
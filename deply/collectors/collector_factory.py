@@ -1,4 +1,5 @@
-from typing import Dict, Any, List
+import json
+from typing import Dict, Any, List, Optional, Tuple
 from .base_collector import BaseCollector
 from .class_inherits_collector import ClassInheritsCollector
 from .class_name_regex_collector import ClassNameRegexCollector
@@ -9,7 +10,31 @@ from .bool_collector import BoolCollector
 
 class CollectorFactory:
     @staticmethod
-    def create(config: Dict[str, Any], paths: List[str], exclude_files: List[str]) -> BaseCollector:
+    def create(
+            config: Dict[str, Any],
+            paths: List[str],
+            exclude_files: List[str],
+            instances: Optional[Dict[str, BaseCollector]] = None
+    ) -> BaseCollector:
+        """
+        Create the collector of a configuration. With `instances`, collectors are shared between
+        identical configurations, so each of them is matched once per file.
+        """
+        if instances is None:
+            return CollectorFactory._create(config, paths, exclude_files, instances)
+        key = CollectorFactory.config_key(config)
+        collector = instances.get(key)
+        if collector is None:
+            collector = instances[key] = CollectorFactory._create(config, paths, exclude_files, instances)
+        return collector
+
+    @staticmethod
+    def _create(
+            config: Dict[str, Any],
+            paths: List[str],
+            exclude_files: List[str],
+            instances: Optional[Dict[str, BaseCollector]]
+    ) -> BaseCollector:
         collector_type = config.get("type")
         if collector_type == "file_regex":
             return FileRegexCollector(config, paths, exclude_files)
@@ -22,6 +47,35 @@ class CollectorFactory:
         elif collector_type == "decorator_usage":
             return DecoratorUsageCollector(config, paths, exclude_files)
         elif collector_type == "bool":
-            return BoolCollector(config, paths, exclude_files)
+            return BoolCollector(config, paths, exclude_files, instances)
         else:
-            raise ValueError(f"Unknown collector type: {collector_type}")
\ No newline at end of file
+            raise ValueError(f"Unknown collector type: {collector_type}")
+
+    @staticmethod
+    def config_key(config: Dict[str, Any]) -> str:
+        """Normalized form of a collector configuration, leaving out unset options."""
+        def normalize(value):
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items() if v is not None and v != '' and v != [] and v != {}}
+            if isinstance(value, list):
+                return [normalize(v) for v in value]
+            return value
+
+        return json.dumps(normalize(config), sort_keys=True, default=str)
+
+    @staticmethod
+    def create_layer_collectors(
+            layers_config: List[Dict[str, Any]],
+            paths: List[str],
+            exclude_files: List[str]
+    ) -> List[Tuple[str, BaseCollector]]:
+        layer_collectors = []
+        instances: Dict[str, BaseCollector] = {}
+        for layer_config in layers_config:
+            layer_name = layer_config["name"]
+            for collector_config in layer_config.get("collectors", []):
+                collector = CollectorFactory.create(
+                    config=collector_config, paths=paths, exclude_files=exclude_files, instances=instances
+                )
+                layer_collectors.append((layer_name, collector))
+        return layer_collectors
@@ -1,12 +1,15 @@
 import ast
 import re
 from pathlib import Path
-from typing import List, Set
+from typing import List, Optional, Set
 from deply.collectors import BaseCollector
 from deply.models.code_element import CodeElement
+from .collector_engine import FileNodes
 
 
 class DecoratorUsageCollector(BaseCollector):
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
     def __init__(self, config: dict, paths: List[str], exclude_files: List[str]):
         self.decorator_name = config.get("decorator_name", "")
         self.decorator_regex_pattern = config.get("decorator_regex", "")
@@ -14,27 +17,34 @@ class DecoratorUsageCollector(BaseCollector):
         self.decorator_regex = re.compile(self.decorator_regex_pattern) if self.decorator_regex_pattern else None
         self.exclude_regex = re.compile(self.exclude_files_regex_pattern) if self.exclude_files_regex_pattern else None
 
+    def prefilter_names(self) -> Optional[Set[str]]:
+        if self.decorator_regex:
+            return None
+        return self.identifier_of(self.decorator_name)
+
     def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
+        return self.match_nodes(FileNodes(file_ast, self.node_types), file_path)
+
+    def match_nodes(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         if self.exclude_regex and self.exclude_regex.search(str(file_path)):
             return set()
 
         #self.annotate_parent(file_ast)
         elements = set()
-        for node in ast.walk(file_ast):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                for decorator in node.decorator_list:
-                    d_name = self._get_decorator_name(decorator)
-                    if (self.decorator_name and d_name == self.decorator_name) or \
-                            (self.decorator_regex and self.decorator_regex.match(d_name)):
-                        full_name = self._get_full_name(node)
-                        code_element = CodeElement(
-                            file=file_path,
-                            name=full_name,
-                            element_type='function' if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) else 'class',
-                            line=node.lineno,
-                            column=node.col_offset
-                        )
-                        elements.add(code_element)
+        for node in file_nodes.of_type(ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef):
+            for decorator in node.decorator_list:
+                d_name = self._get_decorator_name(decorator)
+                if (self.decorator_name and d_name == self.decorator_name) or \
+                        (self.decorator_regex and self.decorator_regex.match(d_name)):
+                    full_name = self._get_full_name(node)
+                    code_element = CodeElement(
+                        file=file_path,
+                        name=full_name,
+                        element_type='function' if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) else 'class',
+                        line=node.lineno,
+                        column=node.col_offset
+                    )
+                    elements.add(code_element)
         return elements
 
     def _get_decorator_name(self, node):
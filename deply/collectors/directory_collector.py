@@ -4,9 +4,13 @@ from pathlib import Path
 from typing import List, Set
 from deply.collectors import BaseCollector
 from deply.models.code_element import CodeElement
+from .collector_engine import FileNodes
 
 
 class DirectoryCollector(BaseCollector):
+    node_types = (ast.ClassDef, ast.FunctionDef, ast.Assign)
+    path_rule = 'directory'
+
     def __init__(self, config: dict, paths: List[str], exclude_files: List[str]):
         self.directories = config.get("directories", [])
         self.recursive = config.get("recursive", True)
@@ -18,95 +22,70 @@ class DirectoryCollector(BaseCollector):
         self.exclude_files = [re.compile(pattern) for pattern in exclude_files]
 
     def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
-        # Check global exclude patterns
-        if any(pattern.search(str(file_path)) for pattern in self.exclude_files):
-            return set()
-        # Check collector-specific exclude pattern
-        if self.exclude_regex and self.exclude_regex.search(str(file_path)):
-            return set()
+        return self.match_nodes(FileNodes(file_ast, self.node_types), file_path)
 
-        # Check if file is within one of the specified directories
-        if not self.is_in_directories(file_path):
+    def match_nodes(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
+        # Check that the file is within one of the specified directories and not excluded
+        if not self.matches_path(file_nodes, file_path):
             return set()
 
         elements = set()
 
         if not self.element_type or self.element_type == 'class':
-            elements.update(self.get_class_names(file_ast, file_path))
+            elements.update(self.get_class_names(file_nodes, file_path))
 
         if not self.element_type or self.element_type == 'function':
-            elements.update(self.get_function_names(file_ast, file_path))
+            elements.update(self.get_function_names(file_nodes, file_path))
 
         if not self.element_type or self.element_type == 'variable':
-            elements.update(self.get_variable_names(file_ast, file_path))
+            elements.update(self.get_variable_names(file_nodes, file_path))
 
         return elements
 
-    def is_in_directories(self, file_path: Path) -> bool:
-        # Check if file_path is inside any of the specified directories (relative to any base_path)
-        for base_path in self.base_paths:
-            try:
-                relative = file_path.relative_to(base_path)
-            except ValueError:
-                # file_path not under base_path
-                continue
-            for d in self.directories:
-                dir_path = base_path / d
-                try:
-                    # Check if relative path of file is under dir_path
-                    file_path.relative_to(dir_path)
-                    return True
-                except ValueError:
-                    pass
-        return False
-
-    def get_class_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_class_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         #self.annotate_parent(tree)
         classes = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                full_name = self._get_full_name(node)
-                code_element = CodeElement(
-                    file=file_path,
-                    name=full_name,
-                    element_type='class',
-                    line=node.lineno,
-                    column=node.col_offset
-                )
-                classes.add(code_element)
+        for node in file_nodes.of_type(ast.ClassDef):
+            full_name = self._get_full_name(node)
+            code_element = CodeElement(
+                file=file_path,
+                name=full_name,
+                element_type='class',
+                line=node.lineno,
+                column=node.col_offset
+            )
+            classes.add(code_element)
         return classes
 
-    def get_function_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_function_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         #self.annotate_parent(tree)
         functions = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                full_name = self._get_full_name(node)
-                code_element = CodeElement(
-                    file=file_path,
-                    name=full_name,
-                    element_type='function',
-                    line=node.lineno,
-                    column=node.col_offset
-                )
-                functions.add(code_element)
+        for node in file_nodes.of_type(ast.FunctionDef):
+            full_name = self._get_full_name(node)
+            code_element = CodeElement(
+                file=file_path,
+                name=full_name,
+                element_type='function',
+                line=node.lineno,
+                column=node.col_offset
+            )
+            functions.add(code_element)
         return functions
 
-    def get_variable_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_variable_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         # Variables don't need parent annotation for naming
         variables = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        code_element = CodeElement(
-                            file=file_path,
-                            name=target.id,
-                            element_type='variable',
-                            line=target.lineno,
-                            column=target.col_offset
-                        )
-                        variables.add(code_element)
+        for node in file_nodes.of_type(ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    code_element = CodeElement(
+                        file=file_path,
+                        name=target.id,
+                        element_type='variable',
+                        line=target.lineno,
+                        column=target.col_offset
+                    )
+                    variables.add(code_element)
         return variables
 
     def _get_full_name(self, node):
@@ -4,9 +4,13 @@ from pathlib import Path
 from typing import List, Set
 from deply.collectors import BaseCollector
 from deply.models.code_element import CodeElement
+from .collector_engine import FileNodes
 
 
 class FileRegexCollector(BaseCollector):
+    node_types = (ast.ClassDef, ast.FunctionDef, ast.Assign)
+    path_rule = 'file_regex'
+
     def __init__(self, config: dict, paths: List[str], exclude_files: List[str]):
         self.regex_pattern = config.get("regex", "")
         self.exclude_files_regex_pattern = config.get("exclude_files_regex", "")
@@ -14,96 +18,73 @@ class FileRegexCollector(BaseCollector):
         self.regex = re.compile(self.regex_pattern)
         self.exclude_regex = re.compile(self.exclude_files_regex_pattern) if self.exclude_files_regex_pattern else None
 
-        self.paths = [Path(p) for p in paths]
+        self.base_paths = [Path(p) for p in paths]
         self.exclude_files = [re.compile(pattern) for pattern in exclude_files]
 
     def match_in_file(self, file_ast: ast.AST, file_path: Path) -> Set[CodeElement]:
-        # Check global exclude patterns
-        if any(pattern.search(str(file_path)) for pattern in self.exclude_files):
-            return set()
+        return self.match_nodes(FileNodes(file_ast, self.node_types), file_path)
 
-        # Check collector-specific exclude pattern
-        if self.exclude_regex and self.exclude_regex.search(str(file_path)):
-            return set()
-
-        # Check if file matches the given regex
+    def match_nodes(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
+        # Check that the file matches the given regex and is not excluded
         # Note: We consider the relative path to each base path and if any matches, we include.
         # If no base path matches, fallback to absolute.
-        matched = False
-        for base_path in self.paths:
-            try:
-                relative_path = str(file_path.relative_to(base_path))
-                if self.regex.match(relative_path):
-                    matched = True
-                    break
-            except ValueError:
-                pass
-
-        if not matched:
-            # If no relative matched, check full path as fallback
-            if self.regex.match(str(file_path)):
-                matched = True
-
-        if not matched:
+        if not self.matches_path(file_nodes, file_path):
             return set()
 
         elements = set()
         if not self.element_type or self.element_type == 'class':
-            elements.update(self.get_class_names(file_ast, file_path))
+            elements.update(self.get_class_names(file_nodes, file_path))
         if not self.element_type or self.element_type == 'function':
-            elements.update(self.get_function_names(file_ast, file_path))
+            elements.update(self.get_function_names(file_nodes, file_path))
         if not self.element_type or self.element_type == 'variable':
-            elements.update(self.get_variable_names(file_ast, file_path))
+            elements.update(self.get_variable_names(file_nodes, file_path))
 
         return elements
 
-    def get_class_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_class_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         #self.annotate_parent(tree)
         classes = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                full_name = self._get_full_name(node)
-                code_element = CodeElement(
-                    file=file_path,
-                    name=full_name,
-                    element_type='class',
-                    line=node.lineno,
-                    column=node.col_offset
-                )
-                classes.add(code_element)
+        for node in file_nodes.of_type(ast.ClassDef):
+            full_name = self._get_full_name(node)
+            code_element = CodeElement(
+                file=file_path,
+                name=full_name,
+                element_type='class',
+                line=node.lineno,
+                column=node.col_offset
+            )
+            classes.add(code_element)
         return classes
 
-    def get_function_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_function_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         #self.annotate_parent(tree)
         functions = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                full_name = self._get_full_name(node)
-                code_element = CodeElement(
-                    file=file_path,
-                    name=full_name,
-                    element_type='function',
-                    line=node.lineno,
-                    column=node.col_offset
-                )
-                functions.add(code_element)
+        for node in file_nodes.of_type(ast.FunctionDef):
+            full_name = self._get_full_name(node)
+            code_element = CodeElement(
+                file=file_path,
+                name=full_name,
+                element_type='function',
+                line=node.lineno,
+                column=node.col_offset
+            )
+            functions.add(code_element)
         return functions
 
-    def get_variable_names(self, tree, file_path: Path) -> Set[CodeElement]:
+    def get_variable_names(self, file_nodes: FileNodes, file_path: Path) -> Set[CodeElement]:
         # Variables don't need parent annotation for naming
         variables = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        code_element = CodeElement(
-                            file=file_path,
-                            name=target.id,
-                            element_type='variable',
-                            line=target.lineno,
-                            column=target.col_offset
-                        )
-                        variables.add(code_element)
+        for node in file_nodes.of_type(ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    code_element = CodeElement(
+                        file=file_path,
+                        name=target.id,
+                        element_type='variable',
+                        line=target.lineno,
+                        column=target.col_offset
+                    )
+                    variables.add(code_element)
         return variables
 
     def _get_full_name(self, node):
@@ -0,0 +1,152 @@
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from .base_collector import BaseCollector
+
+
+# Constructs that change meaning once a pattern is embedded in a larger regex
+_NOT_COMBINABLE = re.compile(r'\\[1-9]|\(\?P=|^\(\?[aiLmsux]+\)')
+
+
+class AlternationMatcher:
+    """
+    Finds which of several regexes match a string, using one combined alternation regex.
+
+    Alternatives are tried in order and the first one matching wins, so every pattern before
+    it is known not to match; matching resumes after the winner until nothing matches. Falls
+    back to the individual patterns when they cannot be combined (e.g. global inline flags).
+    """
+
+    def __init__(self, patterns: Sequence[re.Pattern]):
+        self.patterns = list(patterns)
+        self._combined: List[Optional[Tuple[re.Pattern, List[int]]]] = []
+        if any(_NOT_COMBINABLE.search(p.pattern) for p in self.patterns):
+            return
+        try:
+            for start in range(len(self.patterns)):
+                alternatives = self.patterns[start:]
+                combined = re.compile('|'.join(f'(?P<_p{i}>{p.pattern})' for i, p in enumerate(alternatives)))
+                self._combined.append((combined, [combined.groupindex[f'_p{i}'] for i in range(len(alternatives))]))
+        except re.error:
+            self._combined = []
+
+    def match(self, string: str) -> Set[int]:
+        """Return the indices of the patterns whose `match` succeeds on the string."""
+        if not self._combined:
+            return {i for i, pattern in enumerate(self.patterns) if pattern.match(string)}
+
+        matched = set()
+        start = 0
+        while start < len(self.patterns):
+            combined, group_indices = self._combined[start]
+            m = combined.match(string)
+            if m is None:
+                break
+            winner = start + next(i for i, group in enumerate(group_indices) if m.group(group) is not None)
+            matched.add(winner)
+            start = winner + 1
+        return matched
+
+
+class _DirectoryTrie:
+    def __init__(self):
+        self.root: Dict = {}
+
+    def add(self, parts: Tuple[str, ...], collector: 'BaseCollector') -> None:
+        node = self.root
+        for part in parts:
+            node = node.setdefault(part, {})
+        node.setdefault(None, set()).add(collector)
+
+    def containing(self, parts: Tuple[str, ...]) -> Set['BaseCollector']:
+        """Return the collectors of every directory that is a parent of the path."""
+        found = set()
+        node = self.root
+        for part in parts[:-1]:
+            node = node.get(part)
+            if node is None:
+                break
+            found.update(node.get(None, ()))
+        return found
+
+
+class PathClassifier:
+    """
+    Evaluates the path conditions of file_regex and directory collectors once per file.
+
+    `classify` returns the collectors whose conditions hold for a file: not excluded by the
+    global `exclude_files` nor their own `exclude_files_regex`, and matching their regex or
+    directories. Regexes shared by several collectors are combined into one alternation, and
+    directories are looked up in a trie of path components.
+    """
+
+    def __init__(self, collectors: Sequence['BaseCollector']):
+        self.collectors = []
+        for collector in collectors:
+            for path_collector in collector.path_collectors():
+                if path_collector not in self.collectors:
+                    self.collectors.append(path_collector)
+
+        self.base_paths: List[Path] = []
+        exclude_groups: Dict[Tuple[str, ...], List['BaseCollector']] = {}
+        regex_groups: Dict[Tuple[Path, ...], List['BaseCollector']] = {}
+        self.directory_trie = _DirectoryTrie()
+        for collector in self.collectors:
+            exclude_groups.setdefault(tuple(p.pattern for p in collector.exclude_files), []).append(collector)
+            for base_path in collector.base_paths:
+                if base_path not in self.base_paths:
+                    self.base_paths.append(base_path)
+            if collector.path_rule == 'file_regex':
+                regex_groups.setdefault(tuple(collector.base_paths), []).append(collector)
+            elif collector.path_rule == 'directory':
+                for base_path in collector.base_paths:
+                    for directory in collector.directories:
+                        self.directory_trie.add((base_path / directory).parts, collector)
+
+        self.exclude_groups = [
+            (re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None, group)
+            for patterns, group in exclude_groups.items()
+        ]
+        self.regex_groups = [
+            (base_paths, AlternationMatcher([c.regex for c in group]), group)
+            for base_paths, group in regex_groups.items()
+        ]
+        self._exclude_regexes: Dict[str, re.Pattern] = {}
+        for collector in self.collectors:
+            if collector.exclude_regex is not None:
+                self._exclude_regexes[collector.exclude_regex.pattern] = collector.exclude_regex
+
+    def classify(self, file_path: Path) -> FrozenSet['BaseCollector']:
+        path = str(file_path)
+        parts = file_path.parts
+        relative_paths: Dict[Path, str] = {}
+        for base_path in self.base_paths:
+            base_parts = base_path.parts
+            if len(parts) > len(base_parts) and parts[:len(base_parts)] == base_parts:
+                relative_paths[base_path] = str(Path(*parts[len(base_parts):]))
+
+        candidates: Set['BaseCollector'] = set()
+        for base_paths, matcher, group in self.regex_groups:
+            # The regex is matched against the path relative to each base path, then the full path
+            strings = [relative_paths[b] for b in base_paths if b in relative_paths] + [path]
+            for string in dict.fromkeys(strings):
+                candidates.update(group[i] for i in matcher.match(string))
+        candidates.update(
+            collector for collector in self.directory_trie.containing(parts)
+            if any(b in relative_paths for b in collector.base_paths)
+        )
+        if not candidates:
+            return frozenset()
+
+        excluded_by = {
+            pattern for pattern, regex in self._exclude_regexes.items() if regex.search(path)
+        }
+        for exclude_regex, group in self.exclude_groups:
+            if exclude_regex is not None and exclude_regex.search(path):
+                candidates.difference_update(group)
+        return frozenset(
+            collector for collector in candidates
+            if collector.exclude_regex is None or collector.exclude_regex.pattern not in excluded_by
+        )
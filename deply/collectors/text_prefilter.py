@@ -0,0 +1,25 @@
+import re
+from typing import Iterable, Optional, Set
+
+
+class TextPrefilter:
+    """
+    Finds which of a set of identifiers occur as whole words in the source of a file.
+
+    All identifiers are searched with one alternation regex over the raw bytes, so a file can
+    be ruled out for name-based collectors before it is parsed. Sources that are not pure ASCII
+    are not judged, since the parser normalizes non-ASCII identifiers (NFKC) and a name may be
+    spelled differently in the source.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(set(names), key=lambda name: (-len(name), name))
+        self._regex = re.compile(
+            rb'\b(?:' + b'|'.join(re.escape(name.encode('ascii')) for name in self.names) + rb')\b'
+        ) if self.names else None
+
+    def scan(self, source: bytes) -> Optional[Set[str]]:
+        """Return the names found in the source, or None when the source cannot be judged."""
+        if self._regex is None or not source.isascii():
+            return None
+        return {match.decode('ascii') for match in self._regex.findall(source)}
@@ -0,0 +1,293 @@
+import json
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+from xml.sax.saxutils import escape
+
+from deply.models.dependency import Dependency
+from deply.models.violation import Violation
+
+GRAPH_FORMATS = {'.dot': 'dot', '.gv': 'dot', '.graphml': 'graphml', '.json': 'json'}
+GRAPH_LEVELS = ('layers', 'elements')
+# Recorded edges are deduplicated whenever their number doubled, and at least this often
+_COMPACT_MIN_EDGES = 1 << 20
+
+
+def strongly_connected_components(offsets: Sequence[int], targets: Sequence[int]) -> List[List[int]]:
+    """
+    Tarjan's algorithm on a graph in compressed sparse row form: the successors of node `n`
+    are `targets[offsets[n]:offsets[n + 1]]`.
+
+    The depth-first search keeps its own stack instead of recursing, so the depth of the graph
+    is not bounded by the recursion limit. Components are returned in reverse topological order.
+    """
+    node_count = len(offsets) - 1
+    index = array('q', [-1]) * node_count
+    lowlink = array('q', [0]) * node_count
+    on_stack = bytearray(node_count)
+    stack: List[int] = []
+    components: List[List[int]] = []
+    next_index = 0
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+        index[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # Nodes being visited, each with the position of its next successor to visit
+        path = [root]
+        positions = [offsets[root]]
+        while path:
+            node = path[-1]
+            position = positions[-1]
+            if position < offsets[node + 1]:
+                positions[-1] = position + 1
+                successor = targets[position]
+                if index[successor] == -1:
+                    index[successor] = lowlink[successor] = next_index
+                    next_index += 1
+                    stack.append(successor)
+                    on_stack[successor] = 1
+                    path.append(successor)
+                    positions.append(offsets[successor])
+                elif on_stack[successor] and index[successor] < lowlink[node]:
+                    lowlink[node] = index[successor]
+                continue
+
+            path.pop()
+            positions.pop()
+            if path and lowlink[node] < lowlink[path[-1]]:
+                lowlink[path[-1]] = lowlink[node]
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def find_cycles(offsets: Sequence[int], targets: Sequence[int]) -> List[List[int]]:
+    """
+    The sets of nodes that depend on each other, sorted by their smallest node. A node that
+    only depends on itself, like a recursive function, is not a cycle.
+    """
+    cycles = [sorted(component) for component in strongly_connected_components(offsets, targets) if len(component) > 1]
+    cycles.sort()
+    return cycles
+
+
+def _to_csr(node_count: int, edges: Iterator[Tuple[int, int]]) -> Tuple[array, array]:
+    """Offsets and targets of edges sorted by source."""
+    offsets = array('q', [0]) * (node_count + 1)
+    targets = array('q')
+    for source, target in edges:
+        offsets[source + 1] += 1
+        targets.append(target)
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+    return offsets, targets
+
+
+class DependencyGraph:
+    """
+    Graph of the dependencies between code elements, built while analyzing.
+
+    The graph is a dependency handler: chain it in front of the DependencyChecker to record
+    every dependency found. Nodes are the element IDs of the ElementIndex or ElementStore, and
+    each pair of dependent elements is recorded once as a single integer, so the graph of a
+    project with millions of dependencies stays small. Call `build` once the analysis finished
+    to find the cycles between elements and between layers.
+    """
+
+    def __init__(self, code_element_to_layer, layer_names: Optional[List[str]] = None):
+        self.code_element_to_layer = code_element_to_layer
+        self.layer_names: List[str] = list(layer_names or [])
+        layer_id_of = {name: i for i, name in enumerate(self.layer_names)}
+        self.node_layers = array('H')
+        for element in code_element_to_layer:
+            layer_name = code_element_to_layer[element]
+            layer_id = layer_id_of.get(layer_name)
+            if layer_id is None:
+                layer_id = layer_id_of[layer_name] = len(self.layer_names)
+                self.layer_names.append(layer_name)
+            self.node_layers.append(layer_id)
+        self.node_count = len(self.node_layers)
+        # First dependency found between each pair of layers, to locate layer cycles
+        self.layer_dependencies: Dict[Tuple[int, int], Dependency] = {}
+        self._edge_keys = array('q')
+        self._compact_at = _COMPACT_MIN_EDGES
+        self.offsets: Optional[array] = None
+        self.targets: Optional[array] = None
+        self.layer_edges: Dict[Tuple[int, int], int] = {}
+        self.element_cycles: List[List[int]] = []
+        self.layer_cycles: List[List[int]] = []
+
+    def chain(self, dependency_handler: Callable[[Dependency], None]) -> Callable[[Dependency], None]:
+        def handle(dependency: Dependency) -> None:
+            self(dependency)
+            dependency_handler(dependency)
+        return handle
+
+    def __call__(self, dependency: Dependency) -> None:
+        source_id = self.code_element_to_layer.id_of(dependency.code_element)
+        target_id = self.code_element_to_layer.id_of(dependency.depends_on_code_element)
+        if source_id is None or target_id is None:
+            return
+        self._edge_keys.append(source_id * self.node_count + target_id)
+        if len(self._edge_keys) >= self._compact_at:
+            self._compact()
+        layer_pair = (self.node_layers[source_id], self.node_layers[target_id])
+        if layer_pair[0] != layer_pair[1] and layer_pair not in self.layer_dependencies:
+            self.layer_dependencies[layer_pair] = dependency
+
+    def _compact(self) -> None:
+        self._edge_keys = array('q', sorted(set(self._edge_keys)))
+        self._compact_at = max(_COMPACT_MIN_EDGES, 2 * len(self._edge_keys))
+
+    @property
+    def built(self) -> bool:
+        return self.targets is not None
+
+    @property
+    def edge_count(self) -> int:
+        return 0 if self.targets is None else len(self.targets)
+
+    def build(self) -> None:
+        """Index the recorded edges and find the element and layer cycles."""
+        self._compact()
+        node_count = self.node_count
+        self.offsets, self.targets = _to_csr(node_count, (divmod(key, node_count) for key in self._edge_keys))
+        self._edge_keys = array('q')
+        self.element_cycles = find_cycles(self.offsets, self.targets)
+
+        layer_edges: Dict[Tuple[int, int], int] = {}
+        node_layers = self.node_layers
+        for source, target in self.edges():
+            layer_pair = (node_layers[source], node_layers[target])
+            if layer_pair[0] != layer_pair[1]:
+                layer_edges[layer_pair] = layer_edges.get(layer_pair, 0) + 1
+        self.layer_edges = dict(sorted(layer_edges.items()))
+        self.layer_cycles = find_cycles(*_to_csr(len(self.layer_names), iter(self.layer_edges)))
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        offsets, targets = self.offsets, self.targets
+        for source in range(self.node_count):
+            for position in range(offsets[source], offsets[source + 1]):
+                yield source, targets[position]
+
+    def layer_cycle_violations(self) -> List[Violation]:
+        """One violation per layer cycle, located at the earliest dependency found between two of its layers."""
+        violations = []
+        for cycle in self.layer_cycles:
+            members = set(cycle)
+            dependency = min(
+                (dependency for (source, target), dependency in self.layer_dependencies.items()
+                 if source in members and target in members),
+                key=lambda d: (str(d.code_element.file), d.line, d.column)
+            )
+            layer_names = ", ".join(f"'{self.layer_names[layer_id]}'" for layer_id in cycle)
+            violations.append(Violation(
+                file=dependency.code_element.file,
+                element_name=dependency.code_element.name,
+                element_type=dependency.code_element.element_type,
+                line=dependency.line,
+                column=dependency.column,
+                message=(
+                    f"Layers {layer_names} depend on each other in a cycle, e.g. through "
+                    f"'{dependency.code_element.name}' depending on '{dependency.depends_on_code_element.name}'."
+                ),
+            ))
+        return violations
+
+    def write(self, output_path: Path, graph_format: str, level: str = 'layers') -> None:
+        """Write the element graph or the graph of layers in DOT, GraphML or JSON."""
+        with open(output_path, 'w', encoding='utf-8') as output:
+            if level == 'elements':
+                nodes = self._element_nodes()
+                edges = ((source, target, None) for source, target in self.edges())
+                cycles = self.element_cycles
+            else:
+                nodes = ({'id': i, 'name': name} for i, name in enumerate(self.layer_names))
+                edges = ((source, target, count) for (source, target), count in self.layer_edges.items())
+                cycles = self.layer_cycles
+            cycle_of = {node: i for i, cycle in enumerate(cycles) for node in cycle}
+            nodes = (dict(node, cycle=cycle_of.get(node['id'])) for node in nodes)
+            if graph_format == 'dot':
+                _write_dot(output, level, nodes, edges)
+            elif graph_format == 'graphml':
+                _write_graphml(output, level, nodes, edges)
+            elif graph_format == 'json':
+                _write_json(output, level, nodes, edges, cycles)
+            else:
+                raise ValueError(f"Unsupported graph format: {graph_format}")
+
+    def _element_nodes(self) -> Iterator[dict]:
+        for element in self.code_element_to_layer:
+            element_id = self.code_element_to_layer.id_of(element)
+            yield {
+                'id': element_id,
+                'name': element.name,
+                'element_type': element.element_type,
+                'file': str(element.file),
+                'line': element.line,
+                'layer': self.layer_names[self.node_layers[element_id]],
+            }
+
+
+def _dot_quote(value) -> str:
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _write_dot(output: TextIO, level: str, nodes: Iterator[dict], edges: Iterator[Tuple]) -> None:
+    output.write(f'digraph {level} {{\n')
+    for node in nodes:
+        attributes = {'label': node['name'] if level == 'layers' else f"{node['name']}\n{node['layer']}"}
+        attributes.update((key, value) for key, value in node.items() if key not in ('id', 'name', 'cycle'))
+        if node['cycle'] is not None:
+            attributes.update(cycle=node['cycle'], color='red')
+        attribute_list = ', '.join(f'{key}={_dot_quote(value)}' for key, value in attributes.items())
+        output.write(f"  n{node['id']} [{attribute_list}];\n")
+    for source, target, weight in edges:
+        output.write(f'  n{source} -> n{target}' + (f' [weight={weight}, label="{weight}"]' if weight else '') + ';\n')
+    output.write('}\n')
+
+
+def _write_graphml(output: TextIO, level: str, nodes: Iterator[dict], edges: Iterator[Tuple]) -> None:
+    node_keys = ['name', 'cycle'] if level == 'layers' else ['name', 'element_type', 'file', 'line', 'layer', 'cycle']
+    output.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    output.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for key in node_keys:
+        key_type = 'int' if key in ('line', 'cycle') else 'string'
+        output.write(f'  <key id="{key}" for="node" attr.name="{key}" attr.type="{key_type}"/>\n')
+    output.write('  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n')
+    output.write(f'  <graph id="{level}" edgedefault="directed">\n')
+    for node in nodes:
+        data = ''.join(
+            f'<data key="{key}">{escape(str(node[key]))}</data>' for key in node_keys if node[key] is not None
+        )
+        output.write(f'    <node id="n{node["id"]}">{data}</node>\n')
+    for source, target, weight in edges:
+        data = f'<data key="weight">{weight}</data>' if weight else ''
+        output.write(f'    <edge source="n{source}" target="n{target}">{data}</edge>\n')
+    output.write('  </graph>\n</graphml>\n')
+
+
+def _write_json(
+        output: TextIO, level: str, nodes: Iterator[dict], edges: Iterator[Tuple], cycles: List[List[int]]
+) -> None:
+    # Written item by item, the graph of a large project is never held in memory as JSON
+    output.write(f'{{"level": {json.dumps(level)}, "nodes": [')
+    for i, node in enumerate(nodes):
+        output.write((',\n' if i else '\n') + json.dumps(node))
+    output.write('\n], "edges": [')
+    for i, (source, target, weight) in enumerate(edges):
+        edge = {'source': source, 'target': target}
+        if weight:
+            edge['weight'] = weight
+        output.write((',\n' if i else '\n') + json.dumps(edge))
+    output.write(f'\n], "cycles": {json.dumps(cycles)}}}\n')
@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from deply import __version__
+from deply.models.dependency import Dependency
+from deply.utils.module_utils import get_module_name
+
+DEFAULT_INDEX_FILE = 'deply_index.sqlite3'
+INSERT_BATCH_SIZE = 10000
+
+_SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE elements (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    element_type TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    layer TEXT NOT NULL
+);
+CREATE TABLE dependencies (
+    source_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    dependency_type TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    occurrences INTEGER NOT NULL
+);
+"""
+_INDEXES = """
+CREATE INDEX elements_layer ON elements (layer);
+CREATE INDEX elements_name ON elements (name);
+CREATE INDEX elements_qualified_name ON elements (qualified_name);
+CREATE INDEX dependencies_source ON dependencies (source_id);
+CREATE INDEX dependencies_target ON dependencies (target_id);
+"""
+
+
+class DependencyIndexWriter:
+    """
+    Writes the code elements, their layers and the dependencies found between them to an
+    SQLite file that `deply query` reads.
+
+    The writer is a dependency handler: chain it in front of the DependencyChecker to record
+    every dependency found. The file is written next to its destination and moved into place
+    by `close`, so an interrupted run leaves the previous index intact; `abort`, or leaving a
+    `with` block without closing the writer, removes it.
+    """
+
+    def __init__(self, index_path: Path, code_element_to_layer, paths: List[Path]):
+        self.index_path = Path(index_path)
+        self.code_element_to_layer = code_element_to_layer
+        self.paths = paths
+        self.dependency_count = 0
+        self._closed = False
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.index_path.absolute().parent, suffix='.tmp')
+        os.close(fd)
+        self.connection = sqlite3.connect(self._tmp_path)
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.executescript(_SCHEMA)
+        self._pending: List[Tuple] = []
+
+    def __enter__(self) -> 'DependencyIndexWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.abort()
+
+    def write_elements(self) -> None:
+        """Record all code elements with their layers; call before handling dependencies."""
+        rows = []
+        module_names = {}
+        for element in self.code_element_to_layer:
+            module_name = module_names.get(element.file)
+            if module_name is None:
+                module_name = module_names[element.file] = get_module_name(element.file, self.paths)[0]
+            rows.append((
+                self.code_element_to_layer.id_of(element), str(element.file), element.name,
+                f"{module_name}.{element.name}", element.element_type, element.line, element.column,
+                self.code_element_to_layer[element]
+            ))
+            if len(rows) >= INSERT_BATCH_SIZE:
+                self.connection.executemany('INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                rows.clear()
+        self.connection.executemany('INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def chain(self, dependency_handler: Callable[[Dependency], None]) -> Callable[[Dependency], None]:
+        def handle(dependency: Dependency) -> None:
+            self(dependency)
+            dependency_handler(dependency)
+        return handle
+
+    def __call__(self, dependency: Dependency) -> None:
+        source_id = self.code_element_to_layer.id_of(dependency.code_element)
+        target_id = self.code_element_to_layer.id_of(dependency.depends_on_code_element)
+        if source_id is None or target_id is None:
+            return
+        self._pending.append((
+            source_id, target_id, dependency.dependency_type, dependency.line, dependency.column,
+            dependency.occurrences
+        ))
+        self.dependency_count += 1
+        if len(self._pending) >= INSERT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.connection.executemany('INSERT INTO dependencies VALUES (?, ?, ?, ?, ?, ?)', self._pending)
+        self._pending.clear()
+
+    def _meta(self, complete: bool) -> List[Tuple[str, str]]:
+        return [('deply_version', __version__), ('complete', '1' if complete else '0')]
+
+    def close(self, complete: bool = True) -> None:
+        """Index the tables and move the file into place; `complete` records whether the analysis finished."""
+        try:
+            self.flush()
+            self.connection.executescript(_INDEXES)
+            self.connection.executemany('INSERT INTO meta VALUES (?, ?)', self._meta(complete))
+            self.connection.commit()
+            self.connection.close()
+            os.replace(self._tmp_path, self.index_path)
+        except BaseException:
+            self.abort()
+            raise
+        self._closed = True
+
+    def abort(self) -> None:
+        """Remove the file being written, unless it was moved into place by `close` already."""
+        if self._closed:
+            return
+        self._closed = True
+        self.connection.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class DependencyIndex:
+    """Answers questions about the elements and dependencies recorded by a DependencyIndexWriter."""
+
+    _ELEMENT_COLUMNS = 'e.name, e.element_type, e.file, e.line, e.layer'
+
+    def __init__(self, index_path: Path):
+        index_path = Path(index_path)
+        if not index_path.is_file():
+            raise FileNotFoundError(f"No dependency index at {index_path}")
+        self.connection = sqlite3.connect(f'{index_path.absolute().as_uri()}?mode=ro', uri=True)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @property
+    def complete(self) -> bool:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == '1'
+
+    def members(self, layer: str) -> List[Tuple]:
+        """The elements of a layer: (name, element type, file, line, layer)."""
+        return self.connection.execute(
+            f'SELECT {self._ELEMENT_COLUMNS} FROM elements e WHERE e.layer = ? ORDER BY e.file, e.line, e.name',
+            (layer,)
+        ).fetchall()
+
+    def dependents(self, name: str) -> List[Tuple]:
+        """
+        The dependencies on the elements named `name` or with that module qualified name:
+        (source name, source type, file, line, source layer, dependency type, target name, target layer).
+        """
+        return self.connection.execute(
+            """
+            SELECT s.name, s.element_type, s.file, d.line, s.layer, d.dependency_type, t.name, t.layer
+            FROM elements t
+            JOIN dependencies d ON d.target_id = t.id
+            JOIN elements s ON s.id = d.source_id
+            WHERE t.name = :name OR t.qualified_name = :name
+            ORDER BY s.file, d.line, d.col, s.name, t.name, d.dependency_type
+            """,
+            {'name': name}
+        ).fetchall()
+
+    def uses(self, source_layer: str, target_layer: str) -> List[Tuple]:
+        """
+        The elements of `target_layer` that elements of `source_layer` depend on, with the number
+        of dependencies on each: (name, element type, file, line, layer, dependencies).
+        """
+        return self.connection.execute(
+            f"""
+            SELECT {self._ELEMENT_COLUMNS}, SUM(d.occurrences) AS uses
+            FROM elements s
+            JOIN dependencies d ON d.source_id = s.id
+            JOIN elements e ON e.id = d.target_id
+            WHERE s.layer = ? AND e.layer = ?
+            GROUP BY e.id
+            ORDER BY uses DESC, e.file, e.line, e.name
+            """,
+            (source_layer, target_layer)
+        ).fetchall()
+
+
+def format_element(row: Tuple) -> str:
+    name, element_type, file, line, layer = row[:5]
+    return f"{file}:{line} {element_type} {name} [{layer}]"
+
+
+def format_dependency(row: Tuple) -> str:
+    source_name, source_type, file, line, source_layer, dependency_type, target_name, target_layer = row
+    return (
+        f"{file}:{line} {source_type} {source_name} [{source_layer}] -> {target_name} [{target_layer}] "
+        f"({dependency_type})"
+    )
+
+
+def format_use(row: Tuple) -> str:
+    return f"{format_element(row)}: {row[5]} dependenc(ies)"
+
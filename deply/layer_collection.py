@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from deply.analysis_cache import AnalysisCache
+from deply.collectors.collector_engine import CollectorEngine
+from deply.models.code_element import CodeElement
+from deply.parsed_file_store import ParsedFileStore
+from deply.utils.read_ahead import read_file
+
+
+def collect_file(
+        file_path: Path,
+        collector_engine: CollectorEngine,
+        parsed_file_store: ParsedFileStore,
+        analysis_cache: Optional[AnalysisCache] = None,
+        source: Optional[bytes] = None
+) -> List[Tuple[str, Set[CodeElement]]]:
+    """
+    Match every layer collector against a file, returning the non-empty matches per layer. The
+    file is read unless its content is given as `source`.
+    """
+    if analysis_cache is not None:
+        matches = analysis_cache.load('matches', file_path, source)
+        if matches is not None:
+            return matches
+
+    if source is None and collector_engine.text_prefilter is not None:
+        source = read_file(file_path)
+    if source is not None and not collector_engine.may_match_source(file_path, source):
+        return []
+
+    file_ast = parsed_file_store.get(file_path, source)
+    if file_ast is None:
+        return []
+
+    matches = collector_engine.match_in_file(file_ast, file_path)
+    if analysis_cache is not None:
+        analysis_cache.store('matches', file_path, matches)
+    return matches
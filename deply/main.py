@@ -1,19 +1,38 @@
 import argparse
-import ast
 import logging
 import re
 import sys
 from pathlib import Path
+from typing import Optional
 
 from deply import __version__
-from deply.rules import RuleFactory
+from deply.rules import Baseline, BaselineError, DependencyChecker, RuleFactory
+from deply.rules.dependency_checker import DEFAULT_BATCH_SIZE
+from .analysis_cache import AnalysisCache, DEFAULT_MAX_SIZE_MB, default_cache_dir
 from .code_analyzer import CodeAnalyzer
+from .collectors.collector_engine import CollectorEngine
 from .collectors.collector_factory import CollectorFactory
 from .config_parser import ConfigParser
-from .models.code_element import CodeElement
+from .dependency_graph import GRAPH_FORMATS, GRAPH_LEVELS, DependencyGraph
+from .dependency_index import (
+    DEFAULT_INDEX_FILE, DependencyIndex, DependencyIndexWriter, format_dependency, format_element, format_use
+)
+from .layer_collection import collect_file
+from .models.code_element import interned_paths
+from .models.element_index import ElementIndex
+from .models.element_store import DEFAULT_CACHE_MB, ElementStore
 from .models.layer import Layer
-from .models.violation import Violation
+from .parallel import collect_in_parallel, resolve_jobs
+from .parsed_file_store import ParsedFileStore, DEFAULT_MAX_ENTRIES
+from .profiler import DEFAULT_SLOWEST_FILES, Profiler, profile_phase
 from .reports.report_generator import ReportGenerator
+from .reports.violation_sink import ViolationLimitReached, ViolationSink
+from .sharding import ShardError, ShardResult, ShardResultWriter, check_shards, merge_indexes, parse_shard, select_shard
+from .utils.file_discovery import FileDiscovery
+from .utils.git_utils import GitError, get_changed_files
+from .utils.memory import peak_memory_mb
+from .utils.read_ahead import DEFAULT_READ_AHEAD, ReadAhead
+from .watcher import Watcher, DEFAULT_POLL_INTERVAL
 
 
 def main():
@@ -21,12 +40,93 @@ def main():
     parser.add_argument('-V', '--version', action='store_true', help='Show the version number and exit')
     parser.add_argument('-v', '--verbose', action='count', default=1, help='Increase output verbosity')
 
+    # Options shared by the sub-commands that run an analysis
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument('--config', type=str, default="deply.yaml", help="Path to the configuration YAML file")
+    common_parser.add_argument('--cache-dir', type=str,
+                               help="Directory of the analysis cache (default: a directory of the project in "
+                                    "the user cache directory)")
+    common_parser.add_argument('--cache-max-size', type=int, default=DEFAULT_MAX_SIZE_MB,
+                               help="Maximum size of the analysis cache in megabytes")
+    common_parser.add_argument('--no-cache', action='store_true', help="Do not read or write the analysis cache")
+    common_parser.add_argument('--clear-cache', action='store_true',
+                               help="Remove all analysis cache entries before analyzing")
+
     subparsers = parser.add_subparsers(dest='command', help='Sub-commands')
-    parser_analyze = subparsers.add_parser('analyze', help='Analyze the project dependencies')
-    parser_analyze.add_argument('--config', type=str, default="deply.yaml", help="Path to the configuration YAML file")
-    parser_analyze.add_argument('--report-format', type=str, choices=["text", "json", "html"], default="text",
-                                help="Format of the output report")
+    parser_analyze = subparsers.add_parser('analyze', parents=[common_parser], help='Analyze the project dependencies')
+    parser_analyze.add_argument('--report-format', type=str, choices=["text", "json", "jsonl", "sarif"], default="text",
+                                help="Format of the output report (jsonl streams violations as they are found)")
     parser_analyze.add_argument('--output', type=str, help="Output file for the report")
+    parser_analyze.add_argument('-j', '--jobs', type=int, default=1,
+                                help="Number of worker processes to analyze files with (0 uses all CPU cores)")
+    parser_analyze.add_argument('--changed-since', type=str, metavar='GIT_REF',
+                                help="Only report violations in files changed since the given git reference")
+    limit_group = parser_analyze.add_mutually_exclusive_group()
+    limit_group.add_argument('--fail-fast', action='store_true', help="Stop the analysis at the first violation")
+    limit_group.add_argument('--max-violations', type=int, metavar='N',
+                             help="Stop the analysis once N violations were found")
+    parser_analyze.add_argument('--aggregate', type=str, choices=["edges", "layers"],
+                                help="Report each dependency edge of a file once ('edges'), or only the first "
+                                     "dependency between each pair of layers ('layers')")
+    parser_analyze.add_argument('--no-prefilter', action='store_true',
+                                help="Parse every file instead of first scanning its source for the names "
+                                     "that class_inherits and decorator_usage collectors look for")
+    parser_analyze.add_argument('--read-ahead', type=int, default=DEFAULT_READ_AHEAD, metavar='N',
+                                help="Number of files read by background threads ahead of parsing (0 disables)")
+    parser_analyze.add_argument('--max-memory', type=int, metavar='MB',
+                                help="Keep memory use of very large projects near the given number of megabytes "
+                                     "by storing code elements on disk and not retaining parsed files")
+    parser_analyze.add_argument('--index', type=str, nargs='?', const=DEFAULT_INDEX_FILE, metavar='FILE',
+                                help=f"Write the code elements, layers and dependencies to an SQLite file for "
+                                     f"'deply query' (default: {DEFAULT_INDEX_FILE})")
+    baseline_group = parser_analyze.add_mutually_exclusive_group()
+    baseline_group.add_argument('--baseline', type=str, metavar='FILE',
+                                help="Do not report the violations recorded in a baseline file")
+    baseline_group.add_argument('--generate-baseline', type=str, metavar='FILE',
+                                help="Record all current violations in a baseline file")
+    parser_analyze.add_argument('--export-graph', type=str, metavar='FILE',
+                                help="Write the dependency graph to a .dot, .gv, .graphml or .json file")
+    parser_analyze.add_argument('--graph-level', type=str, choices=GRAPH_LEVELS, default="layers",
+                                help="Export the graph of code elements or of layers (default: layers)")
+    parser_analyze.add_argument('--forbid-layer-cycles', action='store_true',
+                                help="Report a violation for every cycle of dependencies between layers")
+    elements_group = parser_analyze.add_mutually_exclusive_group()
+    elements_group.add_argument('--save-elements', type=str, metavar='FILE',
+                                help="Only collect the code elements and save them to a file for --elements")
+    elements_group.add_argument('--elements', type=str, metavar='FILE',
+                                help="Load the code elements saved by --save-elements instead of collecting them")
+    parser_analyze.add_argument('--shard', type=str, metavar='INDEX/COUNT',
+                                help="Only analyze the files of one of COUNT shards and write its result for "
+                                     "'deply merge'")
+    parser_analyze.add_argument('--shard-output', type=str, metavar='FILE',
+                                help="Result file of the shard (default: deply_shard_INDEX_of_COUNT.sqlite3)")
+    parser_analyze.add_argument('--profile', type=str, metavar='FILE',
+                                help="Write wall and CPU time statistics of the run to a JSON file")
+    parser_analyze.add_argument('--profile-slowest', type=int, default=DEFAULT_SLOWEST_FILES, metavar='N',
+                                help="Number of slowest files to parse listed in the profile")
+
+    parser_watch = subparsers.add_parser('watch', parents=[common_parser],
+                                         help='Re-analyze changed files continuously and print violation changes')
+    parser_watch.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                              help="Seconds between checks for modified files")
+    parser_merge = subparsers.add_parser('merge', help="Report the violations of the shards of a sharded analysis")
+    parser_merge.add_argument('results', nargs='+', metavar='RESULT', help="Result files of all shards")
+    parser_merge.add_argument('--report-format', type=str, choices=["text", "json", "jsonl", "sarif"], default="text",
+                              help="Format of the output report")
+    parser_merge.add_argument('--output', type=str, help="Output file for the report")
+    parser_merge.add_argument('--index', type=str, nargs='?', const=DEFAULT_INDEX_FILE, metavar='FILE',
+                              help=f"Write the index of all shards for 'deply query' (default: {DEFAULT_INDEX_FILE})")
+    parser_query = subparsers.add_parser('query', help="Query the index written by 'deply analyze --index'")
+    parser_query.add_argument('--index', type=str, default=DEFAULT_INDEX_FILE,
+                              help=f"Path to the index file (default: {DEFAULT_INDEX_FILE})")
+    query_subparsers = parser_query.add_subparsers(dest='query', required=True, help='Queries')
+    parser_members = query_subparsers.add_parser('members', help='List the code elements of a layer')
+    parser_members.add_argument('layer', help='Layer name')
+    parser_dependents = query_subparsers.add_parser('dependents', help='List the dependencies on a code element')
+    parser_dependents.add_argument('name', help='Name or module qualified name of the code element')
+    parser_uses = query_subparsers.add_parser('uses', help='List the code elements of a layer used by another layer')
+    parser_uses.add_argument('source_layer', help='Layer whose dependencies are listed')
+    parser_uses.add_argument('target_layer', help='Layer whose used code elements are listed')
     args = parser.parse_args()
 
     if args.version:
@@ -50,12 +150,157 @@ def main():
     if args.command is None:
         args = parser.parse_args(['analyze'] + sys.argv[1:])
 
+    with interned_paths():
+        if args.command == 'watch':
+            watch(args)
+        elif args.command == 'query':
+            query(args, parser)
+        elif args.command == 'merge':
+            merge(args, parser)
+        else:
+            analyze(args, parser)
+
+
+def create_analysis_cache(args: argparse.Namespace, config: dict, config_path: Path) -> Optional[AnalysisCache]:
+    if args.no_cache and not args.clear_cache:
+        return None
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir(config_path)
+    analysis_cache = AnalysisCache(
+        cache_dir=cache_dir,
+        config_fingerprint=AnalysisCache.fingerprint(config),
+        max_size=args.cache_max_size * 1024 * 1024
+    )
+    if args.clear_cache:
+        logging.info(f"Clearing analysis cache in {cache_dir}")
+        analysis_cache.clear()
+    if args.no_cache:
+        return None
+    logging.info(f"Using analysis cache in {cache_dir}")
+    return analysis_cache
+
+
+def watch(args: argparse.Namespace) -> None:
+    config_path = Path(args.config)
+    logging.info(f"Using configuration file: {config_path}")
+    config = ConfigParser(config_path).parse()
+
+    paths = [Path(p) for p in config["paths"]]
+    exclude_files = [re.compile(pattern) for pattern in config["exclude_files"]]
+    layer_collectors = CollectorFactory.create_layer_collectors(
+        config["layers"],
+        paths=[str(p) for p in paths],
+        exclude_files=[p.pattern for p in exclude_files]
+    )
+
+    watcher = Watcher(
+        paths=paths,
+        exclude_files=exclude_files,
+        layer_collectors=layer_collectors,
+        rules=RuleFactory.create_rules(config["ruleset"], layer_names=[l["name"] for l in config["layers"]]),
+        analysis_cache=create_analysis_cache(args, config, config_path)
+    )
+    try:
+        watcher.run(interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+def query(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    try:
+        index = DependencyIndex(Path(args.index))
+    except FileNotFoundError as e:
+        parser.error(f"{e}; create it with 'deply analyze --index'")
+    if not index.complete:
+        logging.warning("The index was written by an analysis that stopped early and may be incomplete.")
+
+    if args.query == 'members':
+        lines = [format_element(row) for row in index.members(args.layer)]
+    elif args.query == 'dependents':
+        lines = [format_dependency(row) for row in index.dependents(args.name)]
+    else:
+        lines = [format_use(row) for row in index.uses(args.source_layer, args.target_layer)]
+    index.close()
+
+    for line in lines:
+        print(line)
+    sys.exit(0)
+
+
+def log_cycles(dependency_graph: DependencyGraph, partial: bool) -> None:
+    logging.info(
+        f"Dependency graph of {dependency_graph.node_count} code element(s) and {dependency_graph.edge_count} "
+        f"edge(s) has {len(dependency_graph.element_cycles)} element cycle(s) and "
+        f"{len(dependency_graph.layer_cycles)} layer cycle(s)."
+    )
+    for cycle in dependency_graph.layer_cycles:
+        logging.info(f"Layer cycle: {', '.join(dependency_graph.layer_names[layer_id] for layer_id in cycle)}")
+    if partial:
+        logging.warning("Only the dependencies of changed files are part of the dependency graph.")
+
+
+def merge(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    try:
+        results = [ShardResult(Path(result_path)) for result_path in args.results]
+        check_shards(results)
+    except ShardError as e:
+        parser.error(str(e))
+    violations = set()
+    for result in results:
+        violations.update(result.violations())
+    logging.info(
+        f"Merged the results of {len(results)} shard(s) with "
+        f"{sum(result.dependency_count() for result in results)} dependenc(ies)."
+    )
+    if args.index:
+        merge_indexes(results, Path(args.index))
+        logging.info(f"Index of all shards written to {args.index}")
+    for result in results:
+        result.close()
+    write_report(args, violations)
+
+
+def analyze(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
     logging.info("Starting Deply analysis...")
 
+    max_violations = 1 if args.fail_fast else args.max_violations
+    if max_violations is not None and max_violations < 1:
+        parser.error("--max-violations must be at least 1")
+    if args.max_memory is not None and args.max_memory < 1:
+        parser.error("--max-memory must be at least 1")
+    if args.generate_baseline and (max_violations is not None or args.changed_since or args.shard):
+        parser.error("--generate-baseline needs a full analysis, without --fail-fast, --max-violations, "
+                     "--changed-since or --shard")
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if max_violations is not None or args.index or args.report_format == "jsonl":
+            parser.error("--shard cannot be combined with --fail-fast, --max-violations, --index or the jsonl "
+                         "report format; use them with 'deply merge'")
+        # A shard only knows its own dependencies and 'deply merge' needs the result of every file
+        if args.changed_since or args.forbid_layer_cycles or args.export_graph:
+            parser.error("--shard cannot be combined with --changed-since, --forbid-layer-cycles or --export-graph")
+    elif args.shard_output:
+        parser.error("--shard-output requires --shard")
+    if (args.baseline or args.generate_baseline) and args.aggregate == "layers":
+        parser.error("baselines cannot be combined with --aggregate layers")
+    graph_format = None
+    if args.export_graph:
+        graph_format = GRAPH_FORMATS.get(Path(args.export_graph).suffix.lower())
+        if graph_format is None:
+            parser.error(f"--export-graph must end with one of {', '.join(GRAPH_FORMATS)}")
+
+    profiler = Profiler(slowest_files=args.profile_slowest) if args.profile else None
+
     # Parse configuration
     config_path = Path(args.config)
     logging.info(f"Using configuration file: {config_path}")
-    config = ConfigParser(config_path).parse()
+    with profile_phase(profiler, 'config_parsing'):
+        config = ConfigParser(config_path).parse()
 
     # Collect paths and excluded files
     paths = [Path(p) for p in config["paths"]]
@@ -67,112 +312,304 @@ def main():
 
     # Map layer collectors
     logging.info("Mapping layer collectors...")
-    layer_collectors = []
-    for layer_config in layers_config:
-        layer_name = layer_config["name"]
-        collector_configs = layer_config.get("collectors", [])
-        for collector_config in collector_configs:
-            collector = CollectorFactory.create(
-                config=collector_config,
-                paths=[str(p) for p in paths],
-                exclude_files=[p.pattern for p in exclude_files])
-            layer_collectors.append((layer_name, collector))
+    layer_collectors = CollectorFactory.create_layer_collectors(
+        layers_config,
+        paths=[str(p) for p in paths],
+        exclude_files=[p.pattern for p in exclude_files]
+    )
+
+    collector_engine = CollectorEngine(layer_collectors, profiler=profiler, text_prefilter=not args.no_prefilter)
 
     # Collect all files
     logging.info("Collecting all files...")
-    all_files = []
-    for base_path in paths:
-        if not base_path.exists():
-            continue
-        files = [f for f in base_path.rglob("*.py") if f.is_file()]
-
-        def is_excluded(file_path: Path) -> bool:
-            relative_path = str(file_path.relative_to(base_path))
-            return any(pattern.search(relative_path) for pattern in exclude_files)
-
-        files = [f for f in files if not is_excluded(f)]
-        all_files.extend(files)
+    file_discovery = FileDiscovery(paths, exclude_files)
+    with profile_phase(profiler, 'file_discovery'):
+        all_files = file_discovery.discover()
+    file_discovery.log_stats()
+
+    # Files that no collector can match by their path hold no code elements and are never parsed
+    collected_files = [file_path for file_path in all_files if collector_engine.may_match_path(file_path)]
+    if len(collected_files) < len(all_files):
+        logging.info(f"Skipping {len(all_files) - len(collected_files)} file(s) outside of every layer.")
+
+    # Restrict dependency analysis to the files changed since the given git reference
+    changed_files = None
+    if args.changed_since:
+        try:
+            changed_paths = get_changed_files(args.changed_since, config_path.parent)
+        except GitError as e:
+            parser.error(f"cannot determine files changed since '{args.changed_since}': {e}")
+        changed_files = {f for f in all_files if f.resolve() in changed_paths}
+        logging.info(f"{len(changed_files)} of {len(all_files)} file(s) changed since '{args.changed_since}'.")
 
     # Initialize layers
     layers: dict[str, Layer] = {}
     for layer_config in layers_config:
         layers[layer_config["name"]] = Layer(name=layer_config["name"], code_elements=set(), dependencies=set())
 
-    code_element_to_layer: dict[CodeElement, str] = {}
-    logging.info("Collecting code elements for each layer...")
-    for file_path in all_files:
+    analysis_cache = create_analysis_cache(args, config, config_path)
+
+    # In low-memory mode code elements are kept on disk, with a quarter of the memory budget for
+    # caching them, and parsed files are not retained between collection and analysis
+    element_store = None
+    cache_mb = max(1, args.max_memory // 4) if args.max_memory is not None else DEFAULT_CACHE_MB
+    if args.elements:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                file_content = f.read()
-            file_ast = ast.parse(file_content, filename=str(file_path))
-        except:
-            continue
-
-        # Match collectors
-        for layer_name, collector in layer_collectors:
-            matched = collector.match_in_file(file_ast, file_path)
-            for m in matched:
-                layers[layer_name].code_elements.add(m)
-                code_element_to_layer[m] = layer_name
-
-    for ln, l in layers.items():
-        logging.info(f"Layer '{ln}' collected {len(l.code_elements)} code elements.")
+            element_store = ElementStore.load(Path(args.elements), paths, cache_mb=cache_mb)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot load the code elements: {e}")
+        code_element_to_layer = element_store
+        max_entries = 0 if args.max_memory is not None else DEFAULT_MAX_ENTRIES
+        parsed_file_store = ParsedFileStore(max_entries=max_entries, profiler=profiler)
+    elif args.max_memory is not None or args.save_elements:
+        element_store = ElementStore(paths, cache_mb=cache_mb)
+        if args.max_memory is not None:
+            logging.info(f"Keeping code elements in {element_store.directory} to stay within {args.max_memory} MB.")
+        code_element_to_layer = element_store
+        parsed_file_store = ParsedFileStore(max_entries=0, profiler=profiler)
+    else:
+        code_element_to_layer = ElementIndex()
+        parsed_file_store = ParsedFileStore(max_entries=DEFAULT_MAX_ENTRIES, profiler=profiler)
+    jobs = resolve_jobs(args.jobs)
+    if args.elements:
+        logging.info(f"Loaded {len(element_store)} code element(s) from {args.elements}")
+    else:
+        logging.info("Collecting code elements for each layer...")
+        if jobs > 1:
+            logging.info(f"Using {jobs} worker processes.")
+            file_results = collect_in_parallel(collected_files, collector_engine, jobs, analysis_cache)
+        else:
+            read_ahead = ReadAhead(depth=args.read_ahead)
+            file_results = (
+                (file_path, collect_file(file_path, collector_engine, parsed_file_store, analysis_cache, source))
+                for file_path, source in read_ahead.iterate(collected_files)
+            )
+        with profile_phase(profiler, 'collection'):
+            if element_store is not None:
+                for file_path, file_matches in file_results:
+                    element_store.add_file(file_path, file_matches)
+                element_store.finish()
+            else:
+                for file_path, file_matches in file_results:
+                    for layer_name, matched in file_matches:
+                        for m in matched:
+                            layers[layer_name].code_elements.add(m)
+                            code_element_to_layer.add(m, layer_name)
+
+    if element_store is not None:
+        layer_counts = element_store.layer_counts()
+        for ln in layers:
+            logging.info(f"Layer '{ln}' collected {layer_counts.get(ln, 0)} code elements.")
+    else:
+        for ln, l in layers.items():
+            logging.info(f"Layer '{ln}' collected {len(l.code_elements)} code elements.")
+    collector_engine.log_prefilter_stats()
+
+    if args.save_elements:
+        element_store.save(Path(args.save_elements))
+        logging.info(f"Code elements saved to {args.save_elements}")
+        element_store.close()
+        exit(0)
+
+    # A shard only analyzes its part of the files that contain code elements
+    only_files = changed_files
+    if shard is not None:
+        element_files = (
+            element_store.files() if element_store is not None else {e.file for e in code_element_to_layer}
+        )
+        shard_files = select_shard(element_files, *shard)
+        only_files = shard_files if changed_files is None else shard_files & changed_files
+        logging.info(
+            f"Shard {shard[0]}/{shard[1]} analyzes {len(shard_files)} of {len(element_files)} file(s) "
+            f"with code elements."
+        )
+
+    # Only files that contain code elements are analyzed, drop the other parsed trees
+    if element_store is None:
+        parsed_file_store.retain(
+            code_element.file for code_element in code_element_to_layer
+            if only_files is None or code_element.file in only_files
+        )
 
     # Prepare the dependency rule
     logging.info("Preparing dependency rules...")
-    rules = RuleFactory.create_rules(ruleset)
-
-    # Initialize a list to collect violations and metrics
-    violations: set[Violation] = set()
-    metrics = {
-        'total_dependencies': 0,
-    }
-
-    # Define the dependency handler function
-    def dependency_handler(dependency):
-        source_element = dependency.code_element
-        target_element = dependency.depends_on_code_element
-
-        # Determine the layers of the source and target elements
-        source_layer = code_element_to_layer.get(source_element)
-        target_layer = code_element_to_layer.get(target_element)
-
-        # Increment total dependencies metric
-        metrics['total_dependencies'] += 1
-
-        # Skip if target element is not mapped to a layer
-        if not target_layer:
-            return
-
-        # Check the dependency against the rules immediately
-        for rule in rules:
-            violation = rule.check(source_layer, target_layer, dependency)
-            if violation:
-                violations.add(violation)
-
-    # Analyze code to find dependencies and check them immediately
-    logging.info("Analyzing code and checking dependencies ...")
-    analyzer = CodeAnalyzer(
-        code_elements=set(code_element_to_layer.keys()),
-        dependency_handler=dependency_handler  # Pass the handler to the analyzer
+    baseline = None
+    if args.generate_baseline:
+        baseline = Baseline(paths, record=True)
+    elif args.baseline:
+        try:
+            baseline = Baseline.load(Path(args.baseline), paths)
+        except BaselineError as e:
+            parser.error(str(e))
+        logging.info(f"Loaded {len(baseline.fingerprints)} known violation(s) from {args.baseline}")
+    rules = RuleFactory.create_rules(ruleset, layer_names=list(layers), baseline=baseline)
+
+    # Check every dependency against the rules as soon as it is found; in streaming mode
+    # violations are written out as soon as they are found as well
+    stream_output = None
+    if args.report_format == "jsonl":
+        stream_output = open(args.output, 'w') if args.output else sys.stdout
+    violation_sink = ViolationSink(stream=stream_output, max_violations=max_violations)
+    violations = violation_sink.violations
+    # Batches would hold back streamed violations and the end of a limited analysis
+    batch_size = 1 if stream_output is not None or max_violations is not None else DEFAULT_BATCH_SIZE
+    dependency_checker = DependencyChecker(
+        rules, code_element_to_layer, violation_sink, batch_size=batch_size, profiler=profiler,
+        layer_summary=args.aggregate == "layers"
     )
-    analyzer.analyze()
 
-    logging.info(f"Analysis complete. Found {metrics['total_dependencies']} dependencies(s).")
+    # Record the elements and every dependency found in the index before checking it
+    dependency_handler = dependency_checker
+    index_writer = None
+    shard_output = None
+    if args.index:
+        index_writer = DependencyIndexWriter(Path(args.index), code_element_to_layer, paths)
+    elif shard is not None:
+        shard_output = args.shard_output or f"deply_shard_{shard[0]}_of_{shard[1]}.sqlite3"
+        index_writer = ShardResultWriter(
+            Path(shard_output), code_element_to_layer, paths, shard, AnalysisCache.fingerprint(config)
+        )
+    # Remove the unfinished index file when the analysis fails
+    try:
+        if index_writer is not None:
+            index_writer.write_elements()
+            dependency_handler = index_writer.chain(dependency_checker)
+        dependency_graph = None
+        if args.export_graph or args.forbid_layer_cycles:
+            dependency_graph = DependencyGraph(code_element_to_layer, layer_names=list(layers))
+            dependency_handler = dependency_graph.chain(dependency_handler)
+
+        # Analyze code to find dependencies and check them immediately
+        logging.info("Analyzing code and checking dependencies ...")
+        analyzer = CodeAnalyzer(
+            code_elements=set(code_element_to_layer.keys()) if element_store is None else set(),
+            dependency_handler=dependency_handler,  # Pass the handler to the analyzer
+            parsed_file_store=parsed_file_store,
+            analysis_cache=analysis_cache,
+            profiler=profiler,
+            aggregate_edges=args.aggregate is not None,
+            paths=paths,
+            read_ahead=args.read_ahead,
+            element_store=element_store
+        )
+        analysis_complete = False
+        try:
+            with profile_phase(profiler, 'dependency_analysis'):
+                analyzer.analyze(jobs=jobs, only_files=only_files)
+                dependency_checker.flush()
+            if dependency_graph is not None:
+                with profile_phase(profiler, 'dependency_graph'):
+                    dependency_graph.build()
+                log_cycles(dependency_graph, only_files is not None)
+                if args.forbid_layer_cycles:
+                    for violation in dependency_graph.layer_cycle_violations():
+                        violation_sink(violation)
+            analysis_complete = True
+        except ViolationLimitReached:
+            logging.info(f"Stopped the analysis after {len(violations)} violation(s).")
+        finally:
+            if stream_output is not None and stream_output is not sys.stdout:
+                stream_output.close()
+        if shard_output is not None:
+            index_writer.write_violations(violations)
+            index_writer.close(complete=analysis_complete and changed_files is None)
+            logging.info(
+                f"Result of shard {shard[0]}/{shard[1]} with {index_writer.dependency_count} dependenc(ies) and "
+                f"{len(violations)} violation(s) written to {shard_output}"
+            )
+        elif index_writer is not None:
+            # Dependencies of unchanged files are missing from the index as well
+            index_writer.close(complete=analysis_complete and changed_files is None)
+            logging.info(
+                f"Index of {len(code_element_to_layer)} code element(s) and {index_writer.dependency_count} "
+                f"dependenc(ies) written to {args.index}"
+            )
+    finally:
+        if index_writer is not None:
+            index_writer.abort()
+    if dependency_graph is not None and args.export_graph:
+        # The graph is only built once all dependencies were found
+        if dependency_graph.built:
+            dependency_graph.write(Path(args.export_graph), graph_format, level=args.graph_level)
+            logging.info(f"Graph of {args.graph_level} written to {args.export_graph}")
+        else:
+            logging.warning("The analysis stopped early, the dependency graph was not exported.")
+    parsed_file_store.log_stats()
+    if analysis_cache is not None:
+        analysis_cache.log_stats()
+        evicted = analysis_cache.evict()
+        if evicted:
+            logging.info(f"Evicted {evicted} analysis cache entr(ies).")
+
+    logging.info(f"Analysis complete. Found {dependency_checker.total_dependencies} dependencies(s).")
+
+    if args.baseline:
+        logging.info(f"Suppressed {baseline.suppressed} violation(s) found in the baseline.")
+        if analysis_complete and only_files is None and baseline.stale_count:
+            logging.info(f"{baseline.stale_count} baseline entr(ies) no longer match any violation.")
+
+    if profiler is not None:
+        profiler.count('files', len(all_files))
+        profiler.count('skipped_files', len(all_files) - len(collected_files))
+        profiler.count('prefilter_skipped_files', collector_engine.prefilter_stats['skipped'])
+        profiler.count('pruned_directories', file_discovery.stats['pruned_directories'])
+        profiler.count('duplicate_files', file_discovery.stats['duplicate_files'])
+        profiler.count('code_elements', len(code_element_to_layer))
+        profiler.count('dependencies', dependency_checker.total_dependencies)
+        profiler.count('violations', len(violations))
+        if args.baseline:
+            profiler.count('baseline_suppressed', baseline.suppressed)
+        profiler.write(Path(args.profile))
+        logging.info(f"Profile written to {args.profile}")
+
+    if element_store is not None:
+        element_store.close()
+    if args.max_memory is not None:
+        peak_memory = peak_memory_mb()
+        if peak_memory is not None and peak_memory > args.max_memory:
+            logging.warning(f"Peak memory use of {peak_memory:.0f} MB exceeded --max-memory {args.max_memory} MB.")
+
+    if args.generate_baseline:
+        baseline.write(Path(args.generate_baseline))
+        logging.info(
+            f"Baseline of {len(baseline.fingerprints)} violation fingerprint(s) written to {args.generate_baseline}"
+        )
+        exit(0)
 
-    # Generate report
+    # The violations of all shards are reported by 'deply merge'
+    if shard is not None:
+        exit(0)
+
+    # Violations were already written out while analyzing
+    if stream_output is not None:
+        if args.output:
+            logging.info(f"Report written to {args.output}")
+        logging.info(f"Total violation(s): {len(violations)}")
+        exit(1 if violations else 0)
+
+    write_report(args, violations)
+
+
+def write_report(args: argparse.Namespace, violations) -> None:
+    """Write the report of the violations to the output file or stdout and exit."""
     logging.info("Generating report...")
     report_generator = ReportGenerator(list(violations))
-    report = report_generator.generate(format=args.report_format)
 
-    # Output the report
+    # Output the report, violation by violation
     if args.output:
         output_path = Path(args.output)
-        output_path.write_text(report)
+        with output_path.open('w') as output:
+            report_generator.write(args.report_format, output)
         logging.info(f"Report written to {output_path}")
+    elif args.report_format != "text":
+        # Machine readable reports are the only output, the summary goes to the log
+        report_generator.write(args.report_format, sys.stdout)
+        logging.info(f"Total violation(s): {len(violations)}")
+        exit(1 if violations else 0)
     else:
         print("\n")
-        print(report)
+        report_generator.write(args.report_format, sys.stdout)
+        print()
 
     # Exit with appropriate status
     if violations:
@@ -182,6 +619,5 @@ def main():
         print("\nNo violations detected.")
         exit(0)
 
-
 if __name__ == "__main__":
     main()
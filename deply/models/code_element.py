@@ -1,11 +1,55 @@
+import sys
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# File paths shared by all code elements of a file, within an `interned_paths` block
+_interned_paths: Optional[Dict[Path, Path]] = None
+
+
+@contextmanager
+def interned_paths() -> Iterator[None]:
+    """Share the file paths of the code elements created in the block, e.g. during one run."""
+    global _interned_paths
+    previous, _interned_paths = _interned_paths, {}
+    try:
+        yield
+    finally:
+        _interned_paths = previous
+
+
+def _intern_path(path: Path) -> Path:
+    if _interned_paths is None:
+        return path
+    return _interned_paths.setdefault(path, path)
 
 
 @dataclass(frozen=True)
 class CodeElement:
+    __slots__ = ('file', 'name', 'element_type', 'line', 'column', 'id', '_hash')
+
     file: Path
     name: str  # Should include fully qualified name if possible
     element_type: str  # 'class', 'function', or 'variable'
     line: int
     column: int
+
+    def __post_init__(self):
+        object.__setattr__(self, 'file', _intern_path(self.file))
+        object.__setattr__(self, 'name', sys.intern(self.name))
+        object.__setattr__(self, 'element_type', sys.intern(self.element_type))
+        # ID assigned by the ElementIndex the element is registered in, not part of its identity
+        object.__setattr__(self, 'id', -1)
+        object.__setattr__(self, '_hash', hash((self.file, self.name, self.element_type, self.line, self.column)))
+
+    def __hash__(self):
+        return self._hash
+
+    def __getstate__(self):
+        return self.file, self.name, self.element_type, self.line, self.column, self.id
+
+    def __setstate__(self, state):
+        file, name, element_type, line, column, element_id = state
+        CodeElement.__init__(self, file, name, element_type, line, column)
+        object.__setattr__(self, 'id', element_id)
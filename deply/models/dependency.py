@@ -5,8 +5,33 @@ from deply.models.code_element import CodeElement
 
 @dataclass(frozen=True)
 class Dependency:
+    __slots__ = ('code_element', 'depends_on_code_element', 'dependency_type', 'line', 'column')
+
     code_element: CodeElement
     depends_on_code_element: CodeElement
     dependency_type: str
     line: int
     column: int
+
+    # Number of occurrences in the source file this dependency stands for
+    occurrences = 1
+
+    def __getstate__(self):
+        return self.code_element, self.depends_on_code_element, self.dependency_type, self.line, self.column
+
+    def __setstate__(self, state):
+        Dependency.__init__(self, *state)
+
+
+@dataclass(frozen=True)
+class AggregatedDependency(Dependency):
+    """A unique (source, target, dependency type) edge of a file, located at its first occurrence."""
+    __slots__ = ('occurrences',)
+
+    occurrences: int
+
+    def __getstate__(self):
+        return (*super().__getstate__(), self.occurrences)
+
+    def __setstate__(self, state):
+        AggregatedDependency.__init__(self, *state)
@@ -0,0 +1,57 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+from deply.models.code_element import CodeElement
+
+
+class ElementIndex(Mapping):
+    """
+    Registry of the collected code elements and their layers, keyed by integer element IDs.
+
+    Registered elements carry their ID, so looking up the layer of an element costs a list
+    access instead of hashing it. The index is a read-only mapping of code elements to layer
+    names and can be used wherever such a mapping is expected.
+    """
+
+    def __init__(self):
+        self.elements: List[CodeElement] = []
+        self.layers: List[str] = []
+        self._ids: Dict[CodeElement, int] = {}
+
+    def add(self, element: CodeElement, layer_name: str) -> int:
+        """Register an element in a layer; an element matched by several layers keeps the last one."""
+        element_id = self._ids.get(element)
+        if element_id is None:
+            element_id = len(self.elements)
+            object.__setattr__(element, 'id', element_id)
+            self._ids[element] = element_id
+            self.elements.append(element)
+            self.layers.append(layer_name)
+        else:
+            self.layers[element_id] = layer_name
+        return element_id
+
+    def id_of(self, element: CodeElement) -> Optional[int]:
+        element_id = element.id
+        if 0 <= element_id < len(self.elements) and self.elements[element_id] is element:
+            return element_id
+        return self._ids.get(element)
+
+    def get(self, element: CodeElement, default=None):
+        element_id = self.id_of(element)
+        return default if element_id is None else self.layers[element_id]
+
+    def __getitem__(self, element: CodeElement) -> str:
+        element_id = self.id_of(element)
+        if element_id is None:
+            raise KeyError(element)
+        return self.layers[element_id]
+
+    def __contains__(self, element) -> bool:
+        return isinstance(element, CodeElement) and self.id_of(element) is not None
+
+    def __iter__(self) -> Iterator[CodeElement]:
+        return iter(self.elements)
+
+    def __len__(self) -> int:
+        return len(self.elements)
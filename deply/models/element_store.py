@@ -0,0 +1,304 @@
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from deply.models.code_element import CodeElement
+from deply.utils.module_utils import get_module_name, get_qualified_names, get_symbol_roots
+
+DEFAULT_CACHE_MB = 64
+# Rough size of a cached symbol lookup, used to turn a memory budget into a number of entries
+_LOOKUP_ENTRY_BYTES = 1024
+
+_SCHEMA = """
+CREATE TABLE elements (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    name TEXT NOT NULL,
+    element_type TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL
+);
+CREATE TABLE symbols (
+    qualified_name TEXT NOT NULL,
+    element_id INTEGER NOT NULL
+);
+"""
+_INDEXES = """
+CREATE INDEX elements_file ON elements (file);
+CREATE INDEX elements_key ON elements (file, name, element_type, line, col);
+CREATE INDEX symbols_name ON symbols (qualified_name);
+"""
+_LAYER_SCHEMA = """
+CREATE TABLE layers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE element_layers (
+    data BLOB NOT NULL
+);
+"""
+
+
+class ElementStore(Mapping):
+    """
+    Registry of the collected code elements and their layers kept in an SQLite database on disk.
+
+    It stands in for the ElementIndex and the symbol table of the CodeAnalyzer when they do not
+    fit in memory: elements are written file by file while collecting, and read back per file
+    and per qualified name while analyzing. Only the layer of every element is kept in memory,
+    as one small integer per element. `cache_mb` bounds the memory used for caching database
+    pages and symbol lookups.
+
+    Elements read from the store carry their ID. The store can be handed to worker processes,
+    which open the database on their own, and saved to a file that other runs `load` instead of
+    collecting the elements again.
+    """
+
+    def __init__(self, paths: List[Path], directory: Optional[Path] = None, cache_mb: int = DEFAULT_CACHE_MB):
+        self.paths = paths
+        self.cache_mb = cache_mb
+        self.directory = Path(directory) if directory is not None else Path(tempfile.mkdtemp(prefix='deply-'))
+        self.db_path = self.directory / 'elements.sqlite3'
+        self.layer_names: List[str] = []
+        self.layer_ids = array('H')
+        self._layer_id_of: Dict[str, int] = {}
+        self._files: Optional[List[Path]] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lookups: OrderedDict = OrderedDict()
+        self.max_lookups = max(1, cache_mb * 1024 * 1024 // 2 // _LOOKUP_ENTRY_BYTES)
+        self.connection.executescript(_SCHEMA)
+        if directory is None:
+            self._cleanup = weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+
+    def __getstate__(self):
+        return self.paths, self.cache_mb, self.directory, self.layer_names, self.layer_ids
+
+    def __setstate__(self, state):
+        self.paths, self.cache_mb, self.directory, self.layer_names, self.layer_ids = state
+        self.db_path = self.directory / 'elements.sqlite3'
+        self._layer_id_of = {name: i for i, name in enumerate(self.layer_names)}
+        self._files = None
+        self._connection = None
+        self._pid = None
+        self._lookups = OrderedDict()
+        self.max_lookups = max(1, self.cache_mb * 1024 * 1024 // 2 // _LOOKUP_ENTRY_BYTES)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # A forked worker process must not share the connection of its parent
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._connection.execute(f'PRAGMA cache_size = -{max(1, self.cache_mb * 1024 // 2)}')
+            self._connection.execute('PRAGMA journal_mode = OFF')
+            self._connection.execute('PRAGMA synchronous = OFF')
+            self._pid = os.getpid()
+        return self._connection
+
+    def add_file(self, file_path: Path, file_matches: List[Tuple[str, Set[CodeElement]]]) -> None:
+        """Register the elements matched in a file; an element matched by several layers keeps the last one."""
+        element_layers: Dict[CodeElement, str] = {}
+        for layer_name, matched in file_matches:
+            for element in matched:
+                element_layers[element] = layer_name
+        if not element_layers:
+            return
+
+        module_name = get_module_name(file_path, get_symbol_roots(self.paths))[0]
+        element_rows = []
+        symbol_rows = []
+        for element, layer_name in element_layers.items():
+            element_id = len(self.layer_ids)
+            layer_id = self._layer_id_of.get(layer_name)
+            if layer_id is None:
+                layer_id = self._layer_id_of[layer_name] = len(self.layer_names)
+                self.layer_names.append(layer_name)
+            self.layer_ids.append(layer_id)
+            element_rows.append(
+                (element_id, str(element.file), element.name, element.element_type, element.line, element.column)
+            )
+            symbol_rows.extend(
+                (qualified_name, element_id) for qualified_name in get_qualified_names(module_name, element.name)
+            )
+        self.connection.executemany('INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?)', element_rows)
+        self.connection.executemany('INSERT INTO symbols VALUES (?, ?)', symbol_rows)
+
+    def finish(self) -> None:
+        """Index the registered elements; call once all files were added."""
+        self.connection.executescript(_INDEXES)
+        self.connection.commit()
+        logging.debug(f"Stored {len(self.layer_ids)} code element(s) in {self.db_path}")
+
+    def save(self, store_path: Path) -> None:
+        """Copy the finished store, with the layers of its elements, to a file."""
+        store_path = Path(store_path)
+        if store_path.exists():
+            store_path.unlink()
+        destination = sqlite3.connect(str(store_path))
+        try:
+            self.connection.backup(destination)
+            layer_ids = array('H', self.layer_ids)
+            # Layer IDs are stored little-endian whatever the platform
+            if sys.byteorder == 'big':
+                layer_ids.byteswap()
+            destination.executescript(_LAYER_SCHEMA)
+            destination.executemany('INSERT INTO layers VALUES (?, ?)', enumerate(self.layer_names))
+            destination.execute('INSERT INTO element_layers VALUES (?)', (layer_ids.tobytes(),))
+            destination.commit()
+        finally:
+            destination.close()
+
+    @classmethod
+    def load(cls, store_path: Path, paths: List[Path], cache_mb: int = DEFAULT_CACHE_MB) -> 'ElementStore':
+        """Open a copy of a store saved by `save`; `paths` must be those the elements were collected from."""
+        directory = Path(tempfile.mkdtemp(prefix='deply-'))
+        store = cls.__new__(cls)
+        store._cleanup = weakref.finalize(store, shutil.rmtree, str(directory), True)
+        try:
+            shutil.copyfile(store_path, directory / 'elements.sqlite3')
+        except OSError:
+            store._cleanup()
+            raise
+        try:
+            connection = sqlite3.connect(str(directory / 'elements.sqlite3'))
+            try:
+                layer_names = [row[0] for row in connection.execute('SELECT name FROM layers ORDER BY id')]
+                layer_ids = array('H')
+                layer_ids.frombytes(connection.execute('SELECT data FROM element_layers').fetchone()[0])
+            finally:
+                connection.close()
+        except (sqlite3.DatabaseError, TypeError) as e:
+            store._cleanup()
+            raise ValueError(f"{store_path} is not a saved element store: {e}") from e
+        if sys.byteorder == 'big':
+            layer_ids.byteswap()
+        store.__setstate__((paths, cache_mb, directory, layer_names, layer_ids))
+        return store
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if getattr(self, '_cleanup', None) is not None:
+            self._cleanup()
+
+    @staticmethod
+    def _element(row: Tuple) -> CodeElement:
+        element_id, file, name, element_type, line, column = row
+        element = CodeElement(file=Path(file), name=name, element_type=element_type, line=line, column=column)
+        object.__setattr__(element, 'id', element_id)
+        return element
+
+    def id_of(self, element: CodeElement) -> Optional[int]:
+        if 0 <= element.id < len(self.layer_ids):
+            return element.id
+        row = self.connection.execute(
+            'SELECT id FROM elements WHERE file = ? AND name = ? AND element_type = ? AND line = ? AND col = ?',
+            (str(element.file), element.name, element.element_type, element.line, element.column)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def get(self, element: CodeElement, default=None):
+        element_id = self.id_of(element)
+        return default if element_id is None else self.layer_names[self.layer_ids[element_id]]
+
+    def __getitem__(self, element: CodeElement) -> str:
+        element_id = self.id_of(element)
+        if element_id is None:
+            raise KeyError(element)
+        return self.layer_names[self.layer_ids[element_id]]
+
+    def __contains__(self, element) -> bool:
+        return isinstance(element, CodeElement) and self.id_of(element) is not None
+
+    def __iter__(self) -> Iterator[CodeElement]:
+        for row in self.connection.execute('SELECT * FROM elements ORDER BY id'):
+            yield self._element(row)
+
+    def __len__(self) -> int:
+        return len(self.layer_ids)
+
+    def layer_counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(self.layer_names, 0)
+        for layer_id in self.layer_ids:
+            counts[self.layer_names[layer_id]] += 1
+        return counts
+
+    def files(self) -> List[Path]:
+        if self._files is None:
+            self._files = sorted(Path(row[0]) for row in self.connection.execute('SELECT DISTINCT file FROM elements'))
+        return self._files
+
+    def elements_in_file(self, file_path: Path) -> Set[CodeElement]:
+        return {
+            self._element(row)
+            for row in self.connection.execute('SELECT * FROM elements WHERE file = ?', (str(file_path),))
+        }
+
+    def lookup(self, qualified_name: str) -> Optional[Set[CodeElement]]:
+        """Return the elements known by a qualified name, caching the most recent lookups."""
+        lookups = self._lookups
+        if qualified_name in lookups:
+            lookups.move_to_end(qualified_name)
+            return lookups[qualified_name]
+        elements = {
+            self._element(row)
+            for row in self.connection.execute(
+                'SELECT elements.* FROM symbols JOIN elements ON elements.id = symbols.element_id '
+                'WHERE symbols.qualified_name = ?',
+                (qualified_name,)
+            )
+        } or None
+        lookups[qualified_name] = elements
+        if len(lookups) > self.max_lookups:
+            lookups.popitem(last=False)
+        return elements
+
+    def symbol_table(self) -> 'StoredSymbolTable':
+        return StoredSymbolTable(self)
+
+    def file_elements(self) -> 'StoredFileElements':
+        return StoredFileElements(self)
+
+
+class StoredSymbolTable:
+    """Read-only view of an ElementStore that can be used in place of the symbol table of the CodeAnalyzer."""
+
+    def __init__(self, store: ElementStore):
+        self.store = store
+
+    def get(self, qualified_name: str, default=None) -> Optional[Set[CodeElement]]:
+        elements = self.store.lookup(qualified_name)
+        return default if elements is None else elements
+
+
+class StoredFileElements(Mapping):
+    """Read-only mapping of files to their code elements, read from an ElementStore file by file."""
+
+    def __init__(self, store: ElementStore):
+        self.store = store
+
+    def __getitem__(self, file_path: Path) -> Set[CodeElement]:
+        elements = self.store.elements_in_file(file_path)
+        if not elements:
+            raise KeyError(file_path)
+        return elements
+
+    def get(self, file_path: Path, default=None):
+        return self.store.elements_in_file(file_path) or default
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self.store.files())
+
+    def __len__(self) -> int:
+        return len(self.store.files())
+
@@ -0,0 +1,11 @@
+from typing import NamedTuple, Optional
+
+
+class Reference(NamedTuple):
+    source_name: Optional[str]  # None if the reference belongs to every code element in the file (imports)
+    name: str  # Module qualified name of the referenced symbol, resolved against the collected code elements
+    dependency_type: str
+    line: int
+    column: int
+    # Name as written in the file, matched against short element names when `name` is not known
+    local_name: Optional[str] = None
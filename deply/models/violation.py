@@ -10,6 +10,7 @@ class Violation:
     line: int
     column: int
     message: str
+    occurrences: int = 1
 
     def __hash__(self):
         return hash((self.file, self.line, self.column, self.message))
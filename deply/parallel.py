@@ -0,0 +1,175 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from deply.analysis_cache import AnalysisCache
+from deply.collectors.collector_engine import CollectorEngine
+from deply.layer_collection import collect_file
+from deply.models.code_element import CodeElement
+from deply.models.dependency import Dependency
+from deply.models.element_store import ElementStore
+from deply.parsed_file_store import ParsedFileStore
+from deply.profiler import Profiler
+
+# State installed once per worker process by the pool initializers
+_worker_state = {}
+
+
+def resolve_jobs(jobs: int) -> int:
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _chunksize(item_count: int, jobs: int) -> int:
+    return max(1, item_count // (jobs * 4))
+
+
+def _reset_profiler(profiler: Optional[Profiler]) -> Optional[Profiler]:
+    # A forked worker inherits the timings already recorded by the main process
+    if profiler is not None:
+        profiler.pop_stats()
+    return profiler
+
+
+def _init_collection_worker(
+        collector_engine: CollectorEngine,
+        analysis_cache: Optional[AnalysisCache]
+) -> None:
+    _worker_state['collector_engine'] = collector_engine
+    _worker_state['analysis_cache'] = analysis_cache
+    _worker_state['profiler'] = _reset_profiler(collector_engine.profiler)
+    _worker_state['parsed_file_store'] = ParsedFileStore(max_entries=0, profiler=collector_engine.profiler)
+
+
+def _pop_cache_state(file_path: Path) -> Tuple[Optional[str], Optional[Dict[str, int]]]:
+    analysis_cache = _worker_state['analysis_cache']
+    if analysis_cache is None:
+        return None, None
+    try:
+        key = analysis_cache.file_key(file_path)
+    except OSError:
+        key = None
+    return key, analysis_cache.pop_stats()
+
+
+def _pop_profile_stats() -> Optional[Dict]:
+    profiler = _worker_state['profiler']
+    return profiler.pop_stats() if profiler is not None else None
+
+
+def _collect_file(file_path: Path) -> Tuple[
+    List[Tuple[str, Set[CodeElement]]], Optional[str], Optional[Dict[str, int]], Optional[Dict], Dict[str, int]
+]:
+    matches = collect_file(
+        file_path,
+        _worker_state['collector_engine'],
+        _worker_state['parsed_file_store'],
+        _worker_state['analysis_cache']
+    )
+    prefilter_stats = _worker_state['collector_engine'].pop_prefilter_stats()
+    return (matches, *_pop_cache_state(file_path), _pop_profile_stats(), prefilter_stats)
+
+
+def collect_in_parallel(
+        files: List[Path],
+        collector_engine: CollectorEngine,
+        jobs: int,
+        analysis_cache: Optional[AnalysisCache] = None
+) -> Iterator[Tuple[Path, List[Tuple[str, Set[CodeElement]]]]]:
+    """Match the layer collectors against every file, yielding results in the order of `files`."""
+    logging.debug(f"Collecting code elements from {len(files)} file(s) with {jobs} worker process(es).")
+    with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_collection_worker,
+            initargs=(collector_engine, analysis_cache)
+    ) as executor:
+        results = executor.map(_collect_file, files, chunksize=_chunksize(len(files), jobs))
+        for file_path, (matches, key, cache_stats, profile_stats, prefilter_stats) in zip(files, results):
+            if analysis_cache is not None:
+                if key is not None:
+                    analysis_cache.remember_key(file_path, key)
+                analysis_cache.merge_stats(cache_stats)
+            if profile_stats is not None:
+                collector_engine.profiler.merge_stats(profile_stats)
+            collector_engine.merge_prefilter_stats(prefilter_stats)
+            yield file_path, matches
+
+
+def _init_analysis_worker(
+        code_elements: Set[CodeElement],
+        dependency_types: List[str],
+        analysis_cache: Optional[AnalysisCache],
+        profiler: Optional[Profiler],
+        aggregate_edges: bool,
+        paths: List[Path],
+        element_store: Optional[ElementStore]
+) -> None:
+    from deply.code_analyzer import CodeAnalyzer
+
+    dependencies: List[Dependency] = []
+    analyzer = CodeAnalyzer(
+        code_elements=code_elements,
+        dependency_handler=dependencies.append,
+        dependency_types=dependency_types,
+        parsed_file_store=ParsedFileStore(max_entries=0, profiler=profiler),
+        analysis_cache=analysis_cache,
+        profiler=profiler,
+        aggregate_edges=aggregate_edges,
+        paths=paths,
+        element_store=element_store
+    )
+    _worker_state['analyzer'] = analyzer
+    _worker_state['analysis_cache'] = analysis_cache
+    _worker_state['profiler'] = _reset_profiler(profiler)
+    _worker_state['dependencies'] = dependencies
+    _worker_state['symbol_table'] = analyzer._build_symbol_table()
+    _worker_state['file_to_elements'] = analyzer._build_file_to_element_map()
+
+
+def _extract_file(file_path: Path) -> Tuple[List[Dependency], Optional[Dict[str, int]], Optional[Dict]]:
+    dependencies = _worker_state['dependencies']
+    dependencies.clear()
+    _worker_state['analyzer']._extract_dependencies_from_file(
+        file_path,
+        _worker_state['file_to_elements'][file_path],
+        _worker_state['symbol_table']
+    )
+    analysis_cache = _worker_state['analysis_cache']
+    cache_stats = analysis_cache.pop_stats() if analysis_cache is not None else None
+    return list(dependencies), cache_stats, _pop_profile_stats()
+
+
+def extract_in_parallel(
+        code_elements: Set[CodeElement],
+        dependency_types: List[str],
+        files: List[Path],
+        jobs: int,
+        analysis_cache: Optional[AnalysisCache] = None,
+        profiler: Optional[Profiler] = None,
+        aggregate_edges: bool = False,
+        paths: Optional[List[Path]] = None,
+        element_store: Optional[ElementStore] = None
+) -> Iterator[List[Dependency]]:
+    """Extract the dependencies of every file, yielding one list per file in the order of `files`."""
+    logging.debug(f"Extracting dependencies from {len(files)} file(s) with {jobs} worker process(es).")
+    with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_analysis_worker,
+            initargs=(
+                code_elements, dependency_types, analysis_cache, profiler, aggregate_edges, paths or [], element_store
+            )
+    ) as executor:
+        try:
+            results = executor.map(_extract_file, files, chunksize=_chunksize(len(files), jobs))
+            for dependencies, cache_stats, profile_stats in results:
+                if analysis_cache is not None:
+                    analysis_cache.merge_stats(cache_stats)
+                if profile_stats is not None:
+                    profiler.merge_stats(profile_stats)
+                yield dependencies
+        finally:
+            # Files not started yet are dropped when the consumer stops early
+            executor.shutdown(cancel_futures=True)
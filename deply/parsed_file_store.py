@@ -0,0 +1,99 @@
+import ast
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from deply.profiler import Profiler
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class ParsedFileStore:
+    """
+    Per-run store of parsed ASTs shared by layer collection and dependency analysis.
+
+    Every file is parsed at most once while its tree is retained. The store is bounded by
+    `max_entries`: once full, freshly parsed trees are handed out without being retained and
+    are parsed again on the next request. Callers free space with `release` / `retain`.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, profiler: Optional[Profiler] = None):
+        self.max_entries = max_entries
+        self.profiler = profiler
+        self._trees: Dict[Path, ast.AST] = {}
+        self._failed: Set[Path] = set()
+        self.stats = {
+            'parses': 0,
+            'reused': 0,
+            'failed': 0,
+            'not_retained': 0,
+            'released': 0,
+        }
+
+    def get(self, file_path: Path, source: Optional[bytes] = None) -> Optional[ast.AST]:
+        """Return the tree of a file, parsed from `source` when its content was read already."""
+        tree = self._trees.get(file_path)
+        if tree is not None:
+            self.stats['reused'] += 1
+            return tree
+        if file_path in self._failed:
+            return None
+
+        tree = self._parse(file_path, source)
+        if tree is None:
+            return None
+        if self.max_entries is None or len(self._trees) < self.max_entries:
+            self._trees[file_path] = tree
+        else:
+            self.stats['not_retained'] += 1
+        return tree
+
+    def contains(self, file_path: Path) -> bool:
+        return file_path in self._trees
+
+    def release(self, file_path: Path) -> None:
+        if self._trees.pop(file_path, None) is not None:
+            self.stats['released'] += 1
+
+    def forget(self, file_path: Path) -> None:
+        """Drop everything known about a file, e.g. after it changed, so it is parsed again."""
+        self._trees.pop(file_path, None)
+        self._failed.discard(file_path)
+
+    def retain(self, file_paths: Iterable[Path]) -> None:
+        keep = set(file_paths)
+        for file_path in [p for p in self._trees if p not in keep]:
+            self.release(file_path)
+
+    def clear(self) -> None:
+        self._trees.clear()
+        self._failed.clear()
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def _parse(self, file_path: Path, source: Optional[bytes] = None) -> Optional[ast.AST]:
+        started = time.perf_counter()
+        try:
+            if source is not None:
+                source_code = source.decode('utf-8')
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    source_code = f.read()
+            tree = ast.parse(source_code, filename=str(file_path))
+        except (SyntaxError, ValueError, OSError) as e:
+            logging.warning(f"Failed to parse {file_path}: {e}")
+            self._failed.add(file_path)
+            self.stats['failed'] += 1
+            return None
+        self.stats['parses'] += 1
+        if self.profiler is not None:
+            self.profiler.record_parse(file_path, time.perf_counter() - started)
+        return tree
+
+    def log_stats(self) -> None:
+        logging.info(
+            f"Parsed {self.stats['parses']} file(s), reused {self.stats['reused']} parsed tree(s) "
+            f"({self.stats['reused']} parse(s) saved), {self.stats['failed']} file(s) failed to parse."
+        )
@@ -0,0 +1,104 @@
+import heapq
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from deply import __version__
+
+DEFAULT_SLOWEST_FILES = 20
+
+
+class Profiler:
+    """
+    Records wall and CPU time of the phases of a run, broken down into named sections.
+
+    Phases are top-level steps such as file discovery or collection. Sections split a phase by
+    a key, e.g. the 'collectors' section by collector type. The slowest files to parse are kept
+    as well, together with counters such as the number of files analyzed. Worker processes hand
+    their timings back with `pop_stats` / `merge_stats`.
+    """
+
+    def __init__(self, slowest_files: int = DEFAULT_SLOWEST_FILES):
+        self.slowest_files = slowest_files
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.sections: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.counters: Dict[str, int] = {}
+        self._parses: List[Tuple[float, str]] = []
+
+    @staticmethod
+    def start() -> Tuple[float, float]:
+        return time.perf_counter(), time.process_time()
+
+    @staticmethod
+    def _add(totals: Dict[str, float], wall: float, cpu: float, calls: int = 1) -> None:
+        totals['wall'] = totals.get('wall', 0.0) + wall
+        totals['cpu'] = totals.get('cpu', 0.0) + cpu
+        totals['calls'] = totals.get('calls', 0) + calls
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self.start()
+        try:
+            yield
+        finally:
+            self.stop_phase(name, started)
+
+    def stop_phase(self, name: str, started: Tuple[float, float]) -> None:
+        wall, cpu = time.perf_counter() - started[0], time.process_time() - started[1]
+        self._add(self.phases.setdefault(name, {}), wall, cpu)
+
+    def stop(self, started: Tuple[float, float], *section_keys: Tuple[str, str]) -> None:
+        """Add the time elapsed since `started` to every given (section, key) pair."""
+        wall, cpu = time.perf_counter() - started[0], time.process_time() - started[1]
+        for section, key in section_keys:
+            self._add(self.sections.setdefault(section, {}).setdefault(key, {}), wall, cpu)
+
+    def count(self, name: str, value: int) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_parse(self, file_path: Path, wall: float) -> None:
+        entry = (wall, str(file_path))
+        if len(self._parses) < self.slowest_files:
+            heapq.heappush(self._parses, entry)
+        elif self._parses and entry > self._parses[0]:
+            heapq.heapreplace(self._parses, entry)
+
+    def pop_stats(self) -> Dict[str, Any]:
+        stats = {'sections': self.sections, 'parses': self._parses}
+        self.sections = {}
+        self._parses = []
+        return stats
+
+    def merge_stats(self, stats: Dict[str, Any]) -> None:
+        for section, keys in stats['sections'].items():
+            for key, totals in keys.items():
+                self._add(
+                    self.sections.setdefault(section, {}).setdefault(key, {}),
+                    totals['wall'], totals['cpu'], totals['calls']
+                )
+        for wall, file_path in stats['parses']:
+            self.record_parse(file_path, wall)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'deply_version': __version__,
+            'counters': self.counters,
+            'phases': self.phases,
+            'sections': {
+                section: dict(sorted(keys.items(), key=lambda item: -item[1]['wall']))
+                for section, keys in sorted(self.sections.items())
+            },
+            'slowest_parses': [
+                {'file': file_path, 'wall': wall} for wall, file_path in sorted(self._parses, reverse=True)
+            ],
+        }
+
+    def write(self, output_path: Path) -> None:
+        Path(output_path).write_text(json.dumps(self.to_dict(), indent=2))
+
+
+def profile_phase(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """Time a phase with the given profiler, or do nothing when profiling is disabled."""
+    return profiler.phase(name) if profiler is not None else nullcontext()
@@ -0,0 +1,19 @@
+import json
+from typing import TextIO
+
+from ...models.violation import Violation
+from .jsonl_report import JsonLinesReport
+from .text_report import TextReport
+
+
+class JsonReport:
+    """A JSON object listing the violations, written to the stream one violation at a time."""
+
+    def __init__(self, violations: list[Violation]):
+        self.violations = violations
+
+    def write(self, stream: TextIO) -> None:
+        stream.write('{"violations": [')
+        for i, violation in enumerate(sorted(self.violations, key=TextReport.sort_key)):
+            stream.write((',\n  ' if i else '\n  ') + JsonLinesReport.format_violation(violation))
+        stream.write(f'\n], "total_violations": {json.dumps(len(self.violations))}}}')
@@ -0,0 +1,30 @@
+import json
+from typing import TextIO
+
+from ...models.violation import Violation
+from .text_report import TextReport
+
+
+class JsonLinesReport:
+    def __init__(self, violations: list[Violation]):
+        self.violations = violations
+
+    def generate(self) -> str:
+        sorted_violations = sorted(self.violations, key=TextReport.sort_key)
+        return "\n".join(self.format_violation(violation) for violation in sorted_violations)
+
+    def write(self, stream: TextIO) -> None:
+        for i, violation in enumerate(sorted(self.violations, key=TextReport.sort_key)):
+            stream.write(("\n" if i else "") + self.format_violation(violation))
+
+    @staticmethod
+    def format_violation(violation: Violation) -> str:
+        return json.dumps({
+            'file': str(violation.file),
+            'line': violation.line,
+            'column': violation.column,
+            'element_name': violation.element_name,
+            'element_type': violation.element_type,
+            'message': violation.message,
+            'occurrences': violation.occurrences,
+        })
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+from typing import TextIO
+
+from deply import __version__
+from ...models.violation import Violation
+from .text_report import TextReport
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+RULE_ID = 'layer-dependency'
+
+
+class SarifReport:
+    """
+    A SARIF 2.1.0 log for code scanning tools, with one result per violation written to the
+    stream one at a time.
+    """
+
+    def __init__(self, violations: list[Violation]):
+        self.violations = violations
+
+    def write(self, stream: TextIO) -> None:
+        driver = {
+            'name': 'deply',
+            'version': __version__,
+            'informationUri': 'https://github.com/vashkatsi/deply',
+            'rules': [{
+                'id': RULE_ID,
+                'shortDescription': {'text': 'Dependency between layers that is not allowed by the ruleset.'},
+            }],
+        }
+        stream.write(
+            f'{{"$schema": {json.dumps(SARIF_SCHEMA)}, "version": "2.1.0", "runs": [{{'
+            f'"tool": {{"driver": {json.dumps(driver)}}}, "results": ['
+        )
+        for i, violation in enumerate(sorted(self.violations, key=TextReport.sort_key)):
+            stream.write((',\n' if i else '\n') + self.format_violation(violation))
+        stream.write('\n]}]}')
+
+    @staticmethod
+    def format_violation(violation: Violation) -> str:
+        result = {
+            'ruleId': RULE_ID,
+            'level': 'error',
+            'message': {'text': violation.message},
+            'locations': [{
+                'physicalLocation': {
+                    'artifactLocation': {'uri': Path(violation.file).as_posix()},
+                    # SARIF columns start at 1
+                    'region': {'startLine': max(1, violation.line), 'startColumn': violation.column + 1},
+                },
+                'logicalLocations': [{'name': violation.element_name, 'kind': violation.element_type}],
+            }],
+        }
+        if violation.occurrences > 1:
+            result['properties'] = {'occurrences': violation.occurrences}
+        return json.dumps(result)
@@ -1,3 +1,5 @@
+from typing import TextIO
+
 from ...models.violation import Violation
 
 
@@ -6,14 +8,26 @@ class TextReport:
         self.violations = violations
 
     def generate(self) -> str:
-        sorted_violations = sorted(
-            self.violations,
-            key=lambda v: (v.file, v.line, v.column)
-        )
+        sorted_violations = sorted(self.violations, key=self.sort_key)
         lines = []
         for violation in sorted_violations:
-            lines.append(
-                f"{violation.file}:{violation.line}:{violation.column} - {violation.message}"
-                # + f" ({violation.element_type} '{violation.element_name}')"
-            )
+            lines.append(self.format_violation(violation))
         return "\n".join(lines)
+
+    def write(self, stream: TextIO) -> None:
+        for i, violation in enumerate(sorted(self.violations, key=self.sort_key)):
+            stream.write(("\n" if i else "") + self.format_violation(violation))
+
+    @staticmethod
+    def sort_key(violation: Violation) -> tuple:
+        return violation.file, violation.line, violation.column, violation.message, violation.element_name
+
+    @staticmethod
+    def format_violation(violation: Violation) -> str:
+        line = (
+            f"{violation.file}:{violation.line}:{violation.column} - {violation.message}"
+            # + f" ({violation.element_type} '{violation.element_name}')"
+        )
+        if violation.occurrences > 1:
+            line += f" ({violation.occurrences} occurrences)"
+        return line
@@ -1,14 +1,31 @@
-from typing import List
+from io import StringIO
+from typing import List, TextIO
 from ..models.violation import Violation
+from .formats.json_report import JsonReport
+from .formats.jsonl_report import JsonLinesReport
+from .formats.sarif_report import SarifReport
 from .formats.text_report import TextReport
 
+REPORT_FORMATS = {
+    "text": TextReport,
+    "json": JsonReport,
+    "jsonl": JsonLinesReport,
+    "sarif": SarifReport,
+}
+
 
 class ReportGenerator:
     def __init__(self, violations: List[Violation]):
         self.violations = violations
 
     def generate(self, format: str) -> str:
-        if format == "text":
-            return TextReport(self.violations).generate()
-        else:
+        output = StringIO()
+        self.write(format, output)
+        return output.getvalue()
+
+    def write(self, format: str, stream: TextIO) -> None:
+        """Write the report to a stream violation by violation, without building it in memory first."""
+        report_class = REPORT_FORMATS.get(format)
+        if report_class is None:
             raise ValueError(f"Unknown report format: {format}")
+        report_class(self.violations).write(stream)
@@ -0,0 +1,40 @@
+from typing import Optional, Set, TextIO
+
+from ..models.violation import Violation
+from .formats.jsonl_report import JsonLinesReport
+
+
+class ViolationLimitReached(Exception):
+    """Raised by a ViolationSink once it has received its maximum number of violations."""
+
+
+class ViolationSink:
+    """
+    Violation handler that collects unique violations.
+
+    When a stream is given, every new violation is written to it as a JSON line as soon as it
+    is found. When `max_violations` is set, ViolationLimitReached is raised once that many
+    violations were collected so the analysis can stop early.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, max_violations: Optional[int] = None):
+        self.stream = stream
+        self.max_violations = max_violations
+        self.violations: Set[Violation] = set()
+
+    @property
+    def limit_reached(self) -> bool:
+        return self.max_violations is not None and len(self.violations) >= self.max_violations
+
+    def __call__(self, violation: Violation) -> None:
+        if violation in self.violations:
+            return
+        if self.limit_reached:
+            raise ViolationLimitReached()
+
+        self.violations.add(violation)
+        if self.stream is not None:
+            self.stream.write(JsonLinesReport.format_violation(violation) + "\n")
+            self.stream.flush()
+        if self.limit_reached:
+            raise ViolationLimitReached()
@@ -1,3 +1,5 @@
 from .base_rule import BaseRule
+from .baseline import Baseline, BaselineError
 from .dependency_rule import DependencyRule
 from .rule_factory import RuleFactory
+from .dependency_checker import DependencyChecker
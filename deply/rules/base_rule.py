@@ -1,3 +1,5 @@
+from typing import List, Tuple
+
 from ..models.dependency import Dependency
 from ..models.violation import Violation
 
@@ -10,3 +12,11 @@ class BaseRule:
             dependency: Dependency
     ) -> Violation:
         raise NotImplementedError
+
+    def check_batch(self, checks: List[Tuple[str, str, Dependency]]) -> List[Violation]:
+        violations = []
+        for source_layer, target_layer, dependency in checks:
+            violation = self.check(source_layer, target_layer, dependency)
+            if violation:
+                violations.append(violation)
+        return violations
@@ -0,0 +1,86 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from deply.models.dependency import Dependency
+from deply.utils.module_utils import get_module_name
+
+BASELINE_HEADER = '# deply baseline v1'
+
+
+class BaselineError(Exception):
+    """Raised when a baseline file cannot be read."""
+
+
+class Baseline:
+    """
+    Fingerprints of known violations that are not reported again.
+
+    A fingerprint identifies a violating dependency by the module qualified names of the
+    depending and the depended-on elements, their layers and the dependency type, so it is not
+    affected by code moving within a file. Fingerprints are 64 bit hashes, stored sorted as
+    one hexadecimal number per line, and checked with set lookups for violating dependencies
+    only, before their violation is built.
+
+    When `record` is set, the fingerprint of every violation is recorded to be written as a
+    new baseline instead, and nothing is suppressed.
+    """
+
+    def __init__(self, paths: List[Path], fingerprints: Optional[Set[int]] = None, record: bool = False):
+        self.paths = paths
+        self.fingerprints: Set[int] = fingerprints if fingerprints is not None else set()
+        self.record = record
+        self.matched: Set[int] = set()
+        self.suppressed = 0
+        self._module_names: Dict[Path, str] = {}
+
+    @classmethod
+    def load(cls, baseline_path: Path, paths: List[Path]) -> 'Baseline':
+        try:
+            lines = Path(baseline_path).read_text().splitlines()
+        except OSError as e:
+            raise BaselineError(f"cannot read baseline {baseline_path}: {e}") from e
+        if not lines or lines[0] != BASELINE_HEADER:
+            raise BaselineError(f"{baseline_path} is not a deply baseline")
+        try:
+            fingerprints = {int(line, 16) for line in lines[1:] if line}
+        except ValueError as e:
+            raise BaselineError(f"{baseline_path} is corrupt: {e}") from e
+        return cls(paths, fingerprints)
+
+    def write(self, baseline_path: Path) -> None:
+        lines = [BASELINE_HEADER] + [f'{fingerprint:016x}' for fingerprint in sorted(self.fingerprints)]
+        Path(baseline_path).write_text('\n'.join(lines) + '\n')
+
+    def _qualified_name(self, element) -> str:
+        module_name = self._module_names.get(element.file)
+        if module_name is None:
+            module_name = self._module_names[element.file] = get_module_name(element.file, self.paths)[0]
+        return f"{module_name}.{element.name}"
+
+    def fingerprint(self, source_layer: str, target_layer: str, dependency: Dependency) -> int:
+        key = '\0'.join((
+            self._qualified_name(dependency.code_element),
+            self._qualified_name(dependency.depends_on_code_element),
+            source_layer,
+            target_layer,
+            dependency.dependency_type,
+        ))
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def suppresses(self, source_layer: str, target_layer: str, dependency: Dependency) -> bool:
+        """Whether the violation of a dependency is in the baseline, or record it when generating one."""
+        fingerprint = self.fingerprint(source_layer, target_layer, dependency)
+        if self.record:
+            self.fingerprints.add(fingerprint)
+            return False
+        if fingerprint not in self.fingerprints:
+            return False
+        self.matched.add(fingerprint)
+        self.suppressed += 1
+        return True
+
+    @property
+    def stale_count(self) -> int:
+        """Number of baseline entries that no violation matched, e.g. because it was fixed."""
+        return 0 if self.record else len(self.fingerprints) - len(self.matched)
@@ -0,0 +1,70 @@
+from typing import Callable, List, Mapping, Optional, Set, Tuple
+
+from deply.models.code_element import CodeElement
+from deply.models.dependency import Dependency
+from deply.models.violation import Violation
+from deply.profiler import Profiler
+from .base_rule import BaseRule
+
+DEFAULT_BATCH_SIZE = 1024
+
+
+class DependencyChecker:
+    """
+    Dependency handler that checks every dependency against the rules of the layers it connects.
+
+    Dependencies are checked in batches of `batch_size`; call `flush` once all dependencies
+    have been handled to check the remaining ones. A `batch_size` of 1 checks every dependency
+    as soon as it is handled. With `layer_summary`, only the first
+    dependency between each pair of layers is checked.
+    """
+
+    def __init__(
+            self,
+            rules: List[BaseRule],
+            code_element_to_layer: Mapping[CodeElement, str],
+            violation_handler: Callable[[Violation], None],
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            profiler: Optional[Profiler] = None,
+            layer_summary: bool = False
+    ):
+        self.rules = rules
+        self.code_element_to_layer = code_element_to_layer
+        self.violation_handler = violation_handler
+        self.batch_size = batch_size
+        self.profiler = profiler
+        self.layer_summary = layer_summary
+        self.layer_pairs: Set[Tuple[Optional[str], str]] = set()
+        self.total_dependencies = 0
+        self._pending: List[Tuple[str, str, Dependency]] = []
+
+    def __call__(self, dependency: Dependency) -> None:
+        self.total_dependencies += 1
+
+        # Skip if target element is not mapped to a layer
+        target_layer = self.code_element_to_layer.get(dependency.depends_on_code_element)
+        if not target_layer:
+            return
+
+        source_layer = self.code_element_to_layer.get(dependency.code_element)
+        if self.layer_summary:
+            if (source_layer, target_layer) in self.layer_pairs:
+                return
+            self.layer_pairs.add((source_layer, target_layer))
+        self._pending.append((source_layer, target_layer, dependency))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self.profiler is not None:
+            started = self.profiler.start()
+        violations = []
+        for rule in self.rules:
+            violations.extend(rule.check_batch(self._pending))
+        self._pending.clear()
+        if self.profiler is not None:
+            self.profiler.stop_phase('rule_checking', started)
+        for violation in violations:
+            self.violation_handler(violation)
@@ -1,56 +1,111 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from deply.models.dependency import Dependency
 from deply.models.violation import Violation
 from deply.rules import BaseRule
+from .baseline import Baseline
 
 
 class DependencyRule(BaseRule):
-    def __init__(self, ruleset: Dict[str, Dict[str, List[str]]]):
-        self.ruleset = ruleset
+    """
+    Checks dependencies against the allow / disallow lists of the ruleset.
 
-    def check(
+    The ruleset is compiled into integer layer IDs and a decision matrix holding, for every
+    (source layer, target layer) pair, the templated violation message or None if the
+    dependency is allowed. Layers that are unknown at compile time are added on first use.
+    Violations in the `baseline` are dropped before they are built.
+    """
+
+    def __init__(
             self,
-            source_layer: str,
-            target_layer: str,
-            dependency: Dependency
-    ) -> Optional[Violation]:
-        # Get the rules for the source layer
+            ruleset: Dict[str, Dict[str, List[str]]],
+            layer_names: Optional[List[str]] = None,
+            baseline: Optional[Baseline] = None
+    ):
+        self.ruleset = ruleset
+        self.baseline = baseline
+        self.layer_ids: Dict[str, int] = {}
+        self.layer_names: List[str] = []
+        self._messages: List[List[Optional[str]]] = []
+
+        for layer_name in layer_names or []:
+            self.layer_id(layer_name)
+        for source_layer, layer_rules in ruleset.items():
+            self.layer_id(source_layer)
+            for target_layer in layer_rules.get("allow", []) + layer_rules.get("disallow", []):
+                self.layer_id(target_layer)
+
+    def layer_id(self, layer_name: str) -> int:
+        layer_id = self.layer_ids.get(layer_name)
+        if layer_id is None:
+            layer_id = len(self.layer_names)
+            self.layer_ids[layer_name] = layer_id
+            self.layer_names.append(layer_name)
+            for source_id, row in enumerate(self._messages):
+                row.append(self._compile_message(self.layer_names[source_id], layer_name))
+            self._messages.append([self._compile_message(layer_name, target) for target in self.layer_names])
+        return layer_id
+
+    def _compile_message(self, source_layer: str, target_layer: str) -> Optional[str]:
         layer_rules = self.ruleset.get(source_layer, {})
         allowed_layers = set(layer_rules.get("allow", []))
         disallowed_layers = set(layer_rules.get("disallow", []))
 
         # Check against disallowed layers
         if target_layer in disallowed_layers:
-            message = (
-                f"Layer '{source_layer}' is not allowed to depend on layer '{target_layer}'. "
-                f"Dependency type: {dependency.dependency_type}."
-            )
-            violation = Violation(
-                file=dependency.code_element.file,
-                element_name=dependency.code_element.name,
-                element_type=dependency.code_element.element_type,
-                line=dependency.line,
-                column=dependency.column,
-                message=message,
-            )
-            return violation
+            return f"Layer '{source_layer}' is not allowed to depend on layer '{target_layer}'. Dependency type: "
 
         # Check against allowed layers if "allow" is specified
         if allowed_layers and target_layer not in allowed_layers:
-            message = (
-                f"Layer '{source_layer}' depends on unallowed layer '{target_layer}'. "
-                f"Dependency type: {dependency.dependency_type}."
-            )
-            violation = Violation(
-                file=dependency.code_element.file,
-                element_name=dependency.code_element.name,
-                element_type=dependency.code_element.element_type,
-                line=dependency.line,
-                column=dependency.column,
-                message=message,
-            )
-            return violation
+            return f"Layer '{source_layer}' depends on unallowed layer '{target_layer}'. Dependency type: "
 
         # No violation
         return None
+
+    def check(
+            self,
+            source_layer: str,
+            target_layer: str,
+            dependency: Dependency
+    ) -> Optional[Violation]:
+        if source_layer is None:
+            return None
+        message = self._messages[self.layer_id(source_layer)][self.layer_id(target_layer)]
+        if message is None:
+            return None
+        if self.baseline is not None and self.baseline.suppresses(source_layer, target_layer, dependency):
+            return None
+        return self._create_violation(message, dependency)
+
+    def violating_indices(self, source_layer_ids: Sequence[int], target_layer_ids: Sequence[int]) -> List[int]:
+        """Return the positions of the (source, target) layer ID pairs that violate the ruleset."""
+        messages = self._messages
+        return [
+            i for i, (source_id, target_id) in enumerate(zip(source_layer_ids, target_layer_ids))
+            if messages[source_id][target_id] is not None
+        ]
+
+    def check_batch(self, checks: List[Tuple[str, str, Dependency]]) -> List[Violation]:
+        checks = [check for check in checks if check[0] is not None]
+        layer_id = self.layer_id
+        source_layer_ids = [layer_id(source_layer) for source_layer, _, _ in checks]
+        target_layer_ids = [layer_id(target_layer) for _, target_layer, _ in checks]
+        indices = self.violating_indices(source_layer_ids, target_layer_ids)
+        if self.baseline is not None:
+            indices = [i for i in indices if not self.baseline.suppresses(*checks[i])]
+        return [
+            self._create_violation(self._messages[source_layer_ids[i]][target_layer_ids[i]], checks[i][2])
+            for i in indices
+        ]
+
+    @staticmethod
+    def _create_violation(message: str, dependency: Dependency) -> Violation:
+        return Violation(
+            file=dependency.code_element.file,
+            element_name=dependency.code_element.name,
+            element_type=dependency.code_element.element_type,
+            line=dependency.line,
+            column=dependency.column,
+            message=f"{message}{dependency.dependency_type}.",
+            occurrences=dependency.occurrences,
+        )
@@ -1,9 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base_rule import BaseRule
+from .baseline import Baseline
 from .dependency_rule import DependencyRule
 
 
 class RuleFactory:
     @staticmethod
-    def create_rules(ruleset: Dict[str, Any]) -> List[BaseRule]:
-        return [DependencyRule(ruleset)]
+    def create_rules(
+            ruleset: Dict[str, Any],
+            layer_names: Optional[List[str]] = None,
+            baseline: Optional[Baseline] = None
+    ) -> List[BaseRule]:
+        return [DependencyRule(ruleset, layer_names, baseline)]
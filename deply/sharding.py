@@ -0,0 +1,166 @@
+import heapq
+import os
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Set, Tuple
+
+from deply.dependency_index import DependencyIndexWriter
+from deply.models.violation import Violation
+
+_VIOLATION_SCHEMA = """
+CREATE TABLE violations (
+    file TEXT NOT NULL,
+    element_name TEXT NOT NULL,
+    element_type TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    occurrences INTEGER NOT NULL
+);
+"""
+
+
+class ShardError(Exception):
+    """Raised when shard results cannot be merged."""
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse an `INDEX/COUNT` shard specification, with indexes starting at 1."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"invalid shard '{value}', expected INDEX/COUNT like 1/4") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard '{value}', INDEX must be between 1 and COUNT")
+    return index, count
+
+
+def select_shard(file_paths: Iterable[Path], index: int, count: int) -> Set[Path]:
+    """
+    The files analyzed by shard `index` of `count`.
+
+    Files are assigned largest first to the shard with the fewest bytes so far, so shards
+    get about the same amount of source code. The assignment only depends on the paths and
+    sizes of the files, so every shard computes the same one.
+    """
+    sized_files = []
+    for file_path in file_paths:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        sized_files.append((-size, Path(file_path).as_posix(), file_path))
+    sized_files.sort()
+
+    shards = [(0, i) for i in range(1, count + 1)]
+    selected = set()
+    for negative_size, _, file_path in sized_files:
+        shard_size, shard_index = heapq.heappop(shards)
+        if shard_index == index:
+            selected.add(file_path)
+        heapq.heappush(shards, (shard_size - negative_size, shard_index))
+    return selected
+
+
+class ShardResultWriter(DependencyIndexWriter):
+    """
+    Writes the result of one shard: the index of its code elements and dependencies, along
+    with the violations it found, for `deply merge`.
+    """
+
+    def __init__(self, result_path: Path, code_element_to_layer, paths: List[Path], shard: Tuple[int, int],
+                 config_fingerprint: str):
+        super().__init__(result_path, code_element_to_layer, paths)
+        self.shard = shard
+        self.config_fingerprint = config_fingerprint
+        self.connection.executescript(_VIOLATION_SCHEMA)
+
+    def write_violations(self, violations: Iterable[Violation]) -> None:
+        self.connection.executemany(
+            'INSERT INTO violations VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (
+                (str(v.file), v.element_name, v.element_type, v.line, v.column, v.message, v.occurrences)
+                for v in violations
+            )
+        )
+
+    def _meta(self, complete: bool) -> List[Tuple[str, str]]:
+        return super()._meta(complete) + [('shard', f'{self.shard[0]}/{self.shard[1]}'),
+                                          ('config', self.config_fingerprint)]
+
+
+class ShardResult:
+    """Reads a result written by a ShardResultWriter."""
+
+    def __init__(self, result_path: Path):
+        self.result_path = Path(result_path)
+        if not self.result_path.is_file():
+            raise ShardError(f"No shard result at {result_path}")
+        self.connection = sqlite3.connect(f'{self.result_path.absolute().as_uri()}?mode=ro', uri=True)
+        try:
+            self.meta = dict(self.connection.execute('SELECT key, value FROM meta'))
+            self.shard = parse_shard(self.meta['shard'])
+        except (sqlite3.DatabaseError, KeyError, ValueError):
+            self.connection.close()
+            raise ShardError(f"{result_path} is not a shard result") from None
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @property
+    def complete(self) -> bool:
+        return self.meta.get('complete') == '1'
+
+    def violations(self) -> Iterable[Violation]:
+        for file, element_name, element_type, line, column, message, occurrences in self.connection.execute(
+                'SELECT * FROM violations'
+        ):
+            yield Violation(
+                file=Path(file), element_name=element_name, element_type=element_type, line=line, column=column,
+                message=message, occurrences=occurrences
+            )
+
+    def dependency_count(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM dependencies').fetchone()[0]
+
+
+def check_shards(results: List[ShardResult]) -> None:
+    """Raise a ShardError unless the results are those of every shard of the same analysis."""
+    counts = {result.shard[1] for result in results}
+    if len(counts) != 1:
+        raise ShardError("shard results come from runs with different shard counts")
+    if len({result.meta.get('config') for result in results}) != 1:
+        raise ShardError("shard results come from runs with different configurations")
+    count = counts.pop()
+    indexes = sorted(result.shard[0] for result in results)
+    if indexes != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        if missing:
+            raise ShardError(f"missing the result of shard(s) {', '.join(f'{i}/{count}' for i in missing)}")
+        raise ShardError("the result of a shard was given more than once")
+    incomplete = [str(result.result_path) for result in results if not result.complete]
+    if incomplete:
+        raise ShardError(f"the analysis of {', '.join(incomplete)} did not complete")
+
+
+def merge_indexes(results: List[ShardResult], index_path: Path) -> None:
+    """Write a dependency index of all shards; every shard holds all code elements."""
+    index_path = Path(index_path)
+    fd, tmp_path = tempfile.mkstemp(dir=index_path.absolute().parent, suffix='.tmp')
+    os.close(fd)
+    shutil.copyfile(results[0].result_path, tmp_path)
+    connection = sqlite3.connect(Path(tmp_path).absolute().as_uri(), uri=True)
+    try:
+        connection.execute("DELETE FROM meta WHERE key IN ('shard', 'config')")
+        connection.execute('DROP TABLE violations')
+        for result in results[1:]:
+            connection.execute('ATTACH DATABASE ? AS shard', (f'{result.result_path.absolute().as_uri()}?mode=ro',))
+            connection.execute('INSERT INTO dependencies SELECT * FROM shard.dependencies')
+            connection.commit()
+            connection.execute('DETACH DATABASE shard')
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, index_path)
@@ -1,9 +1,17 @@
 import ast
 
+from .module_utils import resolve_relative_module
+
 
 def get_import_aliases(tree):
+    return get_import_aliases_from_nodes(
+        node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def get_import_aliases_from_nodes(import_nodes):
     aliases = {}
-    for node in ast.walk(tree):
+    for node in import_nodes:
         if isinstance(node, ast.Import):
             for alias in node.names:
                 name = alias.name
@@ -18,6 +26,34 @@ def get_import_aliases(tree):
     return aliases
 
 
+def get_qualified_import_aliases(import_nodes, module_name, is_package):
+    """
+    Map every name bound by the imports of a module to the absolute name it refers to.
+
+    Relative imports are resolved against `module_name`. Returns the aliases and the modules
+    imported with `from module import *`.
+    """
+    aliases = {}
+    star_modules = []
+    for node in import_nodes:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    head = alias.name.split('.')[0]
+                    aliases[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            module = resolve_relative_module(module_name, is_package, node.level, node.module or '')
+            for alias in node.names:
+                if alias.name == '*':
+                    if module:
+                        star_modules.append(module)
+                    continue
+                aliases[alias.asname or alias.name] = f"{module}.{alias.name}" if module else alias.name
+    return aliases, star_modules
+
+
 def get_base_name(node, import_aliases):
     if isinstance(node, ast.Name):
         return import_aliases.get(node.id, node.id)
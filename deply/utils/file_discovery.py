@@ -0,0 +1,101 @@
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Set, Tuple
+
+# Regex constructs that look past the end of a match; a pattern using them may match a
+# directory without matching every file below it, so it cannot prune directories
+_NON_PREFIX_TOKENS = ('$', '\\Z', '\\b', '\\B', '(?=', '(?!')
+
+
+class FileDiscovery:
+    """
+    Finds the Python files under the configured paths with a single `os.scandir` walk.
+
+    Exclude patterns are matched against paths relative to their base path. A directory is not
+    descended into when a pattern matches its relative path followed by a separator, since it
+    then matches every file below it as well. Files reachable more than once, through
+    overlapping paths or symlinks, are reported once, identified by device and inode.
+    """
+
+    def __init__(self, paths: List[Path], exclude_files: List[re.Pattern]):
+        self.paths = paths
+        self.exclude_files = exclude_files
+        self.pruning_patterns = [
+            pattern for pattern in exclude_files
+            if not any(token in pattern.pattern for token in _NON_PREFIX_TOKENS)
+        ]
+        self.stats = {
+            'directories': 0,
+            'pruned_directories': 0,
+            'files': 0,
+            'excluded_files': 0,
+            'duplicate_files': 0,
+            'seconds': 0.0,
+        }
+
+    def discover(self) -> List[Path]:
+        started = time.perf_counter()
+        files: List[Path] = []
+        seen: Set[Tuple[int, int]] = set()
+        for base_path in self.paths:
+            if not base_path.is_dir():
+                continue
+            self._walk(str(base_path), files, seen)
+        self.stats['files'] += len(files)
+        self.stats['seconds'] += time.perf_counter() - started
+        return files
+
+    def _walk(self, base_path: str, files: List[Path], seen: Set[Tuple[int, int]]) -> None:
+        stack = [(base_path, '')]
+        while stack:
+            dir_path, relative_dir = stack.pop()
+            try:
+                device = os.stat(dir_path).st_dev
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                logging.debug(f"Cannot list directory {dir_path}: {e}")
+                continue
+            self.stats['directories'] += 1
+
+            subdirectories = []
+            for entry in entries:
+                relative_path = relative_dir + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if any(pattern.search(relative_path + os.sep) for pattern in self.pruning_patterns):
+                            self.stats['pruned_directories'] += 1
+                        else:
+                            subdirectories.append((entry.path, relative_path + os.sep))
+                    elif entry.name.endswith('.py') and entry.is_file():
+                        if any(pattern.search(relative_path) for pattern in self.exclude_files):
+                            self.stats['excluded_files'] += 1
+                            continue
+                        if entry.is_symlink():
+                            stat = entry.stat()
+                            key = (stat.st_dev, stat.st_ino)
+                        else:
+                            key = (device, entry.inode())
+                        if key in seen:
+                            self.stats['duplicate_files'] += 1
+                            continue
+                        seen.add(key)
+                        files.append(Path(entry.path))
+                except OSError as e:
+                    logging.debug(f"Cannot read {entry.path}: {e}")
+            stack.extend(reversed(subdirectories))
+
+    def log_stats(self) -> None:
+        logging.info(
+            f"Discovered {self.stats['files']} file(s) in {self.stats['directories']} director(ies) "
+            f"in {self.stats['seconds']:.2f}s: skipped {self.stats['pruned_directories']} excluded director(ies), "
+            f"{self.stats['excluded_files']} excluded file(s) and {self.stats['duplicate_files']} duplicate(s)."
+        )
+
+
+def discover_files(paths: List[Path], exclude_files: List[re.Pattern]) -> List[Path]:
+    """Find all Python files under `paths` whose path relative to their base path is not excluded."""
+    return FileDiscovery(paths, exclude_files).discover()
@@ -0,0 +1,41 @@
+import subprocess
+from pathlib import Path
+from typing import List, Set
+
+
+class GitError(Exception):
+    pass
+
+
+def _run_git(args: List[str], cwd: Path) -> str:
+    try:
+        result = subprocess.run(
+            ['git', *args],
+            cwd=str(cwd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+    except FileNotFoundError:
+        raise GitError("git executable not found")
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode('utf-8', errors='replace').strip() or f"git {' '.join(args)} failed")
+    return result.stdout.decode('utf-8', errors='surrogateescape')
+
+
+def get_changed_files(ref: str, cwd: Path) -> Set[Path]:
+    """
+    Return the resolved paths of files changed in the working tree since the working tree
+    branched off `ref`, including untracked files that are not ignored. Changes made to `ref`
+    after the branch point are not included.
+    """
+    top_level = Path(_run_git(['rev-parse', '--show-toplevel'], cwd).strip())
+    try:
+        changed = _run_git(['diff', '--name-only', '-z', '--merge-base', ref, '--'], top_level)
+    except GitError:
+        # git before 2.30 has no --merge-base
+        merge_base = _run_git(['merge-base', 'HEAD', ref], top_level).strip()
+        changed = _run_git(['diff', '--name-only', '-z', merge_base, '--'], top_level)
+    changed = changed.split('\0')
+    untracked = _run_git(['ls-files', '--others', '--exclude-standard', '-z'], top_level).split('\0')
+    return {(top_level / name).resolve() for name in changed + untracked if name}
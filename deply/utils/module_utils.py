@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+
+def get_module_name(file_path: Path, roots: Iterable[Path]) -> Tuple[str, bool]:
+    """
+    Return the dotted module name of a file and whether it is a package `__init__.py`.
+
+    The name is relative to the outermost root containing the file; files outside every root
+    are named after the file alone.
+    """
+    file_path = Path(file_path)
+    relative_parts = None
+    for root in roots:
+        for path, base in ((file_path, Path(root)), (file_path.absolute(), Path(root).absolute())):
+            try:
+                parts = path.relative_to(base).parts
+            except ValueError:
+                continue
+            if relative_parts is None or len(parts) > len(relative_parts):
+                relative_parts = parts
+            break
+    if not relative_parts:
+        relative_parts = (file_path.name,)
+
+    parts = list(relative_parts)
+    parts[-1] = Path(parts[-1]).stem
+    is_package = parts[-1] == '__init__'
+    if is_package:
+        parts.pop()
+        if not parts:
+            parts = [file_path.parent.name]
+    return '.'.join(parts), is_package
+
+
+def get_symbol_roots(roots: Iterable[Path]) -> List[Path]:
+    """
+    Return the roots that code elements are named from: the parent directory of every root, so
+    that absolute imports naming a root itself, e.g. `app.models` for a root `proj/app`, resolve.
+    """
+    return [Path(root).parent for root in roots]
+
+
+def get_qualified_names(module_name: str, name: str) -> List[str]:
+    """
+    Return the names an element is known by: its name qualified with each suffix of its module
+    name, e.g. `src.app.models.Model`, `app.models.Model` and `models.Model`, so imports relative
+    to a directory below the analyzed paths resolve too, and last its short name `Model`, which
+    references fall back to when none of their qualified names is known.
+    """
+    module_parts = module_name.split('.')
+    return [f"{'.'.join(module_parts[i:])}.{name}" for i in range(len(module_parts))] + [name]
+
+
+def resolve_relative_module(module_name: str, is_package: bool, level: int, module: str) -> str:
+    """Return the absolute name of `from <level dots><module> import ...` inside `module_name`."""
+    if level == 0:
+        return module
+    package_parts = module_name.split('.') if is_package else module_name.split('.')[:-1]
+    # Imports climbing above the analyzed roots keep the part that is known
+    package_parts = package_parts[:max(len(package_parts) - (level - 1), 0)]
+    if module:
+        package_parts.append(module)
+    return '.'.join(package_parts)
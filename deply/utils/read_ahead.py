@@ -0,0 +1,72 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_READ_AHEAD = 32
+DEFAULT_READ_THREADS = 8
+
+
+def read_file(file_path: Path) -> Optional[bytes]:
+    """Return the content of a file, or None when it cannot be read; the consumer reports the error."""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class ReadAhead:
+    """
+    Reads files in a thread pool while their consumer parses and analyzes the previous ones.
+
+    At most `depth` files are read ahead of the consumer, which bounds the memory held by file
+    contents. Contents are yielded in the order of the paths. With a depth of 0, nothing is read
+    ahead and the consumer reads every file itself.
+    """
+
+    def __init__(
+            self,
+            depth: int = DEFAULT_READ_AHEAD,
+            threads: int = DEFAULT_READ_THREADS,
+            read: Callable[[Path], Optional[bytes]] = read_file
+    ):
+        self.depth = depth
+        self.threads = threads
+        self.read = read
+        self.stats = {'reads': 0, 'bytes': 0, 'waits': 0}
+
+    def iterate(self, file_paths: Iterable[Path]) -> Iterator[Tuple[Path, Optional[bytes]]]:
+        if self.depth <= 0:
+            for file_path in file_paths:
+                yield file_path, None
+            return
+
+        paths = iter(file_paths)
+        pending: Deque[Tuple[Path, Future]] = deque()
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.threads, self.depth)))
+        try:
+            for file_path in islice(paths, self.depth):
+                pending.append((file_path, executor.submit(self.read, file_path)))
+            while pending:
+                file_path, future = pending.popleft()
+                for next_path in islice(paths, 1):
+                    pending.append((next_path, executor.submit(self.read, next_path)))
+                if not future.done():
+                    self.stats['waits'] += 1
+                source = future.result()
+                if source is not None:
+                    self.stats['reads'] += 1
+                    self.stats['bytes'] += len(source)
+                yield file_path, source
+        finally:
+            # Reads not started yet are dropped when the consumer stops early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def log_stats(self) -> None:
+        logging.debug(
+            f"Read ahead {self.stats['reads']} file(s) ({self.stats['bytes']} bytes), "
+            f"waited for {self.stats['waits']} read(s)."
+        )
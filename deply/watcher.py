@@ -0,0 +1,170 @@
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from deply.analysis_cache import AnalysisCache
+from deply.code_analyzer import CodeAnalyzer
+from deply.collectors import BaseCollector
+from deply.collectors.collector_engine import CollectorEngine
+from deply.layer_collection import collect_file
+from deply.models.code_element import CodeElement
+from deply.models.element_index import ElementIndex
+from deply.models.reference import Reference
+from deply.models.violation import Violation
+from deply.parsed_file_store import ParsedFileStore
+from deply.reports.formats.text_report import TextReport
+from deply.rules import BaseRule, DependencyChecker
+from deply.utils.file_discovery import discover_files
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class Watcher:
+    """
+    Keeps the layer index and the per-file analysis results of a project in memory and,
+    on every refresh, re-analyzes only the files whose modification time or size changed.
+    """
+
+    def __init__(
+            self,
+            paths: List[Path],
+            exclude_files: List[re.Pattern],
+            layer_collectors: List[Tuple[str, BaseCollector]],
+            rules: List[BaseRule],
+            analysis_cache: Optional[AnalysisCache] = None
+    ):
+        self.paths = paths
+        self.exclude_files = exclude_files
+        self.collector_engine = CollectorEngine(layer_collectors)
+        self.rules = rules
+        self.analysis_cache = analysis_cache
+        self.parsed_file_store = ParsedFileStore(max_entries=0)
+
+        self.file_states: Dict[Path, Tuple[int, int]] = {}
+        self.file_matches: Dict[Path, List[Tuple[str, Set[CodeElement]]]] = {}
+        self.file_references: Dict[Path, List[Reference]] = {}
+        self.file_violations: Dict[Path, Set[Violation]] = {}
+        self.code_element_to_layer = ElementIndex()
+
+    @property
+    def violations(self) -> Set[Violation]:
+        return set().union(*self.file_violations.values())
+
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        states = {}
+        for file_path in discover_files(self.paths, self.exclude_files):
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            states[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return states
+
+    def refresh(self) -> Tuple[Set[Violation], Set[Violation]]:
+        """Re-analyze the files modified since the last refresh, returning the added and removed violations."""
+        states = self.scan()
+        modified = {file_path for file_path, state in states.items() if self.file_states.get(file_path) != state}
+        removed = set(self.file_states) - set(states)
+        self.file_states = states
+        if not modified and not removed:
+            return set(), set()
+        logging.debug(f"{len(modified)} file(s) modified, {len(removed)} file(s) removed.")
+
+        touched = modified | removed
+        old_index = self._layer_index(touched)
+        for file_path in removed:
+            self.file_matches.pop(file_path, None)
+        for file_path in sorted(modified):
+            self.parsed_file_store.forget(file_path)
+            if not self.collector_engine.may_match_path(file_path):
+                self.file_matches[file_path] = []
+                continue
+            if self.analysis_cache is not None:
+                self.analysis_cache.forget(file_path)
+            self.file_matches[file_path] = collect_file(
+                file_path, self.collector_engine, self.parsed_file_store, self.analysis_cache
+            )
+        for file_path in touched:
+            self.file_references.pop(file_path, None)
+
+        self.code_element_to_layer = ElementIndex()
+        for file_matches in self.file_matches.values():
+            for layer_name, matched in file_matches:
+                for m in matched:
+                    self.code_element_to_layer.add(m, layer_name)
+
+        # Other files only need to be re-checked when the names or layers of the touched files changed
+        files_to_check = set(self.file_matches) if self._layer_index(touched) != old_index else modified
+        return self._check_files(files_to_check | removed)
+
+    def _layer_index(self, files: Set[Path]) -> Set[Tuple[Path, str, str]]:
+        return {
+            (m.file, m.name, self.code_element_to_layer.get(m, layer_name))
+            for file_path in files
+            for layer_name, matched in self.file_matches.get(file_path, [])
+            for m in matched
+        }
+
+    def _check_files(self, files: Set[Path]) -> Tuple[Set[Violation], Set[Violation]]:
+        analyzer = CodeAnalyzer(
+            code_elements=set(self.code_element_to_layer),
+            dependency_handler=None,
+            parsed_file_store=self.parsed_file_store,
+            analysis_cache=self.analysis_cache,
+            paths=self.paths
+        )
+        symbol_table = analyzer._build_symbol_table()
+        file_to_elements = analyzer._build_file_to_element_map()
+
+        added: Set[Violation] = set()
+        removed: Set[Violation] = set()
+        for file_path in sorted(files):
+            old_violations = self.file_violations.pop(file_path, set())
+            new_violations: Set[Violation] = set()
+            elements_in_file = file_to_elements.get(file_path)
+            if elements_in_file:
+                elements_in_file_by_name = analyzer.index_elements_by_name(elements_in_file)
+                references = self.file_references.get(file_path)
+                if references is None:
+                    references = analyzer.get_references(file_path, elements_in_file_by_name) or []
+                    self.file_references[file_path] = references
+                dependency_checker = DependencyChecker(self.rules, self.code_element_to_layer, new_violations.add)
+                analyzer.dependency_handler = dependency_checker
+                analyzer.resolve_references(references, elements_in_file_by_name, symbol_table)
+                dependency_checker.flush()
+            if new_violations:
+                self.file_violations[file_path] = new_violations
+            added |= new_violations - old_violations
+            removed |= old_violations - new_violations
+        return added, removed
+
+    def run(self, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        logging.info("Building the initial layer index...")
+        self.refresh()
+        violations = self.violations
+        if violations:
+            print(TextReport(list(violations)).generate())
+        self._print_total(violations)
+        logging.info("Watching for file changes, press Ctrl+C to stop.")
+
+        while True:
+            time.sleep(interval)
+            started = time.perf_counter()
+            added, removed = self.refresh()
+            if not added and not removed:
+                continue
+            for violation in sorted(removed, key=TextReport.sort_key):
+                print(f"- {TextReport.format_violation(violation)}")
+            for violation in sorted(added, key=TextReport.sort_key):
+                print(f"+ {TextReport.format_violation(violation)}")
+            self._print_total(self.violations)
+            logging.info(f"Re-analyzed in {time.perf_counter() - started:.3f}s.")
+
+    @staticmethod
+    def _print_total(violations: Set[Violation]) -> None:
+        if violations:
+            print(f"Total violation(s): {len(violations)}", flush=True)
+        else:
+            print("No violations detected.", flush=True)
@@ -21,7 +21,7 @@ setup(
         "Operating System :: OS Independent",
     ],
     package_dir={"": "."},
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     python_requires=">=3.6",
     install_requires=[
         "PyYAML>=5.1",
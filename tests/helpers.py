@@ -0,0 +1,81 @@
+import os
+import sys
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+from deply.main import main
+
+# Layers of the projects written by `write_model_project`
+MODEL_LAYERS = [
+    {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'BaseModel'}]},
+    {'name': 'views', 'collectors': [{'type': 'directory', 'directories': ['views']}]},
+]
+MODEL_RULESET = {'views': {'disallow': ['models']}}
+
+
+@contextmanager
+def captured_output():
+    new_out, new_err = StringIO(), StringIO()
+    old_out, old_err = sys.stdout, sys.stderr
+    try:
+        sys.stdout, sys.stderr = new_out, new_err
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = old_out, old_err
+
+
+def write_files(root: Path, files: Dict[str, str]) -> None:
+    for relative_path, source in files.items():
+        file_path = Path(root) / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(source)
+
+
+def write_model_project(project_dir: Path, count: int) -> None:
+    """Write `count` models inheriting from BaseModel, each used by a view in the views directory."""
+    files = {'models/base_model.py': 'class BaseModel:\n    pass\n'}
+    for i in range(count):
+        files[f'models/model_{i}.py'] = f'from .base_model import BaseModel\n\nclass Model{i}(BaseModel):\n    pass\n'
+        files[f'views/view_{i}.py'] = (
+            f'from ..models.model_{i} import Model{i}\n\ndef view_{i}():\n    return Model{i}()\n'
+        )
+    write_files(project_dir, files)
+
+
+def write_config(
+        config_path: Path,
+        layers: Optional[List[dict]] = None,
+        ruleset: Optional[dict] = None,
+        paths: Sequence[str] = ('./test_project',)
+) -> None:
+    """Write a configuration, by default the layers and ruleset of `write_model_project`."""
+    config_data = {
+        'deply': {
+            'paths': list(paths),
+            'layers': MODEL_LAYERS if layers is None else layers,
+            'ruleset': MODEL_RULESET if ruleset is None else ruleset,
+        }
+    }
+    with Path(config_path).open('w') as f:
+        yaml.dump(config_data, f)
+
+
+def run_deply(cwd, *args: str) -> Tuple[Optional[int], str]:
+    """Run the command line in `cwd`, returning the exit code and the standard output."""
+    old_cwd = os.getcwd()
+    os.chdir(cwd)
+    exit_code = None
+    try:
+        with captured_output() as (out, err):
+            try:
+                sys.argv = ['main.py', *args]
+                main()
+            except SystemExit as e:
+                exit_code = e.code
+    finally:
+        os.chdir(old_cwd)
+    return exit_code, out.getvalue()
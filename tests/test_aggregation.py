@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.models.code_element import CodeElement
+from deply.rules import DependencyChecker, RuleFactory
+
+SOURCE = '''
+from models import Model
+
+
+def view():
+    Model()
+    Model()
+    return Model()
+
+
+def other_view():
+    return Model()
+'''
+
+
+class TestAggregation(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.views_py = self.test_dir / 'views.py'
+        self.views_py.write_text(SOURCE)
+        self.model = CodeElement(file=self.test_dir / 'models.py', name='Model', element_type='class',
+                                 line=1, column=0)
+        self.view = CodeElement(file=self.views_py, name='view', element_type='function', line=5, column=0)
+        self.other_view = CodeElement(file=self.views_py, name='other_view', element_type='function',
+                                      line=11, column=0)
+        self.code_element_to_layer = {self.model: 'models', self.view: 'views', self.other_view: 'views'}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def analyze(self, dependency_handler, aggregate_edges):
+        CodeAnalyzer(
+            code_elements=set(self.code_element_to_layer),
+            dependency_handler=dependency_handler,
+            dependency_types=['function_call'],
+            aggregate_edges=aggregate_edges
+        ).analyze()
+
+    def test_edges_are_reported_once_with_occurrences(self):
+        dependencies = []
+        self.analyze(dependencies.append, aggregate_edges=False)
+        self.assertEqual(len(dependencies), 4)
+
+        edges = []
+        self.analyze(edges.append, aggregate_edges=True)
+        self.assertEqual(
+            sorted((e.code_element.name, e.depends_on_code_element.name, e.line, e.occurrences) for e in edges),
+            [('other_view', 'Model', 12, 1), ('view', 'Model', 6, 3)]
+        )
+
+    def test_layer_summary_checks_each_layer_pair_once(self):
+        violations = []
+        checker = DependencyChecker(
+            RuleFactory.create_rules({'views': {'disallow': ['models']}}),
+            self.code_element_to_layer,
+            violations.append,
+            layer_summary=True
+        )
+        self.analyze(checker, aggregate_edges=True)
+        checker.flush()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(checker.layer_pairs, {('views', 'models')})
+
+
+if __name__ == '__main__':
+    unittest.main()
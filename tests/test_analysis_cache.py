@@ -0,0 +1,116 @@
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from deply.analysis_cache import AnalysisCache
+from deply.models.code_element import CodeElement
+from deply.models.reference import Reference
+from deply.parsed_file_store import ParsedFileStore
+from tests.helpers import run_deply, write_config
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.test_dir / 'cache'
+        self.source_py = self.test_dir / 'source.py'
+        self.source_py.write_text('class Source:\n    pass\n')
+        self.matches = [('layer', {CodeElement(file=self.source_py, name='Source', element_type='class', line=1,
+                                               column=0)})]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_entry_round_trip(self):
+        cache = AnalysisCache(self.cache_dir, config_fingerprint='config')
+        self.assertIsNone(cache.load('matches', self.source_py))
+        cache.store('matches', self.source_py, self.matches)
+        self.assertEqual(AnalysisCache(self.cache_dir, 'config').load('matches', self.source_py), self.matches)
+        references = [Reference(None, 'base.Base', 'import_from', 1, 0, 'Base')]
+        cache.store('references', self.source_py, references)
+        self.assertEqual(AnalysisCache(self.cache_dir, 'config').load('references', self.source_py), references)
+
+    def test_entries_are_not_unpickled(self):
+        class Exploit:
+            def __reduce__(self):
+                return exec, ("raise AssertionError('unpickled')",)
+
+        cache = AnalysisCache(self.cache_dir, 'config')
+        cache.store('matches', self.source_py, self.matches)
+        entry_path = cache._entry_path('matches', cache.file_key(self.source_py))
+        entry_path.write_bytes(pickle.dumps(Exploit()))
+        self.assertIsNone(cache.load('matches', self.source_py))
+        self.assertEqual(cache.stats['misses'], 1)
+
+    def test_key_depends_on_content_and_config(self):
+        key = AnalysisCache(self.cache_dir, 'config').file_key(self.source_py)
+        self.assertNotEqual(AnalysisCache(self.cache_dir, 'other config').file_key(self.source_py), key)
+        self.source_py.write_text('class Changed:\n    pass\n')
+        self.assertNotEqual(AnalysisCache(self.cache_dir, 'config').file_key(self.source_py), key)
+
+    def test_evict_removes_oldest_entries(self):
+        cache = AnalysisCache(self.cache_dir, 'config', max_size=50)
+        cache.store('matches', self.source_py, self.matches)
+        time.sleep(0.01)
+        cache.store('references', self.source_py, [])
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.load('matches', self.source_py))
+        self.assertEqual(cache.load('references', self.source_py), [])
+
+
+class TestAnalyzeWithCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        (project_dir / 'models').mkdir(parents=True)
+        (project_dir / 'views').mkdir()
+        (project_dir / 'models' / 'base_model.py').write_text('class BaseModel:\n    pass\n')
+        (project_dir / 'models' / 'my_model.py').write_text(
+            'from .base_model import BaseModel\n\nclass MyModel(BaseModel):\n    pass\n'
+        )
+        (project_dir / 'views' / 'views.py').write_text(
+            'from ..models.my_model import MyModel\n\ndef my_view():\n    model = MyModel()\n'
+        )
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml, layers=[
+            {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'BaseModel'}]},
+            {'name': 'views', 'collectors': [{'type': 'file_regex', 'regex': '.*/views.py'}]},
+        ])
+
+        self.user_cache_dir = Path(self.test_dir) / 'user_cache'
+        environment = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': str(self.user_cache_dir)})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), *extra_args)
+
+    def test_warm_run_does_not_parse(self):
+        cold = self.run_analyze()
+        self.assertTrue(any((self.user_cache_dir / 'deply').iterdir()))
+        with mock.patch.object(ParsedFileStore, '_parse', side_effect=AssertionError('parsed')):
+            warm = self.run_analyze()
+        self.assertEqual(warm, cold)
+        self.assertEqual(cold[0], 1)
+
+    def test_no_cache(self):
+        self.run_analyze('--no-cache')
+        self.assertFalse(self.user_cache_dir.exists())
+
+    def test_cache_dir(self):
+        cache_dir = Path(self.test_dir) / 'cache'
+        self.run_analyze('--cache-dir', str(cache_dir))
+        self.assertTrue(cache_dir.is_dir())
+        self.assertFalse(self.user_cache_dir.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.models.code_element import CodeElement
+from deply.models.dependency import Dependency
+from deply.rules import Baseline, BaselineError, DependencyRule
+from tests.helpers import run_deply, write_config
+
+
+class TestBaseline(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.paths = [self.test_dir]
+        self.view = CodeElement(file=self.test_dir / 'app' / 'views.py', name='view', element_type='function',
+                                line=3, column=0)
+        self.model = CodeElement(file=self.test_dir / 'app' / 'models.py', name='Model', element_type='class',
+                                 line=1, column=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def dependency(self, line, dependency_type='function_call'):
+        return Dependency(self.view, self.model, dependency_type, line, 4)
+
+    def test_fingerprints_ignore_locations(self):
+        baseline = Baseline(self.paths)
+        fingerprint = baseline.fingerprint('views', 'models', self.dependency(4))
+        self.assertEqual(baseline.fingerprint('views', 'models', self.dependency(40)), fingerprint)
+        self.assertNotEqual(baseline.fingerprint('views', 'models', self.dependency(4, 'import_from')), fingerprint)
+        self.assertNotEqual(baseline.fingerprint('views', 'base', self.dependency(4)), fingerprint)
+
+    def test_rule_drops_violations_in_the_baseline(self):
+        ruleset = {'views': {'disallow': ['models']}}
+        checks = [('views', 'models', self.dependency(4)), ('views', 'models', self.dependency(5, 'import_from'))]
+        recorder = Baseline(self.paths, record=True)
+        self.assertEqual(len(DependencyRule(ruleset, baseline=recorder).check_batch(checks[:1])), 1)
+
+        baseline = Baseline(self.paths, recorder.fingerprints)
+        rule = DependencyRule(ruleset, baseline=baseline)
+        violations = rule.check_batch(checks)
+        self.assertEqual([violation.line for violation in violations], [5])
+        self.assertIsNone(rule.check('views', 'models', self.dependency(10)))
+        self.assertEqual((baseline.suppressed, baseline.stale_count), (2, 0))
+
+    def test_write_and_load(self):
+        baseline_path = self.test_dir / 'baseline.txt'
+        Baseline(self.paths, {3, 1, 2 ** 64 - 1}).write(baseline_path)
+        lines = baseline_path.read_text().splitlines()
+        self.assertEqual(lines[1:], ['0000000000000001', '0000000000000003', 'ffffffffffffffff'])
+        self.assertEqual(Baseline.load(baseline_path, self.paths).fingerprints, {3, 1, 2 ** 64 - 1})
+
+        baseline_path.write_text('not a baseline\n')
+        with self.assertRaises(BaselineError):
+            Baseline.load(baseline_path, self.paths)
+
+
+class TestBaselineOptions(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project_dir = Path(self.test_dir) / 'test_project'
+        (self.project_dir / 'models').mkdir(parents=True)
+        (self.project_dir / 'views').mkdir()
+        (self.project_dir / 'models' / 'model.py').write_text('class Model:\n    pass\n')
+        (self.project_dir / 'views' / 'view.py').write_text(
+            'from ..models.model import Model\n\ndef view():\n    return Model()\n'
+        )
+        self.baseline_path = Path(self.test_dir) / 'baseline.txt'
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml, layers=[
+            {'name': 'models', 'collectors': [{'type': 'directory', 'directories': ['models']}]},
+            {'name': 'views', 'collectors': [{'type': 'directory', 'directories': ['views']}]},
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_only_new_violations_are_reported(self):
+        self.assertEqual(self.run_analyze()[0], 1)
+        self.assertEqual(self.run_analyze('--generate-baseline', str(self.baseline_path))[0], 0)
+        exit_code, output = self.run_analyze('--baseline', str(self.baseline_path))
+        self.assertEqual(exit_code, 0)
+        self.assertIn('No violations detected.', output)
+
+        # Moving the known violations does not report them again, new ones are reported
+        (self.project_dir / 'views' / 'view.py').write_text(
+            '\nfrom ..models.model import Model\n\n\ndef view():\n    return Model()\n\n'
+            'def other_view():\n    return Model()\n'
+        )
+        exit_code, output = self.run_analyze('--baseline', str(self.baseline_path))
+        self.assertEqual(exit_code, 1)
+        # The import of the file is a new dependency of other_view as well
+        self.assertIn('view.py:9:11', output)
+        self.assertNotIn('view.py:6:', output)
+        self.assertIn('Total violation(s): 3', output)
+
+    def test_invalid_combinations(self):
+        self.assertEqual(self.run_analyze('--generate-baseline', str(self.baseline_path), '--fail-fast')[0], 2)
+        self.assertEqual(self.run_analyze('--baseline', str(self.baseline_path))[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.generate_project import COLLECTOR_TYPES, generate_project
+from deply.main import main
+
+
+@contextmanager
+def captured_output():
+    new_out, new_err = StringIO(), StringIO()
+    old_out, old_err = sys.stdout, sys.stderr
+    try:
+        sys.stdout, sys.stderr = new_out, new_err
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = old_out, old_err
+
+
+class TestGenerateProject(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_generated_project_is_analyzed(self):
+        config_path = generate_project(self.test_dir, files=30, layers=len(COLLECTOR_TYPES))
+        self.assertEqual(len(list((self.test_dir / 'src').glob('layer_*/mod_*.py'))), 30)
+
+        profile_path = self.test_dir / 'profile.json'
+        with captured_output():
+            with self.assertRaises(SystemExit) as cm:
+                sys.argv = ['main.py', 'analyze', '--config', str(config_path), '--no-cache',
+                            '--profile', str(profile_path)]
+                main()
+        self.assertEqual(cm.exception.code, 1)
+
+        counters = json.loads(profile_path.read_text())['counters']
+        # Three classes per module, all collected by the collector of their layer
+        self.assertGreaterEqual(counters['code_elements'], 90)
+        self.assertGreater(counters['violations'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from deply.utils.git_utils import GitError, _run_git, get_changed_files
+from tests.helpers import run_deply, write_config
+
+
+@unittest.skipIf(shutil.which('git') is None, "git is not available")
+class TestChangedSince(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        (project_dir / 'models').mkdir(parents=True)
+        (project_dir / 'views').mkdir()
+        (project_dir / 'models' / 'base_model.py').write_text('class BaseModel:\n    pass\n')
+        (project_dir / 'models' / 'my_model.py').write_text(
+            'from .base_model import BaseModel\n\nclass MyModel(BaseModel):\n    pass\n'
+        )
+        self.old_view_py = project_dir / 'views' / 'old_view.py'
+        self.old_view_py.write_text('from ..models.my_model import MyModel\n\ndef old_view():\n    return MyModel()\n')
+        self.new_view_py = project_dir / 'views' / 'new_view.py'
+        self.new_view_py.write_text('def new_view():\n    return None\n')
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+        self.env = dict(os.environ, GIT_AUTHOR_NAME='test', GIT_AUTHOR_EMAIL='test@example.com',
+                        GIT_COMMITTER_NAME='test', GIT_COMMITTER_EMAIL='test@example.com')
+        for command in (['init', '-q'], ['add', '-A'], ['commit', '-q', '-m', 'initial']):
+            self.git(*command)
+
+    def git(self, *command):
+        subprocess.run(['git', *command], cwd=self.test_dir, env=self.env, check=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_only_changed_files_are_reported(self):
+        exit_code, output = self.run_analyze('--changed-since', 'HEAD')
+        self.assertEqual(exit_code, 0)
+
+        self.new_view_py.write_text('from ..models.my_model import MyModel\n\ndef new_view():\n    return MyModel()\n')
+        exit_code, output = self.run_analyze('--changed-since', 'HEAD')
+        self.assertEqual(exit_code, 1)
+        self.assertIn('new_view.py', output)
+        self.assertNotIn('old_view.py', output)
+
+    def test_changes_of_the_ref_after_the_branch_point_are_ignored(self):
+        self.git('branch', 'base')
+        self.git('checkout', '-q', '-b', 'feature')
+        self.new_view_py.write_text('from ..models.my_model import MyModel\n\ndef new_view():\n    return MyModel()\n')
+        self.git('commit', '-q', '-am', 'feature')
+        self.git('checkout', '-q', 'base')
+        self.old_view_py.write_text('from ..models.my_model import MyModel\n\ndef old_view():\n    return MyModel(1)\n')
+        self.git('commit', '-q', '-am', 'moved on')
+        self.git('checkout', '-q', 'feature')
+
+        for merge_base_option in (True, False):
+            def run_git(args, cwd):
+                if not merge_base_option and '--merge-base' in args:
+                    raise GitError("unknown option: --merge-base")
+                return _run_git(args, cwd)
+
+            with mock.patch('deply.utils.git_utils._run_git', side_effect=run_git):
+                self.assertEqual(get_changed_files('base', Path(self.test_dir)), {self.new_view_py.resolve()})
+
+        exit_code, output = self.run_analyze('--changed-since', 'base')
+        self.assertEqual(exit_code, 1)
+        self.assertIn('new_view.py', output)
+        self.assertNotIn('old_view.py', output)
+
+    def test_unknown_ref(self):
+        exit_code, _ = self.run_analyze('--changed-since', 'no-such-ref')
+        self.assertEqual(exit_code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import ast
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from deply.collectors.collector_engine import CollectorEngine, FileNodes
+from deply.collectors.collector_factory import CollectorFactory
+
+SOURCE = '''
+import django.db.models as models
+from app.decorators import login_required
+
+THRESHOLD = 10
+
+
+class UserModel(models.Model):
+    pass
+
+
+@login_required
+class UserController:
+    def handle(self):
+        pass
+
+
+@login_required
+async def async_view():
+    pass
+
+
+def helper():
+    pass
+'''
+
+
+class TestCollectorEngine(unittest.TestCase):
+    def setUp(self):
+        self.file_path = Path('/project/app/views.py')
+        self.tree = ast.parse(SOURCE)
+        layers_config = [
+            {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'django.db.models.Model'}]},
+            {'name': 'controllers', 'collectors': [{'type': 'class_name_regex', 'class_name_regex': '.*Controller$'}]},
+            {'name': 'protected', 'collectors': [{'type': 'decorator_usage', 'decorator_name': 'login_required'}]},
+            {'name': 'app', 'collectors': [{'type': 'directory', 'directories': ['app']}]},
+            {'name': 'views', 'collectors': [{'type': 'file_regex', 'regex': '.*views.py', 'element_type': 'function'}]},
+            {'name': 'bool', 'collectors': [{
+                'type': 'bool',
+                'must': [{'type': 'directory', 'directories': ['app'], 'element_type': 'class'}],
+                'must_not': [{'type': 'class_name_regex', 'class_name_regex': '.*Controller$'}],
+            }]},
+        ]
+        self.layer_collectors = CollectorFactory.create_layer_collectors(layers_config, ['/project'], [])
+
+    def test_engine_matches_individual_collectors(self):
+        expected = []
+        for layer_name, collector in self.layer_collectors:
+            matched = collector.match_in_file(self.tree, self.file_path)
+            if matched:
+                expected.append((layer_name, matched))
+
+        engine = CollectorEngine(self.layer_collectors)
+        self.assertEqual(engine.match_in_file(self.tree, self.file_path), expected)
+        self.assertEqual(
+            {layer_name: {e.name for e in matched} for layer_name, matched in expected},
+            {
+                'models': {'UserModel'},
+                'controllers': {'UserController'},
+                'protected': {'UserController', 'async_view'},
+                'app': {'THRESHOLD', 'UserModel', 'UserController', 'handle', 'helper'},
+                'views': {'handle', 'helper'},
+                'bool': {'UserModel'},
+            }
+        )
+
+    def test_engine_walks_the_tree_once(self):
+        engine = CollectorEngine(self.layer_collectors)
+        with mock.patch('deply.collectors.collector_engine.ast.walk', wraps=ast.walk) as walk:
+            engine.match_in_file(self.tree, self.file_path)
+        self.assertEqual(walk.call_count, 1)
+
+    def test_identical_configurations_share_a_collector(self):
+        layers_config = [
+            {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'django.db.models.Model'}]},
+            {'name': 'app_models', 'collectors': [{
+                'type': 'bool',
+                'must': [
+                    {'base_class': 'django.db.models.Model', 'type': 'class_inherits', 'exclude_files_regex': ''},
+                    {'type': 'directory', 'directories': ['app']},
+                ],
+            }]},
+            {'name': 'app', 'collectors': [{'type': 'directory', 'directories': ['app'], 'element_type': None}]},
+        ]
+        layer_collectors = CollectorFactory.create_layer_collectors(layers_config, ['/project'], [])
+        models_collector, bool_collector, app_collector = [collector for _, collector in layer_collectors]
+        self.assertIs(bool_collector.must_collectors[0], models_collector)
+        self.assertIs(bool_collector.must_collectors[1], app_collector)
+
+        engine = CollectorEngine(layer_collectors)
+        with mock.patch.object(
+                type(models_collector), 'match_nodes', autospec=True, side_effect=type(models_collector).match_nodes
+        ) as match_nodes:
+            matches = engine.match_in_file(self.tree, self.file_path)
+        self.assertEqual(match_nodes.call_count, 1)
+        self.assertEqual(
+            {layer_name: {e.name for e in matched} for layer_name, matched in matches},
+            {
+                'models': {'UserModel'},
+                'app_models': {'UserModel'},
+                'app': {'THRESHOLD', 'UserModel', 'UserController', 'handle', 'helper'},
+            }
+        )
+
+    def test_bool_collector_short_circuits(self):
+        bool_collector = CollectorFactory.create(
+            {
+                'type': 'bool',
+                'must': [{'type': 'directory', 'directories': ['lib']}],
+                'any_of': [{'type': 'class_name_regex', 'class_name_regex': '.*Model$'}],
+                'must_not': [{'type': 'class_name_regex', 'class_name_regex': '.*Controller$'}],
+            },
+            ['/project'], []
+        )
+        with mock.patch.object(
+                type(bool_collector.any_of_collectors[0]), 'match_nodes', autospec=True
+        ) as match_nodes:
+            self.assertEqual(bool_collector.match_in_file(self.tree, self.file_path), set())
+        match_nodes.assert_not_called()
+
+    def test_import_aliases_keep_statement_order(self):
+        tree = ast.parse('from a import Model\nimport b as Model\n')
+        file_nodes = FileNodes(tree, (ast.Import, ast.ImportFrom))
+        self.assertEqual(file_nodes.import_aliases, {'Model': 'b'})
+
+
+if __name__ == '__main__':
+    unittest.main()
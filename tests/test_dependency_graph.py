@@ -0,0 +1,143 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from deply.dependency_graph import DependencyGraph, _to_csr, find_cycles, strongly_connected_components
+from deply.models.code_element import CodeElement
+from deply.models.dependency import Dependency
+from deply.models.element_index import ElementIndex
+from tests.helpers import run_deply, write_config
+
+
+class TestStronglyConnectedComponents(unittest.TestCase):
+    def components(self, node_count, edges):
+        return find_cycles(*_to_csr(node_count, iter(sorted(edges))))
+
+    def test_finds_cycles(self):
+        edges = [(0, 1), (1, 2), (2, 0), (2, 3), (3, 4), (4, 3), (5, 5), (5, 0)]
+        self.assertEqual(self.components(6, edges), [[0, 1, 2], [3, 4]])
+
+    def test_every_node_is_in_one_component(self):
+        offsets, targets = _to_csr(4, iter([(0, 1), (1, 0), (2, 3)]))
+        components = strongly_connected_components(offsets, targets)
+        self.assertEqual(sorted(node for component in components for node in component), [0, 1, 2, 3])
+        # Reverse topological order: 3 is found before 2, which depends on it
+        self.assertLess(components.index([3]), components.index([2]))
+
+    def test_deep_graphs_do_not_recurse(self):
+        node_count = sys.getrecursionlimit() * 20
+        chain = [(i, i + 1) for i in range(node_count - 1)]
+        self.assertEqual(self.components(node_count, chain), [])
+        self.assertEqual(self.components(node_count, chain + [(node_count - 1, 0)]), [list(range(node_count))])
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.index = ElementIndex()
+        self.elements = {}
+        for name, layer in [('Model', 'models'), ('Manager', 'models'), ('view', 'views'), ('helper', 'utils')]:
+            element = CodeElement(file=Path(f'{layer}.py'), name=name, element_type='class', line=1, column=0)
+            self.index.add(element, layer)
+            self.elements[name] = element
+        self.graph = DependencyGraph(self.index, layer_names=['models', 'views', 'utils', 'unused'])
+        handled = []
+        handler = self.graph.chain(handled.append)
+        for line, (source, target) in enumerate([
+            ('Model', 'Manager'), ('Manager', 'Model'), ('Model', 'Manager'), ('view', 'Model'),
+            ('Model', 'helper'), ('helper', 'view'), ('view', 'view'),
+        ], start=1):
+            handler(Dependency(self.elements[source], self.elements[target], 'function_call', line, 0))
+        self.assertEqual(len(handled), 7)
+        self.graph.build()
+
+    def test_cycles(self):
+        self.assertEqual(self.graph.edge_count, 6)
+        ids = {name: self.index.id_of(element) for name, element in self.elements.items()}
+        self.assertEqual(self.graph.element_cycles, [sorted(ids.values())])
+        self.assertEqual(self.graph.layer_edges, {(0, 2): 1, (1, 0): 1, (2, 1): 1})
+        self.assertEqual(self.graph.layer_cycles, [[0, 1, 2]])
+
+    def test_layer_cycle_violations(self):
+        violations = self.graph.layer_cycle_violations()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual((violations[0].element_name, violations[0].line), ('Model', 5))
+        self.assertIn("Layers 'models', 'views', 'utils' depend on each other in a cycle", violations[0].message)
+
+    def test_exports(self):
+        output_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, output_dir)
+
+        self.graph.write(output_dir / 'layers.json', 'json')
+        layers = json.loads((output_dir / 'layers.json').read_text())
+        self.assertEqual([node['name'] for node in layers['nodes']], ['models', 'views', 'utils', 'unused'])
+        self.assertEqual(layers['nodes'][3]['cycle'], None)
+        self.assertEqual(layers['edges'][0], {'source': 0, 'target': 2, 'weight': 1})
+        self.assertEqual(layers['cycles'], [[0, 1, 2]])
+
+        self.graph.write(output_dir / 'elements.json', 'json', level='elements')
+        elements = json.loads((output_dir / 'elements.json').read_text())
+        self.assertEqual(len(elements['nodes']), 4)
+        self.assertEqual(elements['nodes'][0]['layer'], 'models')
+        self.assertEqual(len(elements['edges']), 6)
+
+        self.graph.write(output_dir / 'elements.graphml', 'graphml', level='elements')
+        namespace = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+        graph = ET.parse(output_dir / 'elements.graphml').getroot().find('g:graph', namespace)
+        self.assertEqual(len(graph.findall('g:node', namespace)), 4)
+        self.assertEqual(len(graph.findall('g:edge', namespace)), 6)
+
+        self.graph.write(output_dir / 'layers.dot', 'dot')
+        dot = (output_dir / 'layers.dot').read_text()
+        self.assertTrue(dot.startswith('digraph layers {'))
+        self.assertIn('n1 -> n0 [weight=1, label="1"];', dot)
+
+
+class TestGraphOptions(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        (project_dir / 'models').mkdir(parents=True)
+        (project_dir / 'views').mkdir()
+        (project_dir / 'models' / 'model.py').write_text(
+            'from ..views.view import render\n\nclass Model:\n    def show(self):\n        return render(self)\n'
+        )
+        (project_dir / 'views' / 'view.py').write_text(
+            'from ..models.model import Model\n\ndef render(model):\n    return model\n\ndef view():\n    return Model()\n'
+        )
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml, layers=[
+            {'name': 'models', 'collectors': [{'type': 'directory', 'directories': ['models']}]},
+            {'name': 'views', 'collectors': [{'type': 'directory', 'directories': ['views']}]},
+        ], ruleset={})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_export_graph(self):
+        graph_path = Path(self.test_dir) / 'graph.json'
+        exit_code, _ = self.run_analyze('--export-graph', str(graph_path))
+        self.assertEqual(exit_code, 0)
+        graph = json.loads(graph_path.read_text())
+        self.assertEqual([node['name'] for node in graph['nodes']], ['models', 'views'])
+        self.assertEqual(graph['cycles'], [[0, 1]])
+
+    def test_forbid_layer_cycles(self):
+        exit_code, output = self.run_analyze('--forbid-layer-cycles')
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Layers 'models', 'views' depend on each other in a cycle", output)
+
+    def test_unknown_graph_format(self):
+        exit_code, _ = self.run_analyze('--export-graph', 'graph.png')
+        self.assertEqual(exit_code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.dependency_index import DependencyIndex, DependencyIndexWriter
+from deply.models.element_index import ElementIndex
+from tests.helpers import run_deply, write_config
+
+
+class TestDependencyIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        (project_dir / 'models').mkdir(parents=True)
+        (project_dir / 'views').mkdir()
+        (project_dir / 'models' / 'base_model.py').write_text('class BaseModel:\n    pass\n')
+        (project_dir / 'models' / 'user.py').write_text(
+            'from .base_model import BaseModel\n\nclass User(BaseModel):\n    pass\n'
+        )
+        (project_dir / 'views' / 'user_views.py').write_text(
+            'from ..models.user import User\n\n'
+            'def show_user():\n    return User()\n\n'
+            'def list_users():\n    User()\n    return [User()]\n'
+        )
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        self.index_path = Path(self.test_dir) / 'index.sqlite3'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_main(self, *args):
+        return run_deply(self.test_dir, *args)
+
+    def analyze(self, *extra_args):
+        return self.run_main(
+            'analyze', '--config', str(self.config_yaml), '--no-cache', '--index', str(self.index_path), *extra_args
+        )
+
+    def query(self, *query_args):
+        exit_code, output = self.run_main('query', '--index', str(self.index_path), *query_args)
+        self.assertEqual(exit_code, 0)
+        return output.splitlines()
+
+    def test_queries(self):
+        self.assertEqual(self.analyze()[0], 1)
+        index = DependencyIndex(self.index_path)
+        self.assertTrue(index.complete)
+        index.close()
+
+        members = self.query('members', 'views')
+        self.assertEqual(len(members), 2)
+        self.assertTrue(members[0].endswith('function show_user [views]'))
+
+        dependents = self.query('dependents', 'models.user.User')
+        self.assertEqual(dependents, self.query('dependents', 'User'))
+        self.assertEqual(
+            [line.split(' ', 1)[1] for line in dependents if line.endswith('(function_call)')],
+            [
+                'function show_user [views] -> User [models] (function_call)',
+                'function list_users [views] -> User [models] (function_call)',
+                'function list_users [views] -> User [models] (function_call)',
+            ]
+        )
+
+        uses = self.query('uses', 'views', 'models')
+        self.assertEqual(len(uses), 1)
+        self.assertTrue(uses[0].endswith(f'class User [models]: {len(dependents)} dependenc(ies)'))
+        self.assertEqual(self.query('uses', 'models', 'views'), [])
+
+    def test_low_memory_index_is_identical(self):
+        self.analyze()
+        expected = [self.query('members', 'models'), self.query('uses', 'views', 'models')]
+        edge_count = len({line.split(' ', 1)[1] for line in self.query('dependents', 'User')})
+        self.analyze('--max-memory', '64', '--aggregate', 'edges')
+        self.assertEqual([self.query('members', 'models'), self.query('uses', 'views', 'models')], expected)
+        self.assertEqual(len(self.query('dependents', 'User')), edge_count)
+
+    def test_incomplete_index(self):
+        self.analyze('--fail-fast')
+        index = DependencyIndex(self.index_path)
+        self.assertFalse(index.complete)
+        index.close()
+
+    def test_failed_analysis_leaves_no_temporary_file(self):
+        with mock.patch.object(CodeAnalyzer, 'analyze', side_effect=RuntimeError('failed')):
+            with self.assertRaises(RuntimeError):
+                self.analyze()
+        self.assertEqual([path.name for path in Path(self.test_dir).iterdir() if path.suffix == '.tmp'], [])
+        self.assertFalse(self.index_path.exists())
+
+        with self.assertRaises(RuntimeError):
+            with DependencyIndexWriter(self.index_path, ElementIndex(), [Path(self.test_dir)]):
+                raise RuntimeError('failed')
+        self.assertEqual([path.name for path in Path(self.test_dir).iterdir() if path.suffix == '.tmp'], [])
+
+        with DependencyIndexWriter(self.index_path, ElementIndex(), [Path(self.test_dir)]) as writer:
+            writer.close()
+        self.assertTrue(self.index_path.exists())
+
+    def test_missing_index(self):
+        exit_code, _ = self.run_main('query', '--index', str(Path(self.test_dir) / 'missing.sqlite3'), 'members', 'x')
+        self.assertEqual(exit_code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import pickle
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.models.code_element import CodeElement
+from deply.models.element_index import ElementIndex
+from deply.models.element_store import ElementStore
+from tests.helpers import run_deply, write_config, write_model_project
+
+
+class TestElementStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.models_py = self.test_dir / 'app' / 'models.py'
+        self.views_py = self.test_dir / 'app' / 'views.py'
+        self.models_py.parent.mkdir()
+        self.models_py.write_text('class Model:\n    pass\n\nclass OtherModel(Model):\n    pass\n')
+        self.views_py.write_text('from app.models import Model\n\ndef view():\n    return Model()\n')
+        self.model = CodeElement(file=self.models_py, name='Model', element_type='class', line=1, column=0)
+        self.other_model = CodeElement(file=self.models_py, name='OtherModel', element_type='class', line=4, column=0)
+        self.view = CodeElement(file=self.views_py, name='view', element_type='function', line=3, column=0)
+        self.file_matches = {
+            self.models_py: [('models', {self.model, self.other_model}), ('base', {self.model})],
+            self.views_py: [('views', {self.view})],
+        }
+        self.store = ElementStore([self.test_dir])
+        for file_path, file_matches in self.file_matches.items():
+            self.store.add_file(file_path, file_matches)
+        self.store.finish()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_maps_elements_to_layers_like_the_element_index(self):
+        index = ElementIndex()
+        for file_matches in self.file_matches.values():
+            for layer_name, matched in file_matches:
+                for element in matched:
+                    index.add(element, layer_name)
+        self.assertEqual(len(self.store), len(index))
+        self.assertEqual(dict(self.store), dict(index))
+        self.assertEqual(self.store.get(self.model), 'base')
+        self.assertIsNone(self.store.get(CodeElement(file=self.views_py, name='x', element_type='variable',
+                                                     line=1, column=0)))
+        self.assertEqual(self.store.layer_counts(), {'models': 1, 'base': 1, 'views': 1})
+
+    def test_lookups(self):
+        self.assertEqual(self.store.files(), sorted([self.models_py, self.views_py]))
+        self.assertEqual(self.store.elements_in_file(self.models_py), {self.model, self.other_model})
+        self.assertEqual(self.store.lookup('app.models.Model'), {self.model})
+        self.assertEqual(self.store.lookup('models.OtherModel'), {self.other_model})
+        self.assertIsNone(self.store.lookup('views.Model'))
+        self.assertEqual(self.store.get(next(iter(self.store.lookup('app.views.view')))), 'views')
+
+    def test_lookup_cache_is_bounded(self):
+        self.store.max_lookups = 2
+        for name in ['app.models.Model', 'models.Model', 'app.views.view', 'views.view']:
+            self.store.lookup(name)
+        self.assertEqual(list(self.store._lookups), ['app.views.view', 'views.view'])
+
+    def test_store_can_be_pickled(self):
+        copy = pickle.loads(pickle.dumps(self.store))
+        self.assertEqual(copy.lookup('models.Model'), {self.model})
+        self.assertEqual(copy.get(self.view), 'views')
+
+    def test_saved_store_can_be_loaded(self):
+        saved_path = self.test_dir / 'elements.sqlite3'
+        self.store.save(saved_path)
+        loaded = ElementStore.load(saved_path, [self.test_dir])
+        self.addCleanup(loaded.close)
+        self.assertEqual(dict(loaded), dict(self.store))
+        self.assertEqual(loaded.layer_counts(), self.store.layer_counts())
+        self.assertEqual(loaded.lookup('app.models.Model'), {self.model})
+
+        saved_path.write_text('not a store')
+        with self.assertRaises(ValueError):
+            ElementStore.load(saved_path, [self.test_dir])
+
+    def test_analyzer_reads_elements_from_the_store(self):
+        results = []
+        for element_store in (None, self.store):
+            dependencies = []
+            CodeAnalyzer(
+                code_elements=set(self.store),
+                dependency_handler=dependencies.append,
+                paths=[self.test_dir],
+                element_store=element_store
+            ).analyze()
+            results.append(sorted(
+                (d.code_element.name, d.depends_on_code_element.name, d.dependency_type, d.line) for d in dependencies
+            ))
+        self.assertEqual(results[0], results[1])
+        self.assertIn(('view', 'Model', 'function_call', 4), results[0])
+
+
+class TestLowMemoryMode(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        write_model_project(project_dir, 4)
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_report_matches_in_memory_run(self):
+        expected = self.run_analyze()
+        self.assertEqual(expected[0], 1)
+        self.assertEqual(self.run_analyze('--max-memory', '64'), expected)
+        self.assertEqual(self.run_analyze('--max-memory', '64', '--jobs', '2'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.utils.file_discovery import FileDiscovery
+
+
+class TestFileDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.project_dir = self.test_dir / 'project'
+        for relative_path in [
+            'app/models.py',
+            'app/views.py',
+            'app/notes.txt',
+            'app/tests/test_views.py',
+            '.venv/lib/site.py',
+            'build/lib/app/models.py',
+        ]:
+            file_path = self.project_dir / relative_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text('')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def relative_files(self, discovery):
+        return sorted(f.relative_to(self.project_dir).as_posix() for f in discovery.discover())
+
+    def test_excluded_directories_are_pruned(self):
+        discovery = FileDiscovery([self.project_dir], [re.compile(r'\.venv'), re.compile(r'^build/')])
+        self.assertEqual(self.relative_files(discovery), ['app/models.py', 'app/tests/test_views.py', 'app/views.py'])
+        self.assertEqual(discovery.stats['pruned_directories'], 2)
+        self.assertEqual(discovery.stats['files'], 3)
+
+    def test_anchored_patterns_only_exclude_files(self):
+        discovery = FileDiscovery([self.project_dir], [re.compile(r'tests$'), re.compile(r'/views\.py$')])
+        self.assertEqual(
+            self.relative_files(discovery),
+            ['.venv/lib/site.py', 'app/models.py', 'app/tests/test_views.py', 'build/lib/app/models.py']
+        )
+        self.assertEqual(discovery.stats['pruned_directories'], 0)
+        self.assertEqual(discovery.stats['excluded_files'], 1)
+
+    def test_files_are_reported_once(self):
+        os.symlink(self.project_dir / 'app' / 'models.py', self.project_dir / 'app' / 'models_link.py')
+        discovery = FileDiscovery(
+            [self.project_dir / 'app', self.project_dir / 'app' / 'tests', self.test_dir / 'missing'],
+            [re.compile('build')]
+        )
+        self.assertEqual(self.relative_files(discovery), ['app/models.py', 'app/tests/test_views.py', 'app/views.py'])
+        self.assertEqual(discovery.stats['duplicate_files'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
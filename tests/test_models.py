@@ -0,0 +1,50 @@
+import pickle
+import unittest
+from dataclasses import FrozenInstanceError
+from pathlib import Path
+
+from deply.models import code_element
+from deply.models.code_element import CodeElement, interned_paths
+from deply.models.dependency import Dependency
+from deply.models.element_index import ElementIndex
+
+
+class TestModels(unittest.TestCase):
+    def test_code_elements_share_file_paths_and_strings(self):
+        with interned_paths():
+            first = CodeElement(file=Path('app/models.py'), name='Model', element_type='class', line=1, column=0)
+            second = CodeElement(file=Path('app/models.py'), name='Other', element_type=''.join(['cl', 'ass']),
+                                 line=5, column=0)
+        self.assertIsNone(code_element._interned_paths)
+        self.assertIs(first.file, second.file)
+        self.assertIs(first.element_type, second.element_type)
+        self.assertFalse(hasattr(first, '__dict__'))
+        with self.assertRaises(FrozenInstanceError):
+            first.name = 'Changed'
+
+    def test_pickle_round_trip(self):
+        element = CodeElement(file=Path('app/models.py'), name='Model', element_type='class', line=1, column=0)
+        dependency = Dependency(
+            code_element=element, depends_on_code_element=element, dependency_type='name_load', line=2, column=4
+        )
+        restored = pickle.loads(pickle.dumps(dependency))
+        self.assertEqual(restored, dependency)
+        self.assertEqual(hash(restored.code_element), hash(element))
+
+    def test_element_index(self):
+        index = ElementIndex()
+        element = CodeElement(file=Path('app/models.py'), name='Model', element_type='class', line=1, column=0)
+        copy = CodeElement(file=Path('app/models.py'), name='Model', element_type='class', line=1, column=0)
+        self.assertEqual(index.add(element, 'models'), 0)
+        self.assertEqual(index.add(copy, 'domain'), 0)
+        self.assertEqual(element.id, 0)
+        self.assertEqual(index.get(element), 'domain')
+        self.assertEqual(index[copy], 'domain')
+        self.assertEqual(list(index), [element])
+        self.assertIsNone(index.get(
+            CodeElement(file=Path('app/other.py'), name='Model', element_type='class', line=1, column=0)
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import run_deply, write_config, write_model_project
+
+
+class TestParallelAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        write_model_project(project_dir, 8)
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(
+            self.test_dir, 'analyze', '--config', str(self.config_yaml), '--cache-dir', 'cache', *extra_args
+        )
+
+    def test_parallel_report_matches_serial_report(self):
+        serial_exit_code, serial_output = self.run_analyze()
+        parallel_exit_code, parallel_output = self.run_analyze('--jobs', '3')
+        self.assertEqual(serial_exit_code, 1)
+        self.assertEqual(parallel_exit_code, serial_exit_code)
+        self.assertEqual(parallel_output, serial_output)
+        self.assertIn("Layer 'views' is not allowed to depend on layer 'models'", parallel_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.models.code_element import CodeElement
+from deply.parsed_file_store import ParsedFileStore
+
+
+class TestParsedFileStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.base_py = self.test_dir / 'base.py'
+        self.base_py.write_text('class Base:\n    pass\n')
+        self.child_py = self.test_dir / 'child.py'
+        self.child_py.write_text('from base import Base\n\nclass Child(Base):\n    pass\n')
+        self.broken_py = self.test_dir / 'broken.py'
+        self.broken_py.write_text('class Broken(:\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_file_is_parsed_once(self):
+        store = ParsedFileStore()
+        first = store.get(self.base_py)
+        second = store.get(self.base_py)
+        self.assertIs(first, second)
+        self.assertEqual(store.stats['parses'], 1)
+        self.assertEqual(store.stats['reused'], 1)
+
+    def test_failed_file_is_not_parsed_again(self):
+        store = ParsedFileStore()
+        self.assertIsNone(store.get(self.broken_py))
+        self.assertIsNone(store.get(self.broken_py))
+        self.assertEqual(store.stats['failed'], 1)
+
+        self.broken_py.write_text('class Broken:\n    pass\n')
+        store.forget(self.broken_py)
+        self.assertIsNotNone(store.get(self.broken_py))
+
+    def test_bounded_store_does_not_retain_overflow(self):
+        store = ParsedFileStore(max_entries=1)
+        store.get(self.base_py)
+        store.get(self.child_py)
+        store.get(self.child_py)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.stats['parses'], 3)
+        self.assertEqual(store.stats['not_retained'], 2)
+
+    def test_analyzer_reuses_trees_from_collection(self):
+        store = ParsedFileStore()
+        store.get(self.base_py)
+        store.get(self.child_py)
+        elements = {
+            CodeElement(file=self.base_py, name='Base', element_type='class', line=1, column=0),
+            CodeElement(file=self.child_py, name='Child', element_type='class', line=3, column=0),
+        }
+        dependencies = []
+        CodeAnalyzer(
+            code_elements=elements,
+            dependency_handler=dependencies.append,
+            parsed_file_store=store
+        ).analyze()
+        self.assertEqual(store.stats['parses'], 2)
+        self.assertEqual(store.stats['reused'], 2)
+        self.assertIn('class_inheritance', {d.dependency_type for d in dependencies})
+
+
+if __name__ == '__main__':
+    unittest.main()
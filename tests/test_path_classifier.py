@@ -0,0 +1,128 @@
+import ast
+import re
+import unittest
+from pathlib import Path
+
+from deply.collectors.collector_engine import CollectorEngine
+from deply.collectors.collector_factory import CollectorFactory
+from deply.collectors.path_classifier import AlternationMatcher, PathClassifier
+
+
+class TestAlternationMatcher(unittest.TestCase):
+    def test_reports_every_matching_pattern(self):
+        patterns = [re.compile(p) for p in [r'.*views\.py', r'app/.*', r'.*\.txt', r'app/views\.py$', r'(a)(p)\2']]
+        matcher = AlternationMatcher(patterns)
+        for string in ['app/views.py', 'lib/views.py', 'app/models.py', 'notes.txt', 'app']:
+            self.assertEqual(
+                matcher.match(string), {i for i, p in enumerate(patterns) if p.match(string)}, string
+            )
+
+    def test_falls_back_for_global_flags(self):
+        patterns = [re.compile(r'(?i)app/.*'), re.compile(r'lib/.*')]
+        matcher = AlternationMatcher(patterns)
+        self.assertEqual(matcher.match('APP/views.py'), {0})
+        self.assertEqual(matcher.match('lib/views.py'), {1})
+
+
+class TestPathClassifier(unittest.TestCase):
+    def setUp(self):
+        layers_config = [
+            {'name': 'views', 'collectors': [{'type': 'file_regex', 'regex': r'.*views\.py'}]},
+            {'name': 'app_views', 'collectors': [{'type': 'file_regex', 'regex': r'app/views\.py$'}]},
+            {'name': 'absolute', 'collectors': [{'type': 'file_regex', 'regex': r'/project/lib/.*'}]},
+            {'name': 'app', 'collectors': [{'type': 'directory', 'directories': ['app']}]},
+            {'name': 'nested', 'collectors': [{
+                'type': 'directory', 'directories': ['app/api', 'lib'], 'exclude_files_regex': 'test_'
+            }]},
+            {'name': 'bool', 'collectors': [{
+                'type': 'bool',
+                'must': [{'type': 'file_regex', 'regex': r'.*models\.py'}],
+                'must_not': [{'type': 'class_name_regex', 'class_name_regex': '.*Test$'}],
+            }]},
+        ]
+        self.layer_collectors = CollectorFactory.create_layer_collectors(
+            layers_config, ['/project', '/project/app'], [r'migrations/']
+        )
+        self.classifier = PathClassifier([collector for _, collector in self.layer_collectors])
+
+    def test_classifies_paths(self):
+        collectors = self.classifier.collectors
+        self.assertEqual(len(collectors), 6)
+        # The file_regex collector of the bool layer is classified on its own
+        names = {collector: name for name, collector in self.layer_collectors}
+        expected = {
+            '/project/app/views.py': {'views', 'app_views', 'app'},
+            '/project/app/models.py': {'app', 'bool'},
+            '/project/app/api/views.py': {'views', 'app', 'nested'},
+            '/project/app/api/test_views.py': {'views', 'app'},
+            '/project/app/migrations/views.py': set(),
+            '/project/lib/models.py': {'absolute', 'nested', 'bool'},
+            '/project/lib/test_models.py': {'absolute', 'bool'},
+            '/project/views.py': {'views'},
+            '/elsewhere/app/views.py': {'views'},
+        }
+        for file_path, layer_names in expected.items():
+            self.assertEqual(
+                {names.get(c, 'bool') for c in self.classifier.classify(Path(file_path))}, layer_names, file_path
+            )
+
+    def test_collectors_match_paths_without_engine(self):
+        layer_name, collector = self.layer_collectors[3]
+        self.assertEqual(layer_name, 'app')
+        tree = ast.parse('class View:\n    pass\n')
+        self.assertEqual(
+            {e.name for e in collector.match_in_file(tree, Path('/project/app/views.py'))}, {'View'}
+        )
+        self.assertEqual(collector.match_in_file(tree, Path('/project/lib/views.py')), set())
+
+
+class TestMayMatchPath(unittest.TestCase):
+    def create_engine(self, layers_config):
+        return CollectorEngine(CollectorFactory.create_layer_collectors(layers_config, ['/project'], []))
+
+    def test_path_only_layers(self):
+        engine = self.create_engine([
+            {'name': 'views', 'collectors': [{'type': 'file_regex', 'regex': r'.*views\.py'}]},
+            {'name': 'app', 'collectors': [{'type': 'directory', 'directories': ['app']}]},
+        ])
+        self.assertTrue(engine.may_match_path(Path('/project/lib/views.py')))
+        self.assertTrue(engine.may_match_path(Path('/project/app/models.py')))
+        self.assertFalse(engine.may_match_path(Path('/project/vendor/models.py')))
+
+    def test_path_independent_collectors(self):
+        engine = self.create_engine([
+            {'name': 'app', 'collectors': [{'type': 'directory', 'directories': ['app']}]},
+            {'name': 'models', 'collectors': [{
+                'type': 'class_inherits', 'base_class': 'Model', 'exclude_files_regex': 'vendor/'
+            }]},
+        ])
+        self.assertTrue(engine.may_match_path(Path('/project/lib/models.py')))
+        self.assertFalse(engine.may_match_path(Path('/project/vendor/models.py')))
+
+    def test_bool_collectors(self):
+        engine = self.create_engine([
+            {'name': 'app_models', 'collectors': [{
+                'type': 'bool',
+                'must': [
+                    {'type': 'directory', 'directories': ['app']},
+                    {'type': 'class_inherits', 'base_class': 'Model'},
+                ],
+                'must_not': [{'type': 'directory', 'directories': ['app/tests']}],
+            }]},
+            {'name': 'any_of', 'collectors': [{
+                'type': 'bool',
+                'any_of': [
+                    {'type': 'directory', 'directories': ['lib']},
+                    {'type': 'file_regex', 'regex': r'.*views\.py'},
+                ],
+            }]},
+        ])
+        self.assertTrue(engine.may_match_path(Path('/project/app/models.py')))
+        self.assertTrue(engine.may_match_path(Path('/project/app/tests/models.py')))
+        self.assertTrue(engine.may_match_path(Path('/project/lib/models.py')))
+        self.assertTrue(engine.may_match_path(Path('/project/api/views.py')))
+        self.assertFalse(engine.may_match_path(Path('/project/api/models.py')))
+
+
+if __name__ == '__main__':
+    unittest.main()
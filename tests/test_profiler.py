@@ -0,0 +1,68 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.profiler import Profiler
+from tests.helpers import run_deply, write_config, write_model_project
+
+
+class TestProfiler(unittest.TestCase):
+    def test_keeps_slowest_parses(self):
+        profiler = Profiler(slowest_files=2)
+        for i, wall in enumerate([0.3, 0.1, 0.5, 0.2]):
+            profiler.record_parse(Path(f'file_{i}.py'), wall)
+        self.assertEqual(
+            profiler.to_dict()['slowest_parses'],
+            [{'file': 'file_2.py', 'wall': 0.5}, {'file': 'file_0.py', 'wall': 0.3}]
+        )
+
+    def test_merge_worker_stats(self):
+        profiler = Profiler()
+        worker = Profiler()
+        for _ in range(2):
+            worker.stop(worker.start(), ('collectors', 'DirectoryCollector'))
+        worker.record_parse(Path('a.py'), 0.1)
+        profiler.merge_stats(worker.pop_stats())
+        self.assertEqual(profiler.sections['collectors']['DirectoryCollector']['calls'], 2)
+        self.assertEqual(len(profiler.to_dict()['slowest_parses']), 1)
+        self.assertEqual(worker.sections, {})
+
+
+class TestProfileOption(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        write_model_project(project_dir, 6)
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_profile_file(self):
+        for extra_args in ([], ['--jobs', '2']):
+            profile_path = Path(self.test_dir) / 'profile.json'
+            exit_code, _ = self.run_analyze('--profile', str(profile_path), '--profile-slowest', '3', *extra_args)
+            self.assertEqual(exit_code, 1)
+            profile = json.loads(profile_path.read_text())
+            self.assertEqual(
+                set(profile['phases']),
+                {'config_parsing', 'file_discovery', 'collection', 'dependency_analysis', 'rule_checking'}
+            )
+            self.assertEqual(
+                set(profile['sections']['collectors']), {'ClassInheritsCollector', 'DirectoryCollector'}
+            )
+            self.assertEqual(set(profile['sections']['layers']), {'models', 'views'})
+            self.assertIn('import_from', profile['sections']['dependency_types'])
+            self.assertEqual(len(profile['slowest_parses']), 3)
+            self.assertEqual(profile['sections']['collectors']['DirectoryCollector']['calls'], 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
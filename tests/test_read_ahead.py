@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.models.code_element import CodeElement
+from deply.parsed_file_store import ParsedFileStore
+from deply.utils.read_ahead import ReadAhead, read_file
+
+
+class TestReadAhead(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.files = []
+        for i in range(20):
+            file_path = self.test_dir / f'module_{i}.py'
+            file_path.write_text(f'VALUE_{i} = {i}\n')
+            self.files.append(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_yields_contents_in_order(self):
+        read_ahead = ReadAhead(depth=4, threads=3)
+        results = list(read_ahead.iterate(self.files))
+        self.assertEqual([file_path for file_path, _ in results], self.files)
+        self.assertEqual([source for _, source in results], [f.read_bytes() for f in self.files])
+        self.assertEqual(read_ahead.stats['reads'], len(self.files))
+
+    def test_reads_at_most_depth_files_ahead(self):
+        lock = threading.Lock()
+        read_paths = []
+
+        def read(file_path):
+            with lock:
+                read_paths.append(file_path)
+            return read_file(file_path)
+
+        sources = ReadAhead(depth=3, read=read).iterate(self.files)
+        for consumed, (file_path, _) in enumerate(sources, start=1):
+            with lock:
+                self.assertLessEqual(len(read_paths), consumed + 3)
+            if consumed == 5:
+                break
+        sources.close()
+        self.assertLessEqual(len(read_paths), 9)
+
+    def test_disabled_read_ahead_reads_nothing(self):
+        self.assertEqual(list(ReadAhead(depth=0).iterate(self.files[:2])), [(self.files[0], None), (self.files[1], None)])
+
+    def test_unreadable_files_are_left_to_the_consumer(self):
+        missing = self.test_dir / 'missing.py'
+        self.assertEqual(list(ReadAhead(depth=2).iterate([missing])), [(missing, None)])
+
+    def test_analysis_results_do_not_depend_on_read_ahead(self):
+        base_py = self.test_dir / 'base.py'
+        base_py.write_text('class Base:\n    pass\n')
+        child_py = self.test_dir / 'child.py'
+        child_py.write_text('from base import Base\n\nclass Child(Base):\n    pass\n')
+        code_elements = {
+            CodeElement(file=base_py, name='Base', element_type='class', line=1, column=0),
+            CodeElement(file=child_py, name='Child', element_type='class', line=3, column=0),
+        }
+
+        results = []
+        for read_ahead in (0, 4):
+            dependencies = []
+            store = ParsedFileStore()
+            CodeAnalyzer(
+                code_elements=code_elements,
+                dependency_handler=dependencies.append,
+                parsed_file_store=store,
+                paths=[self.test_dir],
+                read_ahead=read_ahead
+            ).analyze()
+            self.assertEqual(store.stats['parses'], 2)
+            results.append(dependencies)
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(results[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from pathlib import Path
+
+from deply.models.code_element import CodeElement
+from deply.models.dependency import Dependency
+from deply.rules import DependencyChecker, DependencyRule
+
+
+class TestDependencyRule(unittest.TestCase):
+    def setUp(self):
+        self.rule = DependencyRule(
+            {
+                'views': {'disallow': ['models']},
+                'services': {'allow': ['models']},
+            },
+            layer_names=['models', 'views', 'services']
+        )
+        source = CodeElement(file=Path('views.py'), name='view', element_type='function', line=1, column=0)
+        target = CodeElement(file=Path('models.py'), name='Model', element_type='class', line=1, column=0)
+        self.dependency = Dependency(
+            code_element=source, depends_on_code_element=target, dependency_type='function_call', line=3, column=4
+        )
+
+    def test_disallowed_layer(self):
+        violation = self.rule.check('views', 'models', self.dependency)
+        self.assertEqual(
+            violation.message,
+            "Layer 'views' is not allowed to depend on layer 'models'. Dependency type: function_call."
+        )
+        self.assertEqual((violation.file, violation.line, violation.column), (Path('views.py'), 3, 4))
+
+    def test_allow_list(self):
+        self.assertIsNone(self.rule.check('services', 'models', self.dependency))
+        violation = self.rule.check('services', 'views', self.dependency)
+        self.assertEqual(
+            violation.message,
+            "Layer 'services' depends on unallowed layer 'views'. Dependency type: function_call."
+        )
+
+    def test_layers_unknown_at_compile_time(self):
+        self.assertIsNone(self.rule.check('views', 'utils', self.dependency))
+        self.assertIsNotNone(self.rule.check('services', 'utils', self.dependency))
+        self.assertIsNone(self.rule.check('utils', 'models', self.dependency))
+        self.assertIsNone(self.rule.check(None, 'models', self.dependency))
+
+    def test_batch_matches_single_checks(self):
+        pairs = [(source, target) for source in ['models', 'views', 'services', 'other']
+                 for target in ['models', 'views', 'services', 'other']]
+        checks = [(source, target, self.dependency) for source, target in pairs]
+        expected = [v for v in (self.rule.check(*check) for check in checks) if v]
+        self.assertEqual(self.rule.check_batch(checks), expected)
+
+        source_ids = [self.rule.layer_id(source) for source, _ in pairs]
+        target_ids = [self.rule.layer_id(target) for _, target in pairs]
+        self.assertEqual(
+            [pairs[i] for i in self.rule.violating_indices(source_ids, target_ids)],
+            [('views', 'models'), ('services', 'views'), ('services', 'services'), ('services', 'other')]
+        )
+
+    def test_checker_flushes_pending_dependencies(self):
+        violations = []
+        checker = DependencyChecker(
+            [self.rule],
+            {self.dependency.code_element: 'views', self.dependency.depends_on_code_element: 'models'},
+            violations.append,
+            batch_size=2
+        )
+        checker(self.dependency)
+        self.assertEqual(violations, [])
+        checker.flush()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(checker.total_dependencies, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
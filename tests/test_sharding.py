@@ -0,0 +1,109 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.sharding import parse_shard, select_shard
+from tests.helpers import run_deply, write_config
+
+
+class TestShardSelection(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.files = []
+        for i in range(20):
+            file_path = self.test_dir / f'module_{i}.py'
+            file_path.write_text('x = 1\n' * (i + 1))
+            self.files.append(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for value in ('0/4', '5/4', '1', 'a/b'):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_shards_partition_the_files_by_size(self):
+        shards = [select_shard(self.files, index, 3) for index in range(1, 4)]
+        self.assertEqual(sorted(f for shard in shards for f in shard), sorted(self.files))
+        sizes = [sum(f.stat().st_size for f in shard) for shard in shards]
+        self.assertLessEqual(max(sizes) - min(sizes), max(f.stat().st_size for f in self.files))
+        # The assignment does not depend on the order of the files
+        self.assertEqual(select_shard(reversed(self.files), 2, 3), shards[1])
+
+
+class TestShardedAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        (project_dir / 'models').mkdir(parents=True)
+        (project_dir / 'views').mkdir()
+        (project_dir / 'models' / 'base_model.py').write_text('class BaseModel:\n    pass\n')
+        for i in range(6):
+            (project_dir / 'models' / f'model_{i}.py').write_text(
+                f'from .base_model import BaseModel\n\nclass Model{i}(BaseModel):\n    pass\n'
+            )
+            (project_dir / 'views' / f'view_{i}.py').write_text(
+                f'from ..models.model_{i} import Model{i}\n\n' + f'def view_{i}():\n    return Model{i}()\n' * (i + 1)
+            )
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_deply(self, command, *extra_args):
+        if command == 'merge':
+            return run_deply(self.test_dir, 'merge', *extra_args)
+        return run_deply(self.test_dir, command, '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def dependency_count(self, index_file):
+        with sqlite3.connect(Path(self.test_dir) / index_file) as connection:
+            return connection.execute('SELECT COUNT(*) FROM dependencies').fetchone()[0]
+
+    def test_merged_shards_match_a_full_analysis(self):
+        expected = self.run_deply('analyze', '--index', 'full.sqlite3')
+        self.assertEqual(expected[0], 1)
+
+        self.assertEqual(self.run_deply('analyze', '--save-elements', 'elements.sqlite3'), (0, ''))
+        results = []
+        for index in range(1, 4):
+            extra_args = ['--jobs', '2'] if index == 2 else []
+            exit_code, output = self.run_deply('analyze', '--elements', 'elements.sqlite3', '--shard', f'{index}/3',
+                                               *extra_args)
+            self.assertEqual((exit_code, output), (0, ''))
+            results.append(f'deply_shard_{index}_of_3.sqlite3')
+
+        self.assertEqual(self.run_deply('merge', *results, '--index', 'merged.sqlite3'), expected)
+        self.assertEqual(self.dependency_count('merged.sqlite3'), self.dependency_count('full.sqlite3'))
+
+    def test_shards_can_collect_elements_themselves(self):
+        expected = self.run_deply('analyze')
+        for index in range(1, 3):
+            self.assertEqual(self.run_deply('analyze', '--shard', f'{index}/2')[0], 0)
+        self.assertEqual(
+            self.run_deply('merge', 'deply_shard_2_of_2.sqlite3', 'deply_shard_1_of_2.sqlite3'), expected
+        )
+
+    def test_merge_needs_every_shard(self):
+        self.assertEqual(self.run_deply('analyze', '--shard', '1/2', '--shard-output', 'first.sqlite3')[0], 0)
+        self.assertEqual(self.run_deply('merge', 'first.sqlite3')[0], 2)
+        self.assertEqual(self.run_deply('merge', 'first.sqlite3', 'first.sqlite3')[0], 2)
+        self.assertEqual(self.run_deply('merge', 'missing.sqlite3')[0], 2)
+
+    def test_invalid_shard_options(self):
+        self.assertEqual(self.run_deply('analyze', '--shard', '3/2')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--shard', '1/2', '--fail-fast')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--shard', '1/2', '--changed-since', 'HEAD')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--shard', '1/2', '--forbid-layer-cycles')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--shard', '1/2', '--export-graph', 'graph.json')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--shard-output', 'result.sqlite3')[0], 2)
+        self.assertEqual(self.run_deply('analyze', '--elements', 'missing.sqlite3')[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
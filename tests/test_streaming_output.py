@@ -0,0 +1,103 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from deply.rules import DependencyChecker
+from tests.helpers import run_deply, write_config, write_model_project
+
+
+class TestStreamingOutput(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        project_dir = Path(self.test_dir) / 'test_project'
+        write_model_project(project_dir, 6)
+
+        self.config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(self.config_yaml)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, *extra_args):
+        return run_deply(self.test_dir, 'analyze', '--config', str(self.config_yaml), '--no-cache', *extra_args)
+
+    def test_jsonl_lists_every_violation(self):
+        exit_code, text_output = self.run_analyze()
+        violation_count = sum(1 for line in text_output.splitlines() if ' - Layer ' in line)
+
+        exit_code, output = self.run_analyze('--report-format', 'jsonl')
+        self.assertEqual(exit_code, 1)
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(len(records), violation_count)
+        self.assertEqual(
+            set(records[0]), {'file', 'line', 'column', 'element_name', 'element_type', 'message', 'occurrences'}
+        )
+        self.assertIn("Layer 'views' is not allowed to depend on layer 'models'", records[0]['message'])
+
+    def test_violations_are_written_before_the_next_dependency_is_checked(self):
+        written, found = [], []
+
+        class RecordingChecker(DependencyChecker):
+            def __call__(self, dependency):
+                written.append(sum(1 for line in sys.stdout.getvalue().splitlines() if line.startswith('{')))
+                super().__call__(dependency)
+                found.append(len(self.violation_handler.violations))
+
+        with mock.patch('deply.main.DependencyChecker', RecordingChecker):
+            exit_code, output = self.run_analyze('--report-format', 'jsonl')
+        self.assertEqual(exit_code, 1)
+        self.assertGreater(written[-1], 0)
+        self.assertEqual(written[1:], found[:-1])
+
+    def test_jsonl_written_to_output_file(self):
+        output_path = Path(self.test_dir) / 'violations.jsonl'
+        exit_code, output = self.run_analyze('--report-format', 'jsonl', '--output', str(output_path))
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(output, '')
+        self.assertTrue(output_path.read_text().endswith('\n'))
+
+    def test_json_and_sarif_reports(self):
+        records = [json.loads(line) for line in self.run_analyze('--report-format', 'jsonl')[1].splitlines()]
+        records.sort(key=lambda r: (r['file'], r['line'], r['column'], r['message'], r['element_name']))
+
+        json_path = Path(self.test_dir) / 'violations.json'
+        self.assertEqual(self.run_analyze('--report-format', 'json', '--output', str(json_path))[0], 1)
+        report = json.loads(json_path.read_text())
+        self.assertEqual(report, {'violations': records, 'total_violations': len(records)})
+
+        exit_code, output = self.run_analyze('--report-format', 'json')
+        self.assertEqual((exit_code, json.loads(output)), (1, report))
+
+        sarif_path = Path(self.test_dir) / 'violations.sarif'
+        self.assertEqual(self.run_analyze('--report-format', 'sarif', '--output', str(sarif_path))[0], 1)
+        run = json.loads(sarif_path.read_text())['runs'][0]
+        self.assertEqual(run['tool']['driver']['name'], 'deply')
+        self.assertEqual(len(run['results']), len(records))
+        location = run['results'][0]['locations'][0]['physicalLocation']
+        self.assertEqual(location['artifactLocation']['uri'], records[0]['file'])
+        self.assertEqual(location['region'], {'startLine': records[0]['line'], 'startColumn': records[0]['column'] + 1})
+        self.assertEqual(run['results'][0]['message']['text'], records[0]['message'])
+        exit_code, output = self.run_analyze('--report-format', 'sarif')
+        self.assertEqual((exit_code, json.loads(output)['runs'][0]['results']), (1, run['results']))
+
+    def test_fail_fast_stops_at_first_violation(self):
+        for extra_args in ([], ['--jobs', '2']):
+            exit_code, output = self.run_analyze('--report-format', 'jsonl', '--fail-fast', *extra_args)
+            self.assertEqual(exit_code, 1)
+            self.assertEqual(len(output.splitlines()), 1)
+
+    def test_max_violations(self):
+        exit_code, output = self.run_analyze('--max-violations', '3')
+        self.assertEqual(exit_code, 1)
+        self.assertIn('Total violation(s): 3', output)
+
+        exit_code, output = self.run_analyze('--max-violations', '0')
+        self.assertEqual(exit_code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
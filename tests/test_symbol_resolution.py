@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.code_analyzer import CodeAnalyzer
+from deply.models.code_element import CodeElement
+from deply.utils.module_utils import get_module_name, resolve_relative_module
+from tests.helpers import run_deply, write_config, write_files
+
+
+class TestModuleNames(unittest.TestCase):
+    def test_module_name_relative_to_outermost_root(self):
+        roots = [Path('/project'), Path('/project/src')]
+        self.assertEqual(get_module_name(Path('/project/src/app/models.py'), roots), ('src.app.models', False))
+        self.assertEqual(get_module_name(Path('/project/src/app/__init__.py'), roots), ('src.app', True))
+        self.assertEqual(get_module_name(Path('/elsewhere/tools.py'), roots), ('tools', False))
+
+    def test_relative_imports(self):
+        self.assertEqual(resolve_relative_module('app.views.user', False, 1, 'forms'), 'app.views.forms')
+        self.assertEqual(resolve_relative_module('app.views.user', False, 2, 'models'), 'app.models')
+        self.assertEqual(resolve_relative_module('app.views', True, 1, ''), 'app.views')
+        self.assertEqual(resolve_relative_module('views', False, 3, 'models'), 'models')
+        self.assertEqual(resolve_relative_module('views', False, 0, 'app.models'), 'app.models')
+
+
+class TestSymbolResolution(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.files = {
+            'app/__init__.py': '',
+            'app/models.py': 'class Config:\n    pass\n\n\nclass Model:\n    pass\n',
+            'app/settings.py': 'class Config:\n    pass\n',
+            'app/shared.py': 'class Helper:\n    pass\n',
+            'app/helpers.py': 'def get():\n    pass\n',
+            'app/client.py': 'from requests import get\n\n\ndef fetch():\n    return get()\n',
+            'app/views.py': (
+                'from . import models\n'
+                'from .settings import Config as Settings\n'
+                'from .shared import *\n'
+                '\n'
+                '\n'
+                'def view():\n'
+                '    Settings()\n'
+                '    models.Model.objects.get()\n'
+                '    Helper()\n'
+                '    return local_view()\n'
+                '\n'
+                '\n'
+                'def local_view():\n'
+                '    return Config\n'
+            ),
+        }
+        self.elements = set()
+        for relative_path, source in self.files.items():
+            file_path = self.test_dir / relative_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(source)
+            for line_number, line in enumerate(source.splitlines(), start=1):
+                for keyword, element_type in (('class ', 'class'), ('def ', 'function')):
+                    if line.startswith(keyword):
+                        name = line[len(keyword):].split('(')[0].split(':')[0]
+                        self.elements.add(CodeElement(file=file_path, name=name, element_type=element_type,
+                                                      line=line_number, column=0))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def dependencies_of(self, source_name, dependency_types=('function_call', 'name_load')):
+        dependencies = []
+        CodeAnalyzer(
+            code_elements=self.elements,
+            dependency_handler=dependencies.append,
+            dependency_types=list(dependency_types),
+            paths=[self.test_dir]
+        ).analyze()
+        return {
+            (d.depends_on_code_element.file.relative_to(self.test_dir).as_posix(), d.depends_on_code_element.name)
+            for d in dependencies if d.code_element.name == source_name
+        }
+
+    def test_references_resolve_through_imports(self):
+        self.assertEqual(
+            self.dependencies_of('view'),
+            {
+                ('app/settings.py', 'Config'),
+                ('app/models.py', 'Model'),
+                ('app/shared.py', 'Helper'),
+                ('app/views.py', 'local_view'),
+            }
+        )
+
+    def test_unresolved_names_fall_back_to_short_names(self):
+        self.assertEqual(
+            self.dependencies_of('local_view'), {('app/models.py', 'Config'), ('app/settings.py', 'Config')}
+        )
+
+    def test_names_imported_from_outside_the_paths_do_not_fall_back(self):
+        self.assertEqual(self.dependencies_of('fetch', ['import_from', 'function_call', 'name_load']), set())
+
+
+class TestResolutionRegressions(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project_dir = Path(self.test_dir) / 'proj'
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_analyze(self, files, paths, package=''):
+        write_files(self.project_dir, files)
+        config_yaml = Path(self.test_dir) / 'config.yaml'
+        write_config(config_yaml, layers=[
+            {'name': 'models', 'collectors': [{'type': 'directory', 'directories': [f'{package}models']}]},
+            {'name': 'views', 'collectors': [{'type': 'directory', 'directories': [f'{package}views']}]},
+        ], paths=paths)
+        return run_deply(self.test_dir, 'analyze', '--config', str(config_yaml), '--no-cache')
+
+    def test_names_re_exported_by_a_package(self):
+        exit_code, output = self.run_analyze(
+            {
+                'app/__init__.py': '',
+                'app/models/__init__.py': 'from .user import User\n',
+                'app/models/user.py': 'class User:\n    pass\n',
+                'app/views/__init__.py': '',
+                'app/views/view.py': 'from app.models import User\n\n\ndef view():\n    return User\n\n\n'
+                                     'def other_view():\n    return User()\n',
+            },
+            ['./proj'],
+            package='app/'
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertIn('view.py:1:0', output)
+        self.assertIn('view.py:5:11', output)
+        self.assertIn('view.py:9:11', output)
+
+    def test_absolute_imports_naming_the_analyzed_path(self):
+        exit_code, output = self.run_analyze(
+            {
+                'app/models/user.py': 'class User:\n    pass\n',
+                'app/views/view.py': 'from app.models.user import User\n\n\ndef view():\n    return User()\n',
+            },
+            ['./proj/app']
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertIn('view.py:1:0', output)
+        self.assertIn('view.py:5:11', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.collectors.collector_engine import CollectorEngine
+from deply.collectors.collector_factory import CollectorFactory
+from deply.collectors.text_prefilter import TextPrefilter
+from deply.layer_collection import collect_file
+from deply.parsed_file_store import ParsedFileStore
+
+SOURCES = {
+    'models.py': 'from django.db import models\n\nclass User(models.Model):\n    pass\n',
+    'aliased.py': 'from django.db.models import Model as Base\n\nclass Order(Base):\n    pass\n',
+    'views.py': 'from auth import login_required\n\n@login_required()\ndef index():\n    pass\n',
+    'similar.py': 'class BaseModel:\n    pass\n\ndef login_required_soon():\n    pass\n',
+    'helpers.py': 'def helper():\n    pass\n',
+    'unicode.py': 'class Café(Model):\n    pass\n',
+}
+
+
+class TestTextPrefilter(unittest.TestCase):
+    def test_finds_whole_words(self):
+        prefilter = TextPrefilter(['Model', 'login_required'])
+        self.assertEqual(prefilter.scan(b'class A(models.Model): pass'), {'Model'})
+        self.assertEqual(prefilter.scan(b'class BaseModel: pass\nlogin_required_soon()'), set())
+        self.assertEqual(prefilter.scan(b'@login_required\nclass A(Model): pass'), {'Model', 'login_required'})
+
+    def test_does_not_judge_non_ascii_sources(self):
+        self.assertIsNone(TextPrefilter(['Model']).scan('class Café(Model): pass'.encode('utf-8')))
+
+
+class TestCollectionPrefilter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.files = []
+        for name, source in SOURCES.items():
+            file_path = self.test_dir / name
+            file_path.write_text(source, encoding='utf-8')
+            self.files.append(file_path)
+        self.layers_config = [
+            {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'django.db.models.Model'}]},
+            {'name': 'views', 'collectors': [{'type': 'decorator_usage', 'decorator_name': 'login_required'}]},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def collect(self, layers_config, text_prefilter):
+        layer_collectors = CollectorFactory.create_layer_collectors(layers_config, [str(self.test_dir)], [])
+        engine = CollectorEngine(layer_collectors, text_prefilter=text_prefilter)
+        store = ParsedFileStore()
+        matches = {file_path.name: collect_file(file_path, engine, store) for file_path in self.files}
+        return matches, engine, store
+
+    def test_prefilter_avoids_parses_without_changing_matches(self):
+        expected, _, unfiltered_store = self.collect(self.layers_config, text_prefilter=False)
+        matches, engine, store = self.collect(self.layers_config, text_prefilter=True)
+        self.assertEqual(matches, expected)
+        self.assertEqual(
+            {name for name, file_matches in matches.items() if file_matches}, {'models.py', 'aliased.py', 'views.py'}
+        )
+        self.assertEqual(engine.prefilter_stats, {'scanned': 5, 'skipped': 2})
+        self.assertEqual(store.stats['parses'], unfiltered_store.stats['parses'] - 2)
+
+    def test_collectors_without_names_disable_skipping(self):
+        layers_config = self.layers_config + [
+            {'name': 'helpers', 'collectors': [{'type': 'class_name_regex', 'class_name_regex': '.*'}]},
+        ]
+        _, engine, store = self.collect(layers_config, text_prefilter=True)
+        self.assertEqual(engine.prefilter_stats['skipped'], 0)
+        self.assertEqual(store.stats['parses'], len(SOURCES))
+
+    def test_bool_collectors(self):
+        layers_config = [{'name': 'protected_models', 'collectors': [{
+            'type': 'bool',
+            'must': [
+                {'type': 'class_inherits', 'base_class': 'Model'},
+                {'type': 'decorator_usage', 'decorator_name': 'login_required'},
+            ],
+        }]}]
+        _, engine, _ = self.collect(layers_config, text_prefilter=True)
+        self.assertEqual(engine.prefilter_stats, {'scanned': 5, 'skipped': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from deply.collectors.collector_factory import CollectorFactory
+from deply.rules import RuleFactory
+from deply.watcher import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.project_dir = Path(self.test_dir) / 'test_project'
+        (self.project_dir / 'models').mkdir(parents=True)
+        (self.project_dir / 'views').mkdir()
+        (self.project_dir / 'models' / 'base_model.py').write_text('class BaseModel:\n    pass\n')
+        (self.project_dir / 'models' / 'my_model.py').write_text(
+            'from .base_model import BaseModel\n\nclass MyModel(BaseModel):\n    pass\n'
+        )
+        self.views_py = self.project_dir / 'views' / 'views.py'
+        self.views_py.write_text('def my_view():\n    return None\n')
+
+        layers_config = [
+            {'name': 'models', 'collectors': [{'type': 'class_inherits', 'base_class': 'BaseModel'}]},
+            {'name': 'views', 'collectors': [{'type': 'directory', 'directories': ['views']}]},
+        ]
+        paths = [str(self.project_dir)]
+        self.watcher = Watcher(
+            paths=[self.project_dir],
+            exclude_files=[re.compile(r'excluded')],
+            layer_collectors=CollectorFactory.create_layer_collectors(layers_config, paths, []),
+            rules=RuleFactory.create_rules({'views': {'disallow': ['models']}})
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_refresh_reports_violation_delta(self):
+        added, removed = self.watcher.refresh()
+        self.assertEqual((added, removed), (set(), set()))
+
+        self.views_py.write_text('from ..models.my_model import MyModel\n\ndef my_view():\n    return MyModel()\n')
+        added, removed = self.watcher.refresh()
+        self.assertTrue(added)
+        self.assertEqual(removed, set())
+        self.assertEqual({v.file for v in added}, {self.views_py})
+
+        self.assertEqual(self.watcher.refresh(), (set(), set()))
+
+        self.views_py.write_text('def my_view():\n    return None\n')
+        added, removed = self.watcher.refresh()
+        self.assertEqual(added, set())
+        self.assertTrue(removed)
+        self.assertEqual(self.watcher.violations, set())
+
+    def test_new_target_re_checks_unchanged_files(self):
+        self.views_py.write_text(
+            'from ..models.other_model import OtherModel\n\ndef my_view():\n    return OtherModel()\n'
+        )
+        self.assertEqual(self.watcher.refresh(), (set(), set()))
+
+        (self.project_dir / 'models' / 'other_model.py').write_text(
+            'from .base_model import BaseModel\n\nclass OtherModel(BaseModel):\n    pass\n'
+        )
+        added, removed = self.watcher.refresh()
+        self.assertEqual({v.file for v in added}, {self.views_py})
+
+    def test_fixed_syntax_error_is_analyzed_again(self):
+        self.views_py.write_text('from ..models.my_model import MyModel\n\ndef my_view(:\n    return MyModel()\n')
+        self.assertEqual(self.watcher.refresh(), (set(), set()))
+
+        self.views_py.write_text('from ..models.my_model import MyModel\n\ndef my_view():\n    return MyModel()\n')
+        added, removed = self.watcher.refresh()
+        self.assertEqual({v.file for v in added}, {self.views_py})
+        self.assertEqual(removed, set())
+
+
+if __name__ == '__main__':
+    unittest.main()